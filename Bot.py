@@ -4,17 +4,18 @@ import asyncio
 import logging
 import random
 import sys
-from collections.abc import Sequence
+from collections.abc import Awaitable, Callable, Coroutine, Sequence
 from datetime import datetime
+from functools import wraps
 from pathlib import Path
 from time import time
-from typing import Final
+from typing import Any, Concatenate, Final
 
 import aiofiles
 import dotenv
 import nextcord
 from httpx import RequestError
-from nextcord.ext import commands
+from nextcord.ext import commands, tasks
 from nextcord.utils import get
 
 import brawl
@@ -32,14 +33,19 @@ logger = logging.getLogger(__name__)
 # https://github.com/LevBernstein/BeardlessBot/issues/44
 SparPings: dict[int, dict[str, int]] = {}
 
-# This array stores the active instances of blackjack.
-# TODO: convert to a map, user id to game
-BlackjackGames: list[bucks.BlackjackGame] = []
+# This dictionary stores the active instances of blackjack, keyed by the id
+# of each of their players; see bucks.add_game and bucks.join_game.
+BlackjackGames: dict[int, bucks.BlackjackGame] = {}
+
+# Runs the commands sent to each game of blackjack one at a time, and
+# tracks which channel each multiplayer table was opened in.
+Tables = bucks.TableScheduler()
 
 # Replace OwnerId with your Discord user id
 OwnerId: Final[int] = 196354892208537600
 EggGuildId: Final[int] = 442403231864324119
 SparCooldown: Final[int] = 7200
+EvictionInterval: Final[int] = 60
 
 BeardlessBot = commands.Bot(
 	command_prefix="!",
@@ -74,6 +80,9 @@ async def on_ready() -> None:
 	spar command, and chunks (caches) all guilds to speed up operations.
 	This also allows you to get a good idea of how many unique users are in
 	all guilds in which Beardless Bot operates.
+
+	Lastly, it starts the loop that evicts idle games of blackjack and
+	checkpoints the rest.
 	"""
 	logger.info("Beardless Bot %s online!", __version__)
 
@@ -111,6 +120,45 @@ async def on_ready() -> None:
 			len(BeardlessBot.guilds),
 		)
 
+	if not evict_idle_games.is_running():
+		evict_idle_games.start()
+
+
+@tasks.loop(seconds=EvictionInterval)
+async def evict_idle_games() -> None:
+	"""
+	Evict games of blackjack that have sat idle for longer than GameTtl.
+
+	Runs every EvictionInterval seconds once the Bot is ready; see
+	bucks.evict_game for how abandoned bets are settled. Each game is
+	evicted during its turn, so it never closes under a command in
+	progress, and commands queued behind the eviction find no game. The
+	games still in progress are then checkpointed to bucks.GameSnapshot.
+	"""
+	evicted = False
+	for game in set(BlackjackGames.values()):
+		if bucks.is_idle(BlackjackGames, game, bucks.GameTtl):
+			async with Tables.turn(game):
+				# A command queued ahead of the eviction may have moved
+				# the game along, or ended it, in the meantime.
+				if bucks.is_idle(BlackjackGames, game, bucks.GameTtl):
+					bucks.evict_game(BlackjackGames, game)
+					evicted = True
+	if evicted:
+		await bucks.Bank.commit()
+	bucks.save_games(BlackjackGames, bucks.GameSnapshot)
+
+
+@BeardlessBot.event
+async def on_close() -> None:
+	"""
+	Shutdown method. Fires when the Bot closes its connection to Discord.
+
+	Closes the pooled client shared by every outbound API call, along with
+	each connection it still holds open.
+	"""
+	await misc.Http.close()
+
 
 @BeardlessBot.event
 async def on_guild_join(guild: nextcord.Guild) -> None:
@@ -323,18 +371,76 @@ async def on_thread_update(
 # Commands:
 
 
+def table_turn[**P](
+	command: Callable[Concatenate[misc.BotContext, P], Awaitable[int]],
+) -> Callable[Concatenate[misc.BotContext, P], Coroutine[Any, Any, int]]:
+	"""
+	Run a blackjack command during its author's game's turn.
+
+	Commands sent to one game queue up and run in the order they arrived,
+	each through to its reply; see bucks.TableScheduler.
+
+	Args:
+		command (Callable): The command, which acts on its author's game
+
+	Returns:
+		Callable: The command, waiting for its game's turn first.
+
+	"""
+
+	@wraps(command)
+	async def wrapper(
+		ctx: misc.BotContext, /, *args: P.args, **kwargs: P.kwargs,
+	) -> int:
+		result = bucks.player_in_game(BlackjackGames, ctx.author)
+		async with Tables.turn(None if result is None else result[0]):
+			return await command(ctx, *args, **kwargs)
+
+	return wrapper
+
+
+@BeardlessBot.before_invoke
+async def restore_saved_game(ctx: misc.BotContext) -> None:
+	"""
+	Restore the author's game of blackjack saved before the last restart.
+
+	Runs before every command. If bringing the game back settles its round,
+	because everyone still to play has since left the server, the author is
+	sent the round's report before their command runs.
+	"""
+	if report := bucks.restore_saved_game(BlackjackGames, ctx.author):
+		await bucks.Bank.commit()
+		await ctx.send(embed=misc.bb_embed("Beardless Bot Blackjack", report))
+
+
+@BeardlessBot.after_invoke
+async def checkpoint_games(_ctx: misc.BotContext) -> None:
+	"""
+	Checkpoint the games of blackjack if a command settled or ended one.
+
+	Runs after every command, once its balance changes are committed, so
+	that a restart never restores a round the ledger has already settled;
+	see bucks.GamesChanged.
+	"""
+	if bucks.GamesChanged.is_set():
+		bucks.save_games(BlackjackGames, bucks.GameSnapshot)
+
+
 @BeardlessBot.command(name="flip")
-async def cmd_flip(ctx: misc.BotContext, bet: str = "10") -> int:
+async def cmd_flip(
+	ctx: misc.BotContext, bet: str = "10", flips: str | None = None,
+) -> int:
 	if misc.ctx_created_thread(ctx):
 		return -1
 	if "," in ctx.author.name:
 		report = bucks.CommaWarn.format(ctx.author.mention)
+	elif bucks.player_in_game(BlackjackGames, ctx.author):
+		report = bucks.FinMsg.format(ctx.author.mention)
+	elif flips is not None:
+		report = bucks.flip_many(ctx.author, bet.lower(), flips.lower())
 	else:
-		report = (
-			bucks.FinMsg.format(ctx.author.mention)
-			if bucks.player_in_game(BlackjackGames, ctx.author)
-			else bucks.flip(ctx.author, bet.lower())
-		)
+		report = bucks.flip(ctx.author, bet.lower())
+	await bucks.Bank.commit()
 	await ctx.send(embed=misc.bb_embed("Beardless Bot Coin Flip", report))
 	return 1
 
@@ -356,12 +462,14 @@ async def cmd_blackjack(ctx: misc.BotContext, bet: str = "10") -> int:
 		else:
 			report, game = bucks.blackjack(ctx.author, bet)
 			if game and not game.round_over():
-				BlackjackGames.append(game)
+				bucks.add_game(BlackjackGames, game)
+	await bucks.Bank.commit()
 	await ctx.send(embed=misc.bb_embed("Beardless Bot Blackjack", report))
 	return 1
 
 
 @BeardlessBot.command(name="tableleave")
+@table_turn
 async def cmd_tableleave(ctx: misc.BotContext) -> int:
 	if misc.ctx_created_thread(ctx):
 		return -1
@@ -375,18 +483,18 @@ async def cmd_tableleave(ctx: misc.BotContext) -> int:
 		elif game.started:
 			report = "Cannot leave mid-round. Please wait for the round to end."
 		elif len(game.players) == 1:
-			BlackjackGames.remove(game)
+			bucks.remove_game(BlackjackGames, game)
 			report = "Game disbanded.\n"
 		elif player == game.owner:
 			assert game.owner == game.players[0]
-			game.players.remove(player)
+			bucks.leave_game(BlackjackGames, game, player)
 			game.owner = game.players[0]
 			report = (
 				f"You left. {game.owner.name.mention} "
 				"you are now the owner of the game.\n"
 			)
 		else:
-			game.players.remove(player)
+			bucks.leave_game(BlackjackGames, game, player)
 			report = "You left.\n"
 	else:
 		report = bucks.NoMultiplayerGameMsg.format(ctx.author.mention)
@@ -406,12 +514,14 @@ async def cmd_tablenew(ctx: misc.BotContext) -> int:
 	else:
 		report, game = bucks.blackjack(ctx.author, None)
 		if game:
-			BlackjackGames.append(game)
+			bucks.add_game(BlackjackGames, game)
+			Tables.open(game, ctx.channel.id)
 	await ctx.send(embed=misc.bb_embed("Beardless Bot Blackjack", report))
 	return 1
 
 
 @BeardlessBot.command(name="tablebet")
+@table_turn
 async def cmd_tablebet(ctx: misc.BotContext, bet: str = "10") -> int:
 	if misc.ctx_created_thread(ctx):
 		return -1
@@ -438,11 +548,13 @@ async def cmd_tablebet(ctx: misc.BotContext, bet: str = "10") -> int:
 						)
 						player.bet = bet_number
 					assert report is not None
+	await bucks.Bank.commit()
 	await ctx.send(embed=misc.bb_embed("Beardless Bot Blackjack", report))
 	return 1
 
 
 @BeardlessBot.command(name="deal", aliases=("hit",))
+@table_turn
 async def cmd_deal(ctx: misc.BotContext) -> int:
 	if misc.ctx_created_thread(ctx):
 		return -1
@@ -463,12 +575,14 @@ async def cmd_deal(ctx: misc.BotContext) -> int:
 					(player.check_bust() or player.perfect())
 					and not game.multiplayer
 				):
-					BlackjackGames.remove(game)
+					bucks.remove_game(BlackjackGames, game)
+	await bucks.Bank.commit()
 	await ctx.send(embed=misc.bb_embed("Beardless Bot Blackjack", report))
 	return 1
 
 
 @BeardlessBot.command(name="tablestart")
+@table_turn
 async def cmd_tablestart(ctx: misc.BotContext) -> int:
 	if misc.ctx_created_thread(ctx):
 		return -1
@@ -482,6 +596,7 @@ async def cmd_tablestart(ctx: misc.BotContext) -> int:
 		else:
 			report = "Match started\n"
 			report += game.start_game()
+	await bucks.Bank.commit()
 	await ctx.send(embed=misc.bb_embed("Beardless Bot Blackjack", report))
 	return 1
 
@@ -505,15 +620,8 @@ async def cmd_tablejoin(
 		elif result := bucks.player_in_game(BlackjackGames, join_target):
 			game, _ = result
 			if game.multiplayer:
-				if game.started:
-					game.add_player(ctx.author)
-					report = f"Joined {join_target.mention}'s blackjack game."
-				else:
-					report = (
-						f"Cannot join {join_target.mention}'s "
-						"blackjack game mid-round. "
-						"Please wait for the round to end."
-					)
+				async with Tables.turn(game):
+					report = join_table(ctx, game, join_target)
 			else:
 				report = (
 					f"Can't join {join_target.mention}'s "
@@ -525,7 +633,42 @@ async def cmd_tablejoin(
 	return 1
 
 
+def join_table(
+	ctx: misc.BotContext,
+	game: bucks.BlackjackGame,
+	join_target: nextcord.Member,
+) -> str:
+	"""
+	Seat the author of !tablejoin at join_target's multiplayer table.
+
+	Tables can only be joined between rounds, from the channel they were
+	opened in.
+
+	Args:
+		ctx (misc.BotContext): The context of the !tablejoin command
+		game (bucks.BlackjackGame): join_target's table
+		join_target (nextcord.Member): The player whose table to join
+
+	Returns:
+		str: A report of whether the author joined.
+
+	"""
+	if Tables.channel_of(game) not in {None, ctx.channel.id}:
+		return (
+			f"{join_target.mention}'s blackjack game is in another"
+			" channel. Please join it there."
+		)
+	if game.started:
+		return (
+			f"Cannot join {join_target.mention}'s blackjack game"
+			" mid-round. Please wait for the round to end."
+		)
+	bucks.join_game(BlackjackGames, game, ctx.author)
+	return f"Joined {join_target.mention}'s blackjack game."
+
+
 @BeardlessBot.command(name="stay", aliases=("stand",))
+@table_turn
 async def cmd_stay(ctx: misc.BotContext) -> int:
 	if misc.ctx_created_thread(ctx):
 		return -1
@@ -542,7 +685,26 @@ async def cmd_stay(ctx: misc.BotContext) -> int:
 			else:
 				report = game.stay_current_player()
 				if not game.multiplayer:
-					BlackjackGames.remove(game)
+					bucks.remove_game(BlackjackGames, game)
+	await bucks.Bank.commit()
+	await ctx.send(embed=misc.bb_embed("Beardless Bot Blackjack", report))
+	return 1
+
+
+@BeardlessBot.command(name="hint")
+@table_turn
+async def cmd_hint(ctx: misc.BotContext) -> int:
+	if misc.ctx_created_thread(ctx):
+		return -1
+	report = bucks.NoGameMsg.format(ctx.author.mention)
+	if result := bucks.player_in_game(BlackjackGames, ctx.author):
+		game, player = result
+		if not game.started:
+			report = "Game has not started yet"
+		elif not game.is_turn(player):
+			report = f"It is not your turn {ctx.author.mention}"
+		else:
+			report = bucks.hint(game, player)
 	await ctx.send(embed=misc.bb_embed("Beardless Bot Blackjack", report))
 	return 1
 
@@ -578,9 +740,9 @@ async def cmd_info(ctx: misc.BotContext, *, target: str = "") -> int:
 async def cmd_balance(ctx: misc.BotContext, *, target: str = "") -> int:
 	if misc.ctx_created_thread(ctx):
 		return -1
-	await ctx.send(
-		embed=bucks.balance(misc.get_target(ctx, target), ctx.message),
-	)
+	emb = bucks.balance(misc.get_target(ctx, target), ctx.message)
+	await bucks.Bank.commit()
+	await ctx.send(embed=emb)
 	return 1
 
 
@@ -595,6 +757,7 @@ async def cmd_leaderboard(ctx: misc.BotContext, *, target: str = "") -> int:
 		)
 	else:
 		embed = bucks.leaderboard(misc.get_target(ctx, target), ctx.message)
+	await bucks.Bank.commit()
 	await ctx.send(embed=embed)
 	return 1
 
@@ -642,6 +805,7 @@ async def cmd_reset(ctx: misc.BotContext) -> int:
 			report += " Your bet has also been reset to 10."
 		else:
 			report = bucks.FinMsg.format(ctx.author.mention)
+	await bucks.Bank.commit()
 	await ctx.send(embed=misc.bb_embed("BeardlessBucks Reset", report))
 	return 1
 
@@ -662,7 +826,9 @@ async def cmd_register(ctx: misc.BotContext) -> int:
 	"""
 	if misc.ctx_created_thread(ctx):
 		return -1
-	await ctx.send(embed=bucks.register(ctx.author))
+	emb = bucks.register(ctx.author)
+	await bucks.Bank.commit()
+	await ctx.send(embed=emb)
 	return 1
 
 
@@ -1033,6 +1199,7 @@ async def cmd_buy(
 					"Not enough BeardlessBucks. You need"
 					" 50000 to buy a special color, {}."
 				)
+	await bucks.Bank.commit()
 	await ctx.send(embed=misc.bb_embed(
 		"Beardless Bot Special Colors", report.format(ctx.author.mention),
 	))
@@ -1387,7 +1554,11 @@ def launch() -> None:
 	run without a Brawlhalla API key, but not having a Discord token is fatal.
 
 	Note that commands.Bot.run() is blocking; you can't include any method
-	calls after that if you actually want them to fire.
+	calls after that if you actually want them to fire before shutdown. The
+	only things done after it are saving any games of blackjack still in
+	progress, which are picked up again after the next launch, and
+	compacting the BeardlessBucks journal. The pooled HTTP client opened
+	beforehand is closed by on_close, while the event loop still runs.
 	"""
 	env = dotenv.dotenv_values(".env")
 	global BrawlKey  # noqa: PLW0603
@@ -1400,6 +1571,8 @@ def launch() -> None:
 			" commands will not be active.",
 		)
 
+	bucks.DormantGames.update(bucks.load_games(bucks.GameSnapshot))
+	misc.Http.open()
 	try:
 		token = env["DISCORDTOKEN"]
 		assert isinstance(token, str)
@@ -1411,6 +1584,8 @@ def launch() -> None:
 		)
 	except nextcord.DiscordException:
 		logger.exception("Encountered DiscordException!")
+	bucks.save_games(BlackjackGames, bucks.GameSnapshot)
+	bucks.Bank.close()
 
 
 if __name__ == "__main__":  # pragma: no cover
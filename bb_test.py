@@ -24,6 +24,7 @@ import operator
 import os
 import subprocess
 import sys
+import threading
 import time
 from collections import deque
 from collections.abc import AsyncIterator
@@ -56,8 +57,10 @@ from pytest_httpx import HTTPXMock
 import Bot
 import brawl
 import bucks
+import ledger
 import logs
 import misc
+import simulate
 
 logger = logging.getLogger(__name__)
 
@@ -1384,7 +1387,9 @@ def test_full_type_checking_with_mypy_for_code_quality() -> None:
 		"--python-executable=" + sys.executable,
 		f"--python-version={sys.version_info.major}.{sys.version_info.minor}",
 	])
-	assert stdout == "Success: no issues found in 6 source files\n"
+	assert stdout == (
+		f"Success: no issues found in {len(FilesToCheck)} source files\n"
+	)
 	assert not stderr
 	assert exit_code == 0
 
@@ -1600,6 +1605,8 @@ async def test_on_ready(caplog: pytest.LogCaptureFixture) -> None:
 	)
 	await Bot.on_ready()
 	assert caplog.records[-1].args == (2, 3)
+	assert Bot.evict_idle_games.is_running()
+	Bot.evict_idle_games.cancel()
 
 
 @MarkAsync
@@ -1632,6 +1639,7 @@ async def test_on_ready_raises_exceptions(
 		"Avatar file not found! Check your directory structure."
 	)
 	assert caplog.records[3].msg == "Bot is in no servers! Add it to a server."
+	Bot.evict_idle_games.cancel()
 
 
 @MarkAsync
@@ -2434,6 +2442,66 @@ def test_write_money() -> None:
 	) == (bucks.MoneyFlags.NotEnoughBucks, 200)
 
 
+def test_adjust_balance() -> None:
+	bb = MockMember(
+		MockUser("Beardless Bot", discriminator="5757", user_id=misc.BbId),
+		"Beardless Bot",
+	)
+	bucks.reset(bb)
+	assert bucks.adjust_balance(bb, -150) == (
+		bucks.MoneyFlags.BalanceChanged, 50,
+	)
+	assert bucks.adjust_balance(bb, -100) == (
+		bucks.MoneyFlags.NotEnoughBucks, 50,
+	)
+	assert bucks.adjust_balance(bb, 50, min_balance=200) == (
+		bucks.MoneyFlags.NotEnoughBucks, 50,
+	)
+	assert bucks.adjust_balance(bb, 0) == (
+		bucks.MoneyFlags.BalanceUnchanged, 50,
+	)
+	bucks.reset(bb)
+
+
+def test_settle_bets(tmp_path: Path) -> None:
+	bank = ledger.FileLedger(tmp_path / "money.csv")
+	bank.set(1, 300, "foo#0")
+	bank.set(2, 300, "bar#0")
+	foo = MockMember(MockUser("foo", discriminator="0", user_id=1))
+	bar = MockMember(MockUser("bar", discriminator="0", user_id=2))
+	spam = MockMember(MockUser("spam", discriminator="0", user_id=3))
+	with pytest.MonkeyPatch.context() as mp:
+		mp.setattr("bucks.Bank", bank)
+		bucks.settle_bets([(foo, 50), (bar, -50), (spam, -50)])
+	assert [
+		entry.balance for entry in map(bank.get, (1, 2, 3)) if entry is not None
+	] == [350, 250, 300]
+
+
+def test_write_money_defers_name_changes() -> None:
+	bb = MockMember(
+		MockUser("Beardless Bot", discriminator="5757", user_id=misc.BbId),
+		"Beardless Bot",
+	)
+	renamed = MockMember(
+		MockUser("Bearded Bot", discriminator="5757", user_id=misc.BbId),
+		"Bearded Bot",
+	)
+	bucks.reset(bb)
+	assert bucks.write_money(
+		renamed, 300, writing=False, adding=False,
+	) == (bucks.MoneyFlags.BalanceUnchanged, 200)
+	entry = bucks.Bank.get(misc.BbId)
+	assert entry is not None
+	assert entry.name == str(bb)
+
+	bucks.leaderboard()
+	entry = bucks.Bank.get(misc.BbId)
+	assert entry is not None
+	assert entry.name == str(renamed)
+	bucks.reset(bb)
+
+
 def test_leaderboard() -> None:
 	lb = bucks.leaderboard()
 	assert lb.title == "BeardlessBucks Leaderboard"
@@ -2460,6 +2528,437 @@ def test_leaderboard() -> None:
 	assert lb.fields[-1].name == "Foobar's balance:"
 
 
+def test_ledger_replays_journal_on_load(tmp_path: Path) -> None:
+	path = tmp_path / "money.csv"
+	path.write_text("1,300,foo#0\n2,50,bar#0", encoding="UTF-8")
+	bank = ledger.FileLedger(path)
+	assert len(bank.entries) == 2
+	bank.set(2, 75, "bar#0")
+	bank.set(3, 300, "spam#0")
+	bank.sync()
+	assert path.read_text(encoding="UTF-8") == "1,300,foo#0\n2,50,bar#0"
+	records, _ = ledger.decode_records(bank.journal_path.read_bytes())
+	assert [record[:3] for record in records] == [(2, 25, 75), (3, 300, 300)]
+	assert [record[4] for record in records] == ["", "spam#0"]
+
+	bank = ledger.FileLedger(path)
+	entry = bank.get(2)
+	assert entry is not None
+	assert entry.balance == 75
+	assert entry.name == "bar#0"
+	assert bank.get(3) is not None
+	assert bank.get(4) is None
+
+
+def test_ledger_drops_torn_journal_record(
+	tmp_path: Path, caplog: pytest.LogCaptureFixture,
+) -> None:
+	path = tmp_path / "money.csv"
+	path.write_text("1,300,foo#0", encoding="UTF-8")
+	journal = tmp_path / "money.journal"
+	torn = ledger.encode_record(1, -100, 100)
+	journal.write_bytes(
+		ledger.JournalMagic + ledger.encode_record(1, -50, 250) + torn[:-3],
+	)
+	bank = ledger.FileLedger(path)
+	entry = bank.get(1)
+	assert entry is not None
+	assert entry.balance == 250
+	assert caplog.records[0].getMessage() == (
+		f"Dropped {len(torn) - 3} bytes of torn journal records."
+	)
+	assert len(journal.read_bytes()) == (
+		len(ledger.JournalMagic) + len(torn)
+	)
+
+	journal.write_bytes(b"1,300,foo#0\n")
+	with pytest.raises(ledger.LedgerError):
+		ledger.FileLedger(path)
+
+
+def test_ledger_compacts_journal_into_snapshot(tmp_path: Path) -> None:
+	path = tmp_path / "money.csv"
+	path.write_text("1,300,foo#0", encoding="UTF-8")
+	bank = ledger.FileLedger(path, compact_threshold=2)
+	bank.set(1, 200, "foo#0")
+	assert bank.journal_path.exists()
+	bank.set(2, 300, "bar#0")
+	assert not bank.journal_path.exists()
+	assert path.read_text(encoding="UTF-8") == "1,200,foo#0\n2,300,bar#0"
+
+
+def test_ledger_binary_snapshot(tmp_path: Path) -> None:
+	csv_path = tmp_path / "money.csv"
+	csv_path.write_text(
+		"3,300,spam#0\n1,50,foo#0\n2,75,bär#0", encoding="UTF-8",
+	)
+	bank = ledger.FileLedger(tmp_path / "money.bin")
+	assert bank.binary
+	data = bank.path.read_bytes()
+	assert len(data) == (
+		ledger.SnapshotHeader.size
+		+ 3 * ledger.SnapshotRecord.size
+		+ len("foo#0bär#0spam#0".encode())
+	)
+	entry = ledger.find_record(data, 2)
+	assert entry is not None
+	assert (entry.balance, entry.name) == (75, "bär#0")
+	assert ledger.find_record(data, 0) is None
+	assert ledger.find_record(data, 4) is None
+	assert {
+		user_id: (entry.balance, entry.name)
+		for user_id, entry in ledger.decode_snapshot(data).items()
+	} == {1: (50, "foo#0"), 2: (75, "bär#0"), 3: (300, "spam#0")}
+
+	bank.set(4, 300, "eggs#0")
+	bank.close()
+	bank = ledger.FileLedger(tmp_path / "money.bin")
+	assert bank.get(4) is not None
+	bank.export_csv(tmp_path / "export.csv")
+	assert (tmp_path / "export.csv").read_text(encoding="UTF-8") == (
+		"1,50,foo#0\n2,75,bär#0\n3,300,spam#0\n4,300,eggs#0"
+	)
+	assert csv_path.read_text(encoding="UTF-8").startswith("3,300,spam#0")
+
+	with pytest.raises(ledger.LedgerError):
+		ledger.decode_snapshot(csv_path.read_bytes())
+
+
+def test_ledger_maps_binary_snapshot(tmp_path: Path) -> None:
+	path = tmp_path / "money.bin"
+	path.write_bytes(ledger.encode_snapshot({
+		user_id: ledger.LedgerEntry(user_id * 10, f"user{user_id}#0")
+		for user_id in range(1, 201)
+	}))
+	bank = ledger.FileLedger(path)
+	assert bank.snapshot is not None
+	assert not bank.entries
+	assert len(bank) == 200
+	for user_id in range(1, 201):
+		entry = bank.get(user_id)
+		assert entry is not None
+		assert entry.balance == user_id * 10
+	assert bank.get(0) is None
+	assert bank.get(201) is None
+
+	bank.set(150, 5, "user150#1")
+	bank.set(201, 0, "user201#0")
+	assert list(bank.entries) == [150, 201]
+	assert [entry.name for entry in bank.top(2)] == ["user200#0", "user199#0"]
+	assert bank.rank(150) == 200
+	assert len(bank) == 201
+	assert dict(bank.records())[150].name == "user150#1"
+	bank.close()
+	assert not bank.entries
+	entry = bank.get(150)
+	assert entry is not None
+	assert entry.name == "user150#1"
+
+
+def test_ledger_rank_index_tracks_writes(tmp_path: Path) -> None:
+	path = tmp_path / "money.csv"
+	path.write_text("1,300,foo#0\n2,50,bar#0\n3,300,spam#0", encoding="UTF-8")
+	bank = ledger.FileLedger(path)
+	assert [entry.name for entry in bank.top(2)] == ["spam#0", "foo#0"]
+	assert bank.rank(2) == 3
+	bank.set(2, 1000, "bar#0")
+	bank.set(4, 300, "eggs#0")
+	assert [entry.balance for entry in bank.top(10)] == [1000, 300, 300, 300]
+	assert bank.rank(2) == 1
+	assert bank.rank(1) == 4
+	assert bank.rank(5) is None
+	assert bank.ranks.keys == sorted(bank.ranks.keys)
+
+
+@MarkAsync
+async def test_ledger_group_commits_concurrent_changes(tmp_path: Path) -> None:
+	bank = ledger.FileLedger(tmp_path / "money.csv", commit_window=0.01)
+	# Let the shared ledger finish any group commit left by other tests.
+	await bucks.Bank.commit()
+	fsyncs: list[int] = []
+	with pytest.MonkeyPatch.context() as mp:
+		mp.setattr("os.fsync", fsyncs.append)
+		for user_id in range(5):
+			bank.set(user_id, 300, f"user{user_id}#0")
+		assert not fsyncs
+		await asyncio.gather(bank.commit(), bank.commit())
+		assert len(fsyncs) == 1
+		await bank.commit()
+	assert len(fsyncs) == 1
+	records, _ = ledger.decode_records(bank.journal_path.read_bytes())
+	assert len(records) == 5
+
+
+def test_sharded_ledger_matches_single_ledger(tmp_path: Path) -> None:
+	path = tmp_path / "money.csv"
+	path.write_text(
+		"\n".join(
+			f"{user_id},{user_id * 37 % 500},user{user_id}#0"
+			for user_id in range(1, 101)
+		),
+		encoding="UTF-8",
+	)
+	single = ledger.FileLedger(path)
+	sharded = ledger.open_ledger(tmp_path / "money.bin", shards=4)
+	assert isinstance(sharded, ledger.ShardedLedger)
+	assert all(
+		ledger.shard_path(tmp_path / "money.bin", i).exists() for i in range(4)
+	)
+	assert all(len(shard) for shard in sharded.shards)
+	assert len(sharded) == 100
+	for bank in (single, sharded):
+		bank.set(101, 1000, "user101#0")
+		assert bank.adjust(7, -259, "user7#0") == (True, 0)
+	assert [entry.name for entry in sharded.top(20)] == [
+		entry.name for entry in single.top(20)
+	]
+	for user_id in range(1, 102):
+		assert sharded.rank(user_id) == single.rank(user_id)
+	sharded.close()
+
+	sharded = ledger.open_ledger(tmp_path / "money.bin", shards=4)
+	entry = sharded.get(101)
+	assert entry is not None
+	assert entry.balance == 1000
+	assert sharded.rank(101) == 1
+
+
+def test_sharded_ledger_reshards_when_count_changes(tmp_path: Path) -> None:
+	path = tmp_path / "money.bin"
+	bank = ledger.open_ledger(path, shards=4)
+	bank.set_many(
+		(user_id, user_id, f"user{user_id}#0") for user_id in range(1, 101)
+	)
+	bank.close()
+	assert ledger.shard_count(path) == 4
+	assert len(simulate.load_balances(path)) == 100
+
+	bank = ledger.open_ledger(path, shards=2)
+	assert isinstance(bank, ledger.ShardedLedger)
+	assert ledger.shard_count(path) == 2
+	assert not ledger.shard_path(path, 2).exists()
+	assert len(bank) == 100
+	assert bank.adjust(7, 5, "user7#0") == (True, 12)
+	bank.close()
+
+	bank = ledger.open_ledger(path)
+	assert isinstance(bank, ledger.FileLedger)
+	assert ledger.shard_count(path) == 1
+	assert not ledger.shard_path(path, 0).exists()
+	assert len(bank) == 100
+	entry = bank.get(7)
+	assert entry is not None
+	assert entry.balance == 12
+	bank.close()
+	assert simulate.load_balances(path)[7] == 12
+
+
+def test_ledger_batches_renames(tmp_path: Path) -> None:
+	path = tmp_path / "money.csv"
+	path.write_text("1,300,foo#0\n2,50,bar#0", encoding="UTF-8")
+	bank = ledger.FileLedger(path)
+	bank.rename(1, "foo#1")
+	bank.rename(2, "bar#1")
+	assert bank.adjust(2, 0, "bar#2") == (True, 50)
+	assert not bank.journal_path.exists()
+	bank.set(1, 250, "foo#2")
+	assert bank.flush_names() == 1
+	bank.sync()
+	records, _ = ledger.decode_records(bank.journal_path.read_bytes())
+	assert [(record[0], record[4]) for record in records] == [
+		(1, "foo#2"), (2, "bar#2"),
+	]
+	assert bank.flush_names() == 0
+
+
+def test_ledger_adjust_never_overdraws(tmp_path: Path) -> None:
+	path = tmp_path / "money.csv"
+	path.write_text("1,500,foo#0", encoding="UTF-8")
+	ledger.migrate_to_sqlite(path, tmp_path / "money.db")
+	bank = ledger.FileLedger(path)
+	spent: list[bool] = []
+
+	def spend() -> None:
+		spent.extend(bank.adjust(1, -1, "foo#0")[0] for _ in range(100))
+
+	threads = [threading.Thread(target=spend) for _ in range(8)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	assert spent.count(True) == 500
+	assert bank.adjust(1, 10, "foo#1", min_balance=20) == (False, 0)
+	with pytest.raises(KeyError):
+		bank.adjust(2, 10, "bar#0")
+
+	db = ledger.SqliteLedger(tmp_path / "money.db")
+	assert db.adjust(1, -450, "foo#1") == (True, 50)
+	assert db.adjust(1, -100, "foo#1") == (False, 50)
+	assert db.adjust(1, 10, "foo#1", min_balance=100) == (False, 50)
+	with pytest.raises(KeyError):
+		db.adjust(2, 10, "bar#0")
+	db.close()
+
+
+def test_ledger_transaction_applies_as_one_batch(tmp_path: Path) -> None:
+	path = tmp_path / "money.csv"
+	path.write_text("1,300,foo#0\n2,50,bar#0\n3,10,spam#0", encoding="UTF-8")
+	ledger.migrate_to_sqlite(path, tmp_path / "money.db")
+	bank = ledger.FileLedger(path)
+	with bank.transaction() as tx:
+		tx.add(1, 100, "foo#0")
+		tx.add(2, -60, "bar#0")
+		tx.add(3, -10, "spam#1")
+	assert tx.results == [(True, 400), (False, 50), (True, 0)]
+	bank.sync()
+	data = bank.journal_path.read_bytes()
+	records, end = ledger.decode_records(data)
+	assert [record[:3] for record in records] == [(1, 100, 400), (3, -10, 0)]
+
+	# A batch cut short by a crash is dropped whole on the next load.
+	bank.journal_path.write_bytes(data[:-3])
+	bank = ledger.FileLedger(path)
+	assert end == len(data)
+	assert [
+		(entry.balance, entry.name)
+		for entry in map(bank.get, (1, 2, 3)) if entry is not None
+	] == [(300, "foo#0"), (50, "bar#0"), (10, "spam#0")]
+
+	def settle(*changes: tuple[int, int], fail: bool = False) -> None:
+		with bank.transaction() as tx:
+			for user_id, delta in changes:
+				tx.add(user_id, delta, f"user{user_id}#0")
+			if fail:
+				raise ValueError
+
+	with pytest.raises(KeyError):
+		settle((1, 100), (4, 100))
+	with pytest.raises(ValueError):  # noqa: PT011
+		settle((1, 100), fail=True)
+	entry = bank.get(1)
+	assert entry is not None
+	assert entry.balance == 300
+
+	db = ledger.SqliteLedger(tmp_path / "money.db")
+	with db.transaction() as tx:
+		tx.add(1, 100, "foo#0")
+		tx.add(2, -60, "bar#0")
+		tx.add(1, -400, "foo#0")
+	assert tx.results == [(True, 400), (False, 50), (True, 0)]
+	entry = db.get(1)
+	assert entry is not None
+	assert entry.balance == 0
+	db.close()
+
+
+@MarkAsync
+async def test_ledger_writes_off_the_event_loop(tmp_path: Path) -> None:
+	path = tmp_path / "money.csv"
+	bank = ledger.FileLedger(path, compact_threshold=3)
+	threads: set[int] = set()
+	with pytest.MonkeyPatch.context() as mp:
+		mp.setattr("os.fsync", lambda _: threads.add(threading.get_ident()))
+		for user_id in range(3):
+			bank.set(user_id, 300, f"user{user_id}#0")
+		await bank.commit()
+	assert threads
+	assert threading.get_ident() not in threads
+	assert path.read_text(encoding="UTF-8").count("\n") == 2
+	assert not bank.journal_path.exists()
+
+
+@MarkAsync
+async def test_ledger_remaps_snapshot_after_background_compact(
+	tmp_path: Path,
+) -> None:
+	path = tmp_path / "money.bin"
+	bank = ledger.FileLedger(path, compact_threshold=3)
+	for user_id in range(3):
+		bank.set(user_id, 300, f"user{user_id}#0")
+	bank.set(3, 50, "late#0")
+	await bank.commit()
+	assert bank.snapshot is not None
+	assert len(bank.snapshot) == 3
+	assert list(bank.entries) == [3]
+	entry = bank.get(1)
+	assert entry is not None
+	assert entry.balance == 300
+	assert len(bank) == 4
+	bank.close()
+
+
+def test_sqlite_ledger_matches_file_ledger(tmp_path: Path) -> None:
+	path = tmp_path / "money.csv"
+	path.write_text("1,300,foo#0\n2,50,bar#0\n3,300,spam#0", encoding="UTF-8")
+	assert ledger.migrate_to_sqlite(path, tmp_path / "money.db") == 3
+	with pytest.raises(FileExistsError):
+		ledger.migrate_to_sqlite(path, tmp_path / "money.db")
+	bank = ledger.open_ledger(tmp_path / "money.db")
+	assert isinstance(bank, ledger.SqliteLedger)
+	assert isinstance(ledger.open_ledger(path), ledger.FileLedger)
+	assert [entry.name for entry in bank.top(2)] == ["spam#0", "foo#0"]
+	assert bank.rank(2) == 3
+	bank.set(2, 1000, "bar#1")
+	bank.set(4, 300, "eggs#0")
+	assert [entry.balance for entry in bank.top(10)] == [1000, 300, 300, 300]
+	assert bank.rank(2) == 1
+	assert bank.rank(1) == 4
+	assert bank.rank(5) is None
+	bank.close()
+
+	bank = ledger.open_ledger(tmp_path / "money.db")
+	entry = bank.get(2)
+	assert entry is not None
+	assert entry.balance == 1000
+	assert entry.name == "bar#1"
+	assert bank.get(5) is None
+	bank.close()
+
+
+def test_sqlite_ledger_zero_delta_writes_nothing(tmp_path: Path) -> None:
+	bank = ledger.SqliteLedger(tmp_path / "money.db")
+	bank.set(1, 300, "foo#0")
+	changes = bank._conn.total_changes
+	assert bank.adjust(1, 0, "foo#1") == (True, 300)
+	assert bank.adjust(1, 0, "foo#1", min_balance=500) == (False, 300)
+	assert bank._conn.total_changes == changes
+	entry = bank.get(1)
+	assert entry is not None
+	assert entry.name == "foo#0"
+	assert bank.flush_names() == 1
+	entry = bank.get(1)
+	assert entry is not None
+	assert entry.name == "foo#1"
+	assert bank.adjust(1, -50, "foo#2") == (True, 250)
+	assert bank.flush_names() == 0
+	bank.close()
+
+
+@MarkAsync
+async def test_sqlite_ledger_checkpoints_on_a_timer(tmp_path: Path) -> None:
+	bank = ledger.SqliteLedger(tmp_path / "money.db")
+	checkpoints: list[float] = []
+	with pytest.MonkeyPatch.context() as mp:
+		mp.setattr(bank, "sync", lambda: checkpoints.append(time.monotonic()))
+		bank.set(1, 300, "foo#0")
+		await bank.commit()
+		await bank.commit()
+		bank._io.submit(lambda: None).result()
+		assert not checkpoints
+
+		bank._last_checkpoint -= bank.checkpoint_interval
+		await bank.commit()
+		await bank.commit()
+		bank._io.submit(lambda: None).result()
+		assert len(checkpoints) == 1
+	bank.close()
+	bank = ledger.SqliteLedger(tmp_path / "money.db")
+	entry = bank.get(1)
+	assert entry is not None
+	assert entry.balance == 300
+	bank.close()
+
+
 @MarkAsync
 async def test_define_valid(httpx_mock: HTTPXMock) -> None:
 	httpx_mock.add_response(
@@ -2475,6 +2974,35 @@ async def test_define_valid(httpx_mock: HTTPXMock) -> None:
 	assert word.description == "Audio: spam"
 
 
+@MarkAsync
+async def test_http_pool_reuses_one_client(httpx_mock: HTTPXMock) -> None:
+	httpx_mock.add_response(
+		url="https://randomfox.ca/floof/",
+		json={"image": "foo.png"},
+		is_reusable=True,
+	)
+	pool = misc.HttpPool()
+	with pytest.MonkeyPatch.context() as mp:
+		mp.setattr("misc.Http", pool)
+		assert await misc.fetch_animal(
+			"https://randomfox.ca/floof/", "image",
+		) == "foo.png"
+		client = pool.client
+		assert client is not None
+		assert await misc.get_animal("fox") == "foo.png"
+		assert pool.client is client
+		assert not client.is_closed
+
+		await pool.close()
+		assert client.is_closed
+		assert pool.client is None
+		reopened = pool.get()
+		assert reopened is not client
+		await Bot.on_close()
+		assert reopened.is_closed
+		assert pool.client is None
+
+
 @MarkAsync
 async def test_define_more_than_max_embed_fields(
 	httpx_mock: HTTPXMock,
@@ -2573,7 +3101,7 @@ def test_flip() -> None:
 
 	bucks.reset(bb)
 	with pytest.MonkeyPatch.context() as mp:
-		mp.setattr("random.randint", lambda *_: 0)
+		mp.setattr("random.Random.randint", lambda *_: 0)
 		assert bucks.flip(bb, "all") == (
 			"Tails! You lose! Your losses have been"
 			f" deducted from your balance, <@{misc.BbId}>.\n"
@@ -2584,7 +3112,7 @@ def test_flip() -> None:
 
 	bucks.reset(bb)
 	with pytest.MonkeyPatch.context() as mp:
-		mp.setattr("random.randint", lambda *_: 0)
+		mp.setattr("random.Random.randint", lambda *_: 0)
 		bucks.flip(bb, 37)
 	msg = bucks.balance(bb, MockMessage("!bal", bb))
 	assert isinstance(msg.description, str)
@@ -2592,7 +3120,7 @@ def test_flip() -> None:
 
 	bucks.reset(bb)
 	with pytest.MonkeyPatch.context() as mp:
-		mp.setattr("random.randint", lambda *_: 1)
+		mp.setattr("random.Random.randint", lambda *_: 1)
 		assert bucks.flip(bb, "all") == (
 			"Heads! You win! Your winnings have been"
 			f" added to your balance, <@{misc.BbId}>.\n"
@@ -2618,6 +3146,36 @@ def test_flip() -> None:
 		)
 
 
+def test_flip_many(tmp_path: Path) -> None:
+	bank = ledger.FileLedger(tmp_path / "money.csv")
+	bank.set(1, 100, "foo#0")
+	foo = MockMember(MockUser("foo", discriminator="0", user_id=1))
+	with pytest.MonkeyPatch.context() as mp:
+		mp.setattr("bucks.Bank", bank)
+		for flips in ("x1", "5", "x101", "xx", "x²"):
+			assert bucks.flip_many(foo, "10", flips) == (
+				bucks.InvalidFlipsMsg.format(foo.mention)
+			)
+		assert bucks.flip_many(foo, "-1", "x5").startswith("Invalid bet.")
+
+		mp.setattr("random.Random.getrandbits", lambda *_: 0b11010)
+		assert bucks.flip_many(foo, "10", "x5") == (
+			"3 heads and 2 tails, with a longest streak of 2 heads."
+			f" You won 10 BeardlessBucks, {foo.mention}!"
+		)
+		assert bucks.flip_many(foo, "30", "x5").startswith("You do not have")
+		assert bucks.flip_many(foo, "0", "x5").endswith("all pointless.")
+
+		mp.setattr("random.Random.getrandbits", lambda *_: 0)
+		assert bucks.flip_many(foo, "all", "x4") == (
+			"0 heads and 4 tails, with a longest streak of 4 tails."
+			f" You lost 108 BeardlessBucks, {foo.mention}."
+		)
+	entry = bank.get(1)
+	assert entry is not None
+	assert entry.balance == 2
+
+
 @MarkAsync
 async def test_cmd_flip() -> None:
 	bb = MockMember(
@@ -2627,7 +3185,7 @@ async def test_cmd_flip() -> None:
 	ctx = MockContext(
 		Bot.BeardlessBot, MockMessage("!flip 0"), author=bb, guild=MockGuild(),
 	)
-	Bot.BlackjackGames = []
+	Bot.BlackjackGames = {}
 	assert await Bot.cmd_flip(ctx, bet="0") == 1
 	m = await latest_message(ctx)
 	assert m is not None
@@ -2635,7 +3193,16 @@ async def test_cmd_flip() -> None:
 	assert emb.description is not None
 	assert emb.description.endswith("actually bet anything.")
 
-	Bot.BlackjackGames.append(bucks.BlackjackGame(bb, multiplayer=False))
+	assert await Bot.cmd_flip(ctx, bet="0", flips="X3") == 1
+	m = await latest_message(ctx)
+	assert m is not None
+	emb = m.embeds[0]
+	assert emb.description is not None
+	assert emb.description.endswith("all pointless.")
+
+	bucks.add_game(
+		Bot.BlackjackGames, bucks.BlackjackGame(bb, multiplayer=False),
+	)
 	assert await Bot.cmd_flip(ctx, bet="0") == 1
 	m = await latest_message(ctx)
 	assert m is not None
@@ -2684,7 +3251,7 @@ async def test_cmd_blackjack() -> None:
 		"Beardless Bot",
 	)
 	ctx = MockContext(Bot.BeardlessBot, author=bb, guild=MockGuild())
-	Bot.BlackjackGames = []
+	Bot.BlackjackGames = {}
 	assert await Bot.cmd_blackjack(ctx, bet="all") == 1
 	m = await latest_message(ctx)
 	assert m is not None
@@ -2694,7 +3261,7 @@ async def test_cmd_blackjack() -> None:
 	with pytest.MonkeyPatch.context() as mp:
 		mp.setattr("bucks.BlackjackPlayer.perfect", lambda _: True)
 		mp.setattr("random.randint", lambda x, _: x)  # no dealer blackjack
-		Bot.BlackjackGames = []
+		Bot.BlackjackGames = {}
 		assert await Bot.cmd_blackjack(ctx, bet="all") == 1
 		m = await latest_message(ctx)
 		assert m is not None
@@ -2703,7 +3270,9 @@ async def test_cmd_blackjack() -> None:
 			f"You hit {bucks.BlackjackGame.Goal}! {bucks.WinMsg}.\n",
 		)
 
-	Bot.BlackjackGames.append(bucks.BlackjackGame(bb, multiplayer=False))
+	bucks.add_game(
+		Bot.BlackjackGames, bucks.BlackjackGame(bb, multiplayer=False),
+	)
 	assert await Bot.cmd_blackjack(ctx, bet="0") == 1
 	m = await latest_message(ctx)
 	assert m is not None
@@ -2713,7 +3282,7 @@ async def test_cmd_blackjack() -> None:
 
 @MarkAsync
 async def test_cmd_deal1() -> None:
-	Bot.BlackjackGames = []
+	Bot.BlackjackGames = {}
 	bb = MockMember(
 		MockUser("Beardless,Bot", discriminator="5757", user_id=misc.BbId),
 	)
@@ -2734,7 +3303,8 @@ async def test_cmd_deal1() -> None:
 	player = game.players[0]
 	assert game.turn_idx == 0
 	player.hand = [2, 2]
-	Bot.BlackjackGames = [game]
+	Bot.BlackjackGames = {}
+	bucks.add_game(Bot.BlackjackGames, game)
 	assert await Bot.cmd_deal(ctx) == 1
 	m = await latest_message(ctx)
 	assert m is not None
@@ -2748,8 +3318,8 @@ async def test_cmd_deal1() -> None:
 	player = game.players[0]
 	player.bet = 0
 	player.hand = [10, 10, 10]
-	Bot.BlackjackGames = []
-	Bot.BlackjackGames.append(game)
+	Bot.BlackjackGames = {}
+	bucks.add_game(Bot.BlackjackGames, game)
 	assert await Bot.cmd_deal(ctx) == 1
 	m = await latest_message(ctx)
 	assert m is not None
@@ -2763,7 +3333,7 @@ async def test_cmd_deal1() -> None:
 @MarkAsync
 async def test_cmd_deal2() -> None:
 	# your boy ruff doesn't like more than 50 stmts in functions
-	Bot.BlackjackGames = []
+	Bot.BlackjackGames = {}
 	bb = MockMember(
 		MockUser("Beardless,Bot", discriminator="5757", user_id=misc.BbId),
 	)
@@ -2771,7 +3341,7 @@ async def test_cmd_deal2() -> None:
 	ctx = MockContext(
 		Bot.BeardlessBot, MockMessage("!hit"), ch, bb, MockGuild(),
 	)
-	Bot.BlackjackGames = []
+	Bot.BlackjackGames = {}
 	bb = MockMember(
 		MockUser("Beardless,Bot", discriminator="5757", user_id=misc.BbId),
 	)
@@ -2794,7 +3364,7 @@ async def test_cmd_deal2() -> None:
 	player = game.players[0]
 	player.bet = 0
 	player.hand = [10, 10]
-	Bot.BlackjackGames.append(game)
+	bucks.add_game(Bot.BlackjackGames, game)
 	with pytest.MonkeyPatch.context() as mp:
 		mp.setattr("bucks.BlackjackPlayer.perfect", lambda _: True)
 		mp.setattr("bucks.BlackjackPlayer.check_bust", lambda _: False)
@@ -2815,7 +3385,7 @@ def test_blackjack_deal_to_player_treats_ace_as_1_when_going_over() -> None:
 	player.bet = 10
 	player.hand = [11, 9]
 	with pytest.MonkeyPatch.context() as mp:
-		game.deck = [2, 4, 5]
+		game.deck = bucks.Shoe([2, 4, 5])
 		mp.setattr("random.randint", lambda x, _: x)
 		assert game.dealerUp is not None
 		report = game.deal_current_player()
@@ -2836,7 +3406,7 @@ def test_blackjack_deal_to_player_wins_when_reaching_21() -> None:
 	player.hand = [10, 9]
 	assert game.dealerUp is not None
 	with pytest.MonkeyPatch.context() as mp:
-		game.deck = [2, 3, 4]
+		game.deck = bucks.Shoe([2, 3, 4])
 		mp.setattr("random.randint", lambda x, _: x)
 		report = game.deal_current_player()
 	assert report.startswith(
@@ -2851,7 +3421,7 @@ def test_blackjack_deal_to_player_wins_when_reaching_21() -> None:
 
 def test_blackjack_deal_top_card_pops_top_card() -> None:
 	with pytest.MonkeyPatch.context() as mp:
-		mp.setattr("random.randint", lambda x, _: x)
+		mp.setattr("random.Random.randint", lambda _, x, __: x)
 		m = MockMember()
 		game = bucks.BlackjackGame(m, multiplayer=False)
 		player = game.players[0]
@@ -2868,6 +3438,28 @@ def test_blackjack_deal_top_card_pops_top_card() -> None:
 		assert len(game.deck) == starting_deck_count - 5
 
 
+def test_blackjack_shoe_deals_every_card_once() -> None:
+	shoe = bucks.Shoe()
+	assert len(shoe) == 13 * 4 * bucks.BlackjackGame.NumOfDecksInMatch
+	dealt = [shoe.deal() for _ in range(len(shoe))]
+	assert sorted(dealt) == sorted(bucks.Shoe.Cards)
+	assert not len(shoe)
+	assert shoe.past_cut()
+	shoe.deal()
+	assert len(shoe) == len(bucks.Shoe.Cards) - 1
+
+	game = bucks.BlackjackGame(MockMember(), multiplayer=True)
+	game.deck = bucks.Shoe([2, 3, 4, 5, 6, 7, 8, 9], penetration=0.5)
+	with pytest.MonkeyPatch.context() as mp:
+		mp.setattr("random.randint", lambda x, _: x)
+		game.start_game()
+		assert game.deck.position == 4
+		assert game.deck.past_cut()
+		game.start_game()
+	assert game.deck.position == 4
+	assert game.dealerUp == 2
+
+
 def test_blackjack_card_name() -> None:
 	with pytest.MonkeyPatch.context() as mp:
 		mp.setattr("random.choice", operator.itemgetter(2))
@@ -2889,9 +3481,186 @@ def test_blackjack_check_bust() -> None:
 	assert not player.check_bust()
 
 
+def test_rng_service_replays_games(caplog: pytest.LogCaptureFixture) -> None:
+	caplog.set_level(logging.INFO)
+	m = MockMember(MockUser("foo", discriminator="0", user_id=1))
+	game = bucks.BlackjackGame(m, multiplayer=True)
+	assert caplog.records[-1].args == ("foo", 1, game.seed)
+	replay = bucks.BlackjackGame(m, multiplayer=True, seed=game.seed)
+	assert [game.deck.deal() for _ in range(20)] == [
+		replay.deck.deal() for _ in range(20)
+	]
+
+	first, second = bucks.RngService(37), bucks.RngService(37)
+	assert first.spawn()[0] == second.spawn()[0]
+	assert first.spawn(5)[0] == 5
+	assert first.root.getrandbits(64) == second.root.getrandbits(64)
+
+
+def test_simulator_matches_blackjack_game(tmp_path: Path) -> None:
+	bank = ledger.FileLedger(tmp_path / "money.csv")
+	m = MockMember(MockUser("foo", discriminator="0", user_id=1))
+	bank.set(1, 100000, str(m))
+	with pytest.MonkeyPatch.context() as mp:
+		mp.setattr("bucks.Bank", bank)
+		for seed in range(100):
+			for stand_on in (12, 17, 21):
+				entry = bank.get(1)
+				assert entry is not None
+				before = entry.balance
+				game = bucks.BlackjackGame(m, multiplayer=False, seed=seed)
+				player = game.players[0]
+				if game.dealerSum != bucks.BlackjackGame.Goal:
+					while not game.round_over() and player.total < stand_on:
+						game.deal_current_player()
+					if not game.round_over():
+						game.stay_current_player()
+				entry = bank.get(1)
+				assert entry is not None
+				result = simulate.simulate(1, stand_on, seed)
+				assert (entry.balance - before) // player.bet == (
+					result.wins - result.losses
+				)
+
+	result = simulate.simulate(10000, 17, 0)
+	assert result.wins + result.pushes + result.losses == result.hands
+	assert -0.2 < result.ev < 0.1
+	assert 0 < result.player_busts < result.losses
+
+
+def test_solve_strategy(tmp_path: Path) -> None:
+	counts = dict.fromkeys(bucks.BlackjackGame.CardVals, 4)
+	totals = simulate.dealer_totals(10, counts)
+	assert counts == dict.fromkeys(bucks.BlackjackGame.CardVals, 4)
+	assert abs(sum(totals.values()) - 1) < 1e-9
+	assert min(totals) == bucks.BlackjackGame.DealerSoftGoal
+
+	rows = simulate.solve_strategy()
+	plays = {(total, soft, up): action for total, soft, up, action, *_ in rows}
+	for up in range(2, 12):
+		assert plays[20, False, up] == plays[19, True, up] == "stay"
+		assert plays[8, False, up] == plays[13, True, up] == "hit"
+	simulate.write_strategy(rows, tmp_path / "strategy.csv")
+	assert bucks.load_strategy(tmp_path / "strategy.csv") == bucks.Strategy
+	assert bucks.load_strategy(tmp_path / "missing.csv") == {}
+
+
+@MarkAsync
+async def test_cmd_hint() -> None:
+	Bot.BlackjackGames = {}
+	foo = MockMember(MockUser("foo", discriminator="0", user_id=1))
+	ctx = MockContext(Bot.BeardlessBot, author=foo, guild=MockGuild())
+	assert await Bot.cmd_hint(ctx) == 1
+	m = await latest_message(ctx)
+	assert m is not None
+	assert m.embeds[0].description == bucks.NoGameMsg.format(foo.mention)
+
+	game = bucks.BlackjackGame(foo, multiplayer=False)
+	bucks.add_game(Bot.BlackjackGames, game)
+	game.players[0].hand = [10, 6]
+	game.dealerUp = 10
+	assert await Bot.cmd_hint(ctx) == 1
+	m = await latest_message(ctx)
+	assert m is not None
+	emb = m.embeds[0]
+	assert emb.description is not None
+	assert emb.description.startswith(
+		f"{foo.mention}, with a hard 16 against the dealer's 10,"
+		" you should stay.",
+	)
+
+	game.players[0].hand = [11, 7]
+	game.dealerUp = 9
+	assert "soft 18 against the dealer's 9, you should hit" in bucks.hint(
+		game, game.players[0],
+	)
+	with pytest.MonkeyPatch.context() as mp:
+		mp.setattr("bucks.Strategy", {})
+		assert bucks.hint(game, game.players[0]).startswith("I don't have")
+
+
+def test_simulators_leave_the_live_ledger_alone() -> None:
+	assert subprocess.run(
+		[
+			sys.executable,
+			"-c",
+			"import sys, simulate; assert 'bucks' not in sys.modules",
+		],
+		check=False,
+	).returncode == 0
+
+
+def test_economy_projection(tmp_path: Path) -> None:
+	path = tmp_path / "money.csv"
+	path.write_text("1,300,foo#0\n2,50,bar#0\n3,0,spam#0", encoding="UTF-8")
+	bank = ledger.FileLedger(path)
+	bank.set(3, 60000, "spam#0")
+	bank.sync()
+	balances = simulate.load_balances(path)
+	assert balances == {1: 300, 2: 50, 3: 60000}
+	assert path.read_text(encoding="UTF-8").startswith("1,300,foo#0")
+
+	streams = {
+		1: [("flip", "0"), ("blackjack", "1000"), ("flip", "all")],
+		2: [("flip", "100")],
+	}
+	config = simulate.EconomyConfig(resets=False)
+	result = simulate.project_economy(balances, config, streams, workers=2)
+	assert result.balances[1] in {0, 600}
+	assert result.balances[2] == 50
+	assert result.balances[3] == 60000
+	assert result.reached == {3: 0}
+
+	config = simulate.EconomyConfig(commands=200, bet="all")
+	first = simulate.project_economy(balances, config, workers=2, seed=1)
+	second = simulate.project_economy(balances, config, workers=2, seed=1)
+	assert first.balances == second.balances
+	assert "3 users: min" in first.report()
+
+
+def test_blackjack_start_skips_players_who_hit_21(tmp_path: Path) -> None:
+	players = [
+		MockMember(MockUser(f"p{i}", discriminator="0", user_id=i))
+		for i in range(1, 4)
+	]
+	game = bucks.BlackjackGame(players[0], multiplayer=True)
+	for player in players[1:]:
+		game.add_player(player)
+	game.deck = bucks.Shoe([10, 7, 11, 10, 10, 11, 11, 11])
+	with pytest.MonkeyPatch.context() as mp:
+		mp.setattr("bucks.Bank", ledger.FileLedger(tmp_path / "money.csv"))
+		mp.setattr("random.randint", lambda x, _: x)
+		report = game.start_game()
+	assert game.turn_idx == 2
+	assert game.players[2].total == 12
+	assert report.endswith(
+		f"\n{players[2].mention} it is your turn! {bucks.GameHelpMsg}",
+	)
+
+
+def test_blackjack_player_tracks_total_and_soft_aces() -> None:
+	player = bucks.BlackjackPlayer(MockMember())
+	assert not hasattr(player, "__dict__")
+	player.hand = [bucks.BlackjackGame.AceVal, bucks.BlackjackGame.AceVal]
+	assert (player.total, player.soft_aces) == (22, 2)
+	assert player.check_bust()
+
+	player.soften_ace()
+	assert player.hand == [bucks.BlackjackGame.AceVal, 1]
+	player.add_card(9)
+	assert (player.total, player.soft_aces) == (21, 1)
+	assert player.perfect()
+
+	player.add_card(bucks.BlackjackGame.AceVal)
+	player.soften_ace()
+	assert player.hand == [bucks.BlackjackGame.AceVal, 1, 9, 1]
+	assert player.total == sum(player.hand)
+	assert player.soft_aces == 1
+
+
 @MarkAsync
 async def test_cmd_stay() -> None:
-	Bot.BlackjackGames = []
+	Bot.BlackjackGames = {}
 	bb = MockMember(
 		MockUser("Beardless,Bot", discriminator="5757", user_id=misc.BbId),
 	)
@@ -2914,7 +3683,7 @@ def test_blackjack_stay() -> None:
 		player.hand = [10, 1]
 		game.dealerSum = 13
 		game.dealerUp = 6
-		game.deck = [8]
+		game.deck = bucks.Shoe([8])
 		game.stay_current_player()
 		assert game.round_over()
 		assert "you lose" in game._end_round().lower()
@@ -2925,7 +3694,7 @@ def test_blackjack_stay() -> None:
 		player.hand = [10, 1]
 		game.dealerSum = 12
 		game.dealerUp = 5
-		game.deck = [10, 10]
+		game.deck = bucks.Shoe([10, 10])
 		game.stay_current_player()
 		assert game.round_over()
 		assert "you win" in game._end_round().lower()
@@ -2961,10 +3730,10 @@ def test_blackjack_starting_hand() -> None:
 	with pytest.MonkeyPatch.context() as mp:
 		mp.setattr("bucks.BlackjackPlayer.perfect", lambda _: True)
 		mp.setattr("random.randint", lambda x, _: x)  # for deck draws
-		game.deck = [
+		game.deck = bucks.Shoe([
 			2, 3,  # no dealer blackjack
 			bucks.BlackjackGame.AceVal, bucks.BlackjackGame.FaceVal,
-		]
+		])
 		report = game.start_game()
 		assert "You hit 21!" in report
 	assert len(player.hand) == 2
@@ -2972,11 +3741,11 @@ def test_blackjack_starting_hand() -> None:
 	player.hand = []
 
 	with pytest.MonkeyPatch.context() as mp:
-		mp.setattr("random.randint", lambda _, y: y)
-		game.deck = [
+		mp.setattr("random.randint", lambda x, _: x)
+		game.deck = bucks.Shoe([
+			2, 1,
 			bucks.BlackjackGame.AceVal, bucks.BlackjackGame.AceVal,
-			1, 2,
-		]
+		])
 		assert game.start_game() == (
 			"The dealer is showing 2, with one card face down.\n"
 			f"{m.mention} your starting hand consists of two Aces."
@@ -2990,18 +3759,293 @@ def test_blackjack_starting_hand() -> None:
 
 def test_active_game() -> None:
 	author = MockMember(MockUser(name="target", user_id=0))
-	games = [
-		bucks.BlackjackGame(
-			MockMember(MockUser(name="not", user_id=1)),
+	games: dict[int, bucks.BlackjackGame] = {}
+	for user_id in range(1, 10):
+		bucks.add_game(games, bucks.BlackjackGame(
+			MockMember(MockUser(name="not", user_id=user_id)),
 			multiplayer=False,
-		),
-	] * 9
+		))
 	assert bucks.player_in_game(games, author) is None
 
-	games.append(bucks.BlackjackGame(author, multiplayer=False))
+	bucks.add_game(games, bucks.BlackjackGame(author, multiplayer=False))
 	assert bucks.player_in_game(games, author) is not None
 
 
+def test_game_registry_tracks_joins_and_leaves() -> None:
+	owner = MockMember(MockUser(name="owner", user_id=1))
+	guest = MockMember(MockUser(name="guest", user_id=2))
+	games: dict[int, bucks.BlackjackGame] = {}
+	game = bucks.BlackjackGame(owner, multiplayer=True)
+	bucks.add_game(games, game)
+	assert bucks.player_in_game(games, guest) is None
+
+	bucks.join_game(games, game, guest)
+	result = bucks.player_in_game(games, guest)
+	assert result is not None
+	assert result[0] is game
+	assert set(games) == {1, 2}
+
+	bucks.leave_game(games, game, result[1])
+	assert bucks.player_in_game(games, guest) is None
+	assert set(games) == {1}
+
+	bucks.join_game(games, game, guest)
+	bucks.remove_game(games, game)
+	assert not games
+
+
+@MarkAsync
+async def test_table_scheduler_runs_each_games_commands_in_order() -> None:
+	scheduler = bucks.TableScheduler()
+	table = bucks.BlackjackGame(MockMember(), multiplayer=True)
+	other = bucks.BlackjackGame(MockMember(), multiplayer=True)
+	scheduler.open(table, 1)
+	order: list[str] = []
+
+	async def act(
+		game: bucks.BlackjackGame | None, name: str, delay: float,
+	) -> None:
+		async with scheduler.turn(game):
+			order.append(f"{name} start")
+			await asyncio.sleep(delay)
+			order.append(f"{name} end")
+
+	await asyncio.gather(
+		act(table, "first", 0.02),
+		act(table, "second", 0),
+		act(other, "other", 0),
+		act(None, "none", 0),
+	)
+	assert order.index("first end") < order.index("second start")
+	assert order.index("other end") < order.index("first end")
+	assert order.index("none end") < order.index("first end")
+	assert scheduler.channel_of(table) == 1
+	assert scheduler.channel_of(other) is None
+
+	del table
+	assert not scheduler.channels[1]
+
+
+def test_join_table() -> None:
+	owner = MockMember(MockUser("owner", user_id=1))
+	guest = MockMember(MockUser("guest", user_id=2))
+	table = bucks.BlackjackGame(owner, multiplayer=True)
+	bucks.add_game(Bot.BlackjackGames, table)
+	Bot.Tables.open(table, 1)
+	elsewhere = MockContext(
+		Bot.BeardlessBot, channel=MockChannel(channel_id=2), author=guest,
+	)
+	here = MockContext(
+		Bot.BeardlessBot, channel=MockChannel(channel_id=1), author=guest,
+	)
+	assert Bot.join_table(elsewhere, table, owner) == (
+		f"{owner.mention}'s blackjack game is in another"
+		" channel. Please join it there."
+	)
+	table.started = True
+	assert Bot.join_table(here, table, owner).startswith("Cannot join")
+	table.started = False
+	assert Bot.join_table(here, table, owner) == (
+		f"Joined {owner.mention}'s blackjack game."
+	)
+	assert Bot.BlackjackGames[2] is table
+	bucks.remove_game(Bot.BlackjackGames, table)
+
+
+def test_evict_idle_games(
+	tmp_path: Path, caplog: pytest.LogCaptureFixture,
+) -> None:
+	bank = ledger.FileLedger(tmp_path / "money.csv")
+	bank.set(1, 300, "solo#0")
+	solo = MockMember(MockUser("solo", discriminator="0", user_id=1))
+	owner = MockMember(MockUser("owner", discriminator="0", user_id=2))
+	games: dict[int, bucks.BlackjackGame] = {}
+	caplog.set_level(logging.INFO)
+	with pytest.MonkeyPatch.context() as mp:
+		mp.setattr("bucks.Bank", bank)
+		single = bucks.BlackjackGame(solo, multiplayer=False, seed=0)
+		single.turn_idx = 0
+		single.dealerUp = 10
+		single.dealerSum = 18
+		single.players[0].hand = [10, 9]
+		single.players[0].bet = 50
+		table = bucks.BlackjackGame(owner, multiplayer=True)
+		bucks.add_game(games, single)
+		bucks.add_game(games, table)
+
+		now = table.last_active + 30
+		assert not bucks.evict_idle_games(games, 60, now)
+		single.last_active = now - 90
+		assert bucks.evict_idle_games(games, 60, now) == [single]
+		assert set(games) == {2}
+		assert bucks.evict_idle_games(games, 10, now) == [table]
+		assert not games
+
+	entry = bank.get(1)
+	assert entry is not None
+	assert entry.balance == 350
+	assert caplog.records[-2].args == ("singleplayer", "solo", 1, 90)
+	assert caplog.records[-1].getMessage().startswith(
+		"Evicted multiplayer blackjack game owned by owner/2 after",
+	)
+
+
+@MarkAsync
+async def test_eviction_waits_for_the_game_turn(tmp_path: Path) -> None:
+	owner = MockMember(MockUser("owner", discriminator="0", user_id=1))
+	game = bucks.BlackjackGame(owner, multiplayer=True)
+	Bot.BlackjackGames = {}
+	bucks.add_game(Bot.BlackjackGames, game)
+	game.last_active -= bucks.GameTtl + 1
+	with pytest.MonkeyPatch.context() as mp:
+		mp.setattr("bucks.GameSnapshot", tmp_path / "blackjack.bin")
+		async with Bot.Tables.turn(game):
+			eviction = asyncio.create_task(Bot.evict_idle_games.coro())
+			await asyncio.sleep(0)
+			assert Bot.BlackjackGames
+			game.last_active = time.monotonic()
+		await eviction
+		assert Bot.BlackjackGames == {1: game}
+
+		game.last_active -= bucks.GameTtl + 1
+		await Bot.evict_idle_games.coro()
+		assert not Bot.BlackjackGames
+
+
+def test_games_survive_restart(tmp_path: Path) -> None:
+
+	def state(game: bucks.BlackjackGame) -> tuple[object, ...]:
+		return (
+			game.deck.cards,
+			game.deck.position,
+			game.deck.cut,
+			game.started,
+			game.turn_idx,
+			game.dealerUp,
+			game.dealerSum,
+			[(p.name.id, p.hand, p.total, p.bet) for p in game.players],
+		)
+
+	owner = MockMember(MockUser("owner", user_id=1))
+	guest = MockMember(MockUser("guest", user_id=2))
+	games: dict[int, bucks.BlackjackGame] = {}
+	table = bucks.BlackjackGame(owner, multiplayer=True, seed=0)
+	bucks.add_game(games, table)
+	bucks.join_game(games, table, guest)
+	table.players[1].bet = 50
+	table.start_game()
+	saved = state(table)
+	bucks.save_games(games, tmp_path / "blackjack.bin")
+
+	games = {}
+	with pytest.MonkeyPatch.context() as mp:
+		mp.setattr(
+			"bucks.DormantGames", bucks.load_games(tmp_path / "blackjack.bin"),
+		)
+		assert set(bucks.DormantGames) == {1, 2}
+		result = bucks.player_in_game(games, guest)
+		assert result is not None
+		restored, player = result
+		assert player.name is guest
+		assert not bucks.DormantGames
+	assert set(games) == {1, 2}
+	assert restored.owner.name.id == 1
+	assert restored.multiplayer
+	assert state(restored) == saved
+	assert restored.last_active == pytest.approx(table.last_active, abs=1)
+	assert restored.seed == table.seed == 0
+	assert [restored.deck.deal() for _ in range(20)] == [
+		table.deck.deal() for _ in range(20)
+	]
+
+
+def test_restore_settles_round_left_to_departed_players(
+	tmp_path: Path,
+) -> None:
+	bank = ledger.FileLedger(tmp_path / "money.csv")
+	bank.set(1, 300, "owner#0")
+	owner = MockMember(MockUser("owner", discriminator="0", user_id=1))
+	guest = MockMember(MockUser("guest", discriminator="0", user_id=2))
+	games: dict[int, bucks.BlackjackGame] = {}
+	table = bucks.BlackjackGame(owner, multiplayer=True, seed=0)
+	bucks.add_game(games, table)
+	bucks.join_game(games, table, guest)
+	table.players[0].bet = 10
+	with pytest.MonkeyPatch.context() as mp:
+		mp.setattr("bucks.Bank", bank)
+		table.start_game()
+		table.stay_current_player()
+		assert not table.round_over()
+		bucks.save_games(games, tmp_path / "blackjack.bin")
+
+		games = {}
+		mp.setattr(
+			"bucks.DormantGames", bucks.load_games(tmp_path / "blackjack.bin"),
+		)
+		mp.setattr(MockGuild, "get_member", lambda *_: None)
+		report = bucks.restore_saved_game(games, owner)
+		assert report is not None
+		assert owner.mention in report
+		assert set(games) == {1}
+		assert not games[1].started
+		assert bucks.restore_saved_game(games, owner) is None
+	entry = bank.get(1)
+	assert entry is not None
+	assert entry.balance != 300 or "ties" in report
+
+
+@MarkAsync
+async def test_settled_round_is_checkpointed(tmp_path: Path) -> None:
+	bank = ledger.FileLedger(tmp_path / "money.csv")
+	bank.set(1, 300, "owner#0")
+	owner = MockMember(MockUser("owner", discriminator="0", user_id=1))
+	ch = MockChannel(guild=MockGuild())
+	ctx = MockContext(Bot.BeardlessBot, MockMessage(), ch, owner, MockGuild())
+	game = bucks.BlackjackGame(owner, multiplayer=True, seed=0)
+	game.players[0].bet = 10
+	with pytest.MonkeyPatch.context() as mp:
+		mp.setattr("bucks.Bank", bank)
+		mp.setattr("bucks.GameSnapshot", tmp_path / "blackjack.bin")
+		mp.setattr("Bot.BlackjackGames", {})
+		bucks.add_game(Bot.BlackjackGames, game)
+		bucks.GamesChanged.clear()
+		await Bot.checkpoint_games(ctx)
+		assert not (tmp_path / "blackjack.bin").exists()
+
+		game.start_game()
+		while not game.round_over():
+			game.stay_current_player()
+		assert bucks.GamesChanged.is_set()
+		await Bot.checkpoint_games(ctx)
+		assert not bucks.GamesChanged.is_set()
+		saved = bucks.load_games(tmp_path / "blackjack.bin")
+		assert not bucks.GameRecord.unpack_from(saved[1])[3]
+
+		bucks.remove_game(Bot.BlackjackGames, game)
+		await Bot.checkpoint_games(ctx)
+		assert not (tmp_path / "blackjack.bin").exists()
+
+
+def test_load_games_keeps_games_before_damage(tmp_path: Path) -> None:
+	path = tmp_path / "blackjack.bin"
+	games: dict[int, bucks.BlackjackGame] = {}
+	for user_id in (1, 2):
+		bucks.add_game(
+			games,
+			bucks.BlackjackGame(
+				MockMember(MockUser(user_id=user_id)), multiplayer=True,
+			),
+		)
+	bucks.save_games(games, path)
+	assert set(bucks.load_games(path)) == {1, 2}
+
+	data = path.read_bytes()
+	path.write_bytes(data[:-1])
+	assert set(bucks.load_games(path)) == {1}
+	path.write_bytes(data[:2])
+	assert not bucks.load_games(path)
+
+
 def test_info() -> None:
 	m = MockMember(MockUser("searchterm"))
 	guild = MockGuild(members=[MockMember(), m])
@@ -4341,7 +5385,7 @@ def test_dealer_draw_stops_at_dealer_soft_goal() -> None:
 		# this is major ass please replace dealerUp & dealerSum with dealerCards
 		game.dealerUp = 10
 		game.dealerSum = bucks.BlackjackGame.DealerSoftGoal - 1
-		game.deck = [1, 5, 9, 11]
+		game.deck = bucks.Shoe([1, 5, 9, 11])
 		dealer_cards = game.dealer_draw()
 		assert dealer_cards == [10, 6, 1]
 		assert game.dealerSum == 17
@@ -4349,7 +5393,7 @@ def test_dealer_draw_stops_at_dealer_soft_goal() -> None:
 		# test no draw on soft-goal
 		game.dealerUp = 10
 		game.dealerSum = bucks.BlackjackGame.DealerSoftGoal
-		game.deck = [1, 5, 9, 11]
+		game.deck = bucks.Shoe([1, 5, 9, 11])
 		dealer_cards = game.dealer_draw()
 		assert dealer_cards == [10, 7]
 		assert game.dealerSum == bucks.BlackjackGame.DealerSoftGoal
@@ -4386,31 +5430,31 @@ def test_blackjack_multiplayer_start_game_skip_perfected_players() -> None:
 		mp.setattr("random.randint", lambda x, _: x)  # for deck draws
 
 		game = make_blackjack_multiplayer_with_unique_user_id(3)
-		game.deck = [
+		game.deck = bucks.Shoe([
 			1, 2,  # no dealer blackjack
 			3, 4, 5, 6, 7, 8,
-		]
+		])
 		report = game.start_game()
 		assert game.is_turn(game.players[0])
 		assert report.endswith(f"<@1111> it is your turn! {bucks.GameHelpMsg}")
 
 		game = make_blackjack_multiplayer_with_unique_user_id(3)
-		game.deck = [
+		game.deck = bucks.Shoe([
 			1, 2,  # no dealer blackjack
 			bucks.BlackjackGame.AceVal, bucks.BlackjackGame.FaceVal,
 			3, 4, 5, 6, 7, 8,
-		]
+		])
 		report = game.start_game()
 		assert game.is_turn(game.players[1])
 		assert report.endswith(f"<@2222> it is your turn! {bucks.GameHelpMsg}")
 
 		game = make_blackjack_multiplayer_with_unique_user_id(4)
-		game.deck = [
+		game.deck = bucks.Shoe([
 			1, 2,  # no dealer blackjack
 			bucks.BlackjackGame.AceVal, bucks.BlackjackGame.FaceVal,
 			bucks.BlackjackGame.AceVal, bucks.BlackjackGame.FaceVal,
 			3, 4, 5, 6,
-		]
+		])
 		report = game.start_game()
 		assert game.is_turn(game.players[2])
 		assert report.endswith(f"<@3333> it is your turn! {bucks.GameHelpMsg}")
@@ -4428,13 +5472,13 @@ def test_blackjack_multiplayer() -> None:
 			"random.choice",
 			operator.itemgetter(0),
 		)  # for facecard names
-		game.deck = [
+		game.deck = bucks.Shoe([
 			1, 2,  # no dealer blackjack
 			3, 4, 10, 9, 7, 10,
 			bucks.BlackjackGame.AceVal, bucks.BlackjackGame.FaceVal,
 			bucks.BlackjackGame.AceVal, bucks.BlackjackGame.AceVal,
 			10, 4,
-		]
+		])
 		report = game.start_game()  # will not blackjack
 		# maybe overkill?
 		assert game.dealerUp == 1
@@ -4490,12 +5534,12 @@ def test_deal_current_player() -> None:
 			operator.itemgetter(0),
 		)  # for facecard names
 		game = make_blackjack_multiplayer_with_unique_user_id(3)
-		game.deck = [
+		game.deck = bucks.Shoe([
 			1, 2,  # no dealer blackjack
 			1, 5,
 			3, 4, 5, 6,
 			7, 10,
-		]
+		])
 		game.start_game()
 		report = game.deal_current_player()
 		assert game.players[0].hand == [1, 5, 7]
@@ -4515,11 +5559,11 @@ def test_deal_current_player() -> None:
 		assert game.is_turn(game.players[1])
 
 		game = make_blackjack_multiplayer_with_unique_user_id(2)
-		game.deck = [
+		game.deck = bucks.Shoe([
 			1, 2,  # no dealer blackjack
 			bucks.BlackjackGame.AceVal, 5,  # ace overflow
 			5, 6, 10,
-		]
+		])
 		game.start_game()
 		assert game.players[0].hand == [bucks.BlackjackGame.AceVal, 5]
 		report = game.deal_current_player()
@@ -4540,12 +5584,12 @@ def test_blackjack_multiplayer_dealer_blackjack() -> None:
 			"random.choice",
 			operator.itemgetter(0),
 		)  # for facecard names
-		game.deck = [
+		game.deck = bucks.Shoe([
 			bucks.BlackjackGame.AceVal, bucks.BlackjackGame.FaceVal,
 			3, 4,
 			bucks.BlackjackGame.AceVal, bucks.BlackjackGame.FaceVal,
 			7, 10,
-		]
+		])
 		report = game.start_game()
 		assert report == """\
 The dealer blackjacked!
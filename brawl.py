@@ -12,7 +12,7 @@ from bs4 import BeautifulSoup
 from nextcord import Colour, Embed, Member, User
 from steam import steamid
 
-from misc import BbColor, Ok, TimeZone, bb_embed, fetch_avatar
+from misc import BbColor, Http, Ok, TimeZone, bb_embed, fetch_avatar
 
 BadClaim = (
 	"Please do !brawlclaim followed by the URL of your steam profile."
@@ -156,8 +156,7 @@ async def brawl_api_call(
 	route: str, arg: str | int, brawl_key: str, amp: str = "?",
 ) -> dict[str, Any] | list[dict[str, str | int]]:
 	url = f"https://api.brawlhalla.com/{route}{arg}{amp}api_key={brawl_key}"
-	async with httpx.AsyncClient(timeout=10) as client:
-		r = await client.get(url)
+	r = await Http.get().get(url)
 	if r.status_code != Ok:
 		raise httpx.RequestError("Request failed with " + str(r.status_code))
 	j = r.json()
@@ -1,16 +1,28 @@
-"""Beardless Bot methods that modify resources/money.csv."""
+"""Beardless Bot methods that modify the BeardlessBucks ledger."""
 
+import asyncio
 import csv
+import logging
+import os
 import random
-from collections import OrderedDict
+import struct
+import time
+import weakref
+from array import array
+from collections.abc import Iterable
+from contextlib import AbstractAsyncContextManager, nullcontext
 from enum import Enum
-from operator import itemgetter
 from pathlib import Path
 
+import dotenv
 import nextcord
 
+import rules
+from ledger import LedgerBackend, open_ledger
 from misc import bb_embed, member_search
 
+logger = logging.getLogger(__name__)
+
 CommaWarn = (
 	"Beardless Bot gambling is available to Discord"
 	" users with a comma in their username. Please"
@@ -39,6 +51,14 @@ InvalidBetMsg = (
 	" to 0, or enter \"all\" to bet your whole balance, {}."
 )
 
+# The most coins a single !flip may toss.
+MaxFlips = 100
+
+InvalidFlipsMsg = (
+	"Invalid number of flips. Please write the number of coins"
+	f" to flip as x2 through x{MaxFlips}, {{}}."
+)
+
 WinMsg = "You win! Your winnings have been added to your balance"
 LoseMsg = "You lose! Your losses have been deducted from your balance"
 
@@ -47,23 +67,160 @@ GameHelpMsg = (
 	"or !stay to stop at your current total."
 )
 
+# Loaded once at import. On first run, resources/money.csv is imported into
+# the binary snapshot; python ledger.py export writes it back out as CSV.
+# Set LEDGER=resources/money.db in .env to serve BeardlessBucks from SQLite
+# instead; see python ledger.py migrate. Set LEDGER_SHARDS=4 to split the
+# snapshot into resources/money.0.bin through resources/money.3.bin.
+LedgerEnv = dotenv.dotenv_values(".env")
+Bank: LedgerBackend = open_ledger(
+	Path(LedgerEnv.get("LEDGER") or "resources/money.bin"),
+	shards=int(LedgerEnv.get("LEDGER_SHARDS") or 1),
+)
+
+# Seconds a game of blackjack may sit without a hit, stay, bet, or join
+# before evict_idle_games closes it. Set BLACKJACK_TTL in .env to change it.
+GameTtl = float(LedgerEnv.get("BLACKJACK_TTL") or 600)
+
+# Games in progress are saved to GameSnapshot on shutdown, every minute, and
+# after any command that settles a round or ends a game; see GamesChanged.
+# The snapshot is a GameCount, then, for each game, its length and a
+# GameRecord header--when it last saw a move, its generator's seed, whether
+# it is multiplayer and started, the turn index, the owner's index, the number
+# of players, the dealer's up card and sum, the shoe's position, cut, and
+# size--followed by the cards in the shoe, one byte each, the RngState its
+# generator had reached, and, for each player, a PlayerRecord header--their
+# id, bet, and number of cards--and their hand.
+GameSnapshot = Path("resources/blackjack.bin")
+GameCount = struct.Struct("<I")
+GameRecord = struct.Struct("<dQ??BBBBBHHH")
+RngState = struct.Struct("<625I")
+PlayerRecord = struct.Struct("<QqB")
+
+# Saved games not yet picked up again since the last restart, keyed by the
+# id of each of their players. See load_games and restore_game.
+DormantGames: dict[int, bytes] = {}
+
+# Set whenever a round is settled or a game stops being tracked, and cleared
+# by save_games. Settling a round writes to the ledger at once, so until the
+# snapshot is rewritten, a restart would restore the round and settle it
+# again.
+GamesChanged = asyncio.Event()
+
+# The table behind !hint, by player total, softness, and dealer up card; see
+# rules.StrategyPath.
+StrategyTable = dict[tuple[int, bool, int], tuple[str, float, float]]
+
+
+class RngService:
+	"""
+	The source of every game's random number generator.
+
+	Each game of blackjack is given its own random.Random, seeded with a
+	number drawn from the service's root generator. The seed is kept on the
+	game and logged, so a game can be replayed exactly: a new game with the
+	same seed deals the same cards in response to the same commands, and
+	simulate.simulate() with that seed plays the same hands. Coin flips are
+	drawn from the root generator itself. Set RNG_SEED in .env to seed the
+	root generator, making every game and flip after launch reproducible.
+
+	Attributes:
+		root (random.Random): The generator seeds and flips are drawn from
+
+	Methods:
+		spawn(seed):
+			Get a seed and a generator for a new game.
+
+	"""
+
+	def __init__(self, seed: int | None = None) -> None:
+		"""
+		Create a new RngService instance.
+
+		Args:
+			seed (int | None): Seed for the root generator; None to seed it
+				from the system (default is None)
+
+		"""
+		self.root = random.Random(seed)
+
+	def spawn(self, seed: int | None = None) -> tuple[int, random.Random]:
+		"""
+		Get a seed and a generator for a new game.
+
+		Args:
+			seed (int | None): The seed of a game to replay; None to draw a
+				new one (default is None)
+
+		Returns:
+			tuple[int, random.Random]: The seed, and a generator seeded
+			with it.
+
+		"""
+		if seed is None:
+			seed = self.root.getrandbits(64)
+		return seed, random.Random(seed)
+
+
+RngSeed = LedgerEnv.get("RNG_SEED")
+Rng = RngService(int(RngSeed) if RngSeed else None)
+
+
+def load_strategy(path: Path = rules.StrategyPath) -> StrategyTable:
+	"""
+	Read the basic-strategy table written by simulate.py.
+
+	Args:
+		path (Path): Where to read the table from (default is
+			rules.StrategyPath)
+
+	Returns:
+		StrategyTable: For each player total, whether it is soft, and
+		dealer up card: "hit" or "stay", and the expected return per buck
+		bet of staying and of hitting. Empty if there is no table.
+
+	"""
+	if not path.exists():
+		logger.warning("No strategy table at %s; !hint is disabled.", path)
+		return {}
+	table: StrategyTable = {}
+	with path.open("r", encoding="UTF-8") as f:
+		for row in csv.DictReader(f):
+			table[int(row["total"]), row["soft"] == "1", int(row["up"])] = (
+				row["action"], float(row["stay"]), float(row["hit"]),
+			)
+	return table
+
+
+Strategy = load_strategy()
+
 
 class BlackjackPlayer:
 	"""
 	BlackjackPlayer instance.
 
+	The player's total and number of soft Aces are kept up to date as cards
+	are dealt, so checking the hand never has to sum it. Cards must be
+	dealt through add_card(); assigning a whole new hand recounts both.
+
 	Attributes:
 		name (Nextcord.User | Nextcord.Member):
 			The discord user representing the player
 		hand (list[int]): The player's current hand
+		total (int): The sum of the player's hand
+		soft_aces (int): The number of Aces in hand still counted as 11
 		bet (int): The player's current bet
 
 	Methods:
+		add_card(card): Add a card to the player's hand.
+		soften_ace(): Count one of the player's soft Aces as a 1.
 		check_bust(): Check if the player has gone over BlackjackGame.Goal.
 		perfect(): Check if the user has reached BlackjackGame.Goal
 
 	"""
 
+	__slots__ = ("_hand", "bet", "name", "soft_aces", "total")
+
 	def __init__(self, name: nextcord.User | nextcord.Member) -> None:
 		"""
 		Create a new BlackjackPlayer instance.
@@ -74,13 +231,54 @@ class BlackjackPlayer:
 
 		"""
 		self.name: nextcord.User | nextcord.Member = name
-		self.hand: list[int] = []
+		self.hand = []
 		# TODO: make BlackjackPlayer.bet's type be 'int | None'
 		# and add a phase after owner does '!tablestart' where
 		# people make their bets
 		# grep for '805746791' when this is changed
 		self.bet: int = 10
 
+	@property
+	def hand(self) -> list[int]:
+		"""
+		The player's current hand.
+
+		Returns:
+			list[int]: The value of each card in the player's hand.
+
+		"""
+		return self._hand
+
+	@hand.setter
+	def hand(self, hand: list[int]) -> None:
+		self._hand = hand
+		self.total = sum(hand)
+		self.soft_aces = hand.count(BlackjackGame.AceVal)
+
+	def add_card(self, card: int) -> None:
+		"""
+		Add a card to the player's hand.
+
+		Args:
+			card (int): The value of the card dealt
+
+		"""
+		self._hand.append(card)
+		self.total += card
+		if card == BlackjackGame.AceVal:
+			self.soft_aces += 1
+
+	def soften_ace(self) -> None:
+		"""Count the player's most recently dealt soft Ace as a 1."""
+		assert self.soft_aces
+		hand = self._hand
+		i = len(hand) - 1
+		while hand[i] != BlackjackGame.AceVal:
+			i -= 1
+		hand[i] = 1
+		self.total -= BlackjackGame.AceVal - 1
+		self.soft_aces -= 1
+
 	def check_bust(self) -> bool:
 		"""
 		Check if the player has gone over BlackjackGame.Goal.
@@ -89,7 +287,7 @@ class BlackjackPlayer:
 			bool: Whether the user has gone over BlackjackGame.Goal.
 
 		"""
-		return sum(self.hand) > BlackjackGame.Goal
+		return self.total > BlackjackGame.Goal
 
 	def perfect(self) -> bool:
 		"""
@@ -103,7 +301,7 @@ class BlackjackPlayer:
 			bool: Whether the user has gotten Blackjack.
 
 		"""
-		return sum(self.hand) == BlackjackGame.Goal
+		return self.total == BlackjackGame.Goal
 
 
 class BlackjackGame:
@@ -119,15 +317,20 @@ class BlackjackGame:
 		FaceVal (int): The value of a face card (J Q K)
 		Goal (int): The desired score
 		CardVals (tuple[int, ...]): Blackjack values for each card
+		CardNames (tuple[str, ...]): The name of each card, by value
+		FaceNames (tuple[str, ...]): The names a FaceVal card can go by
 		owner (nextcord.User or Member): The user who is owns this game
 		players (list[BlackjackPlayer]): The players in the game
+		seed (int): The seed of the game's generator; see RngService
+		rng (random.Random): The generator the game shuffles with
 		turn_idx (int): an index into players that holds player to play
 		multiplayer (bool): Whether this match is multiplayer
 		dealerUp (int): The card the dealer is showing face-up
 		dealerSum (int): The running count of the dealer's cards
-		deck (list): The cards remaining in the deck
+		deck (Shoe): The shoe cards are dealt from
 		started (bool): Whether the match/round started
 		message (str): The report to be sent in the Discord channel
+		last_active (float): time.monotonic() of the last move in the game
 
 	Methods:
 		dealer_draw():
@@ -145,7 +348,7 @@ class BlackjackGame:
 		is_turn(player):
 			Checks whether it is the turn of a given player.
 		deal_top_card():
-			Removes the top card from the deck.
+			Deals the next card from the shoe.
 		_deal_cards():
 			Deal the starting cards to the dealer and all players.
 		_start_game_regular():
@@ -159,18 +362,26 @@ class BlackjackGame:
 
 	"""
 
-	AceVal = 11
-	DealerSoftGoal = 17
-	FaceVal = 10
-	Goal = 21
-	CardVals = (2, 3, 4, 5, 6, 7, 8, 9, 10, FaceVal, FaceVal, FaceVal, AceVal)
-	NumOfDecksInMatch = 4
+	AceVal = rules.AceVal
+	DealerSoftGoal = rules.DealerSoftGoal
+	FaceVal = rules.FaceVal
+	Goal = rules.Goal
+	CardVals = rules.CardVals
+	NumOfDecksInMatch = rules.NumOfDecksInMatch
+	ShoePenetration = rules.ShoePenetration
+	# The name of each card, by value, so rendering a report never has to
+	# build one; a FaceVal card is any of FaceNames, chosen as it is shown.
+	CardNames = (
+		*(f"a {card}" for card in range(8)), "an 8", "a 9", "a 10", "an Ace",
+	)
+	FaceNames = ("a 10", "a Jack", "a Queen", "a King")
 
 	def __init__(
 		self,
 		owner: nextcord.User | nextcord.Member,
 		*,
 		multiplayer: bool,
+		seed: int | None = None,
 	) -> None:
 		"""
 		Create a new BlackjackGame instance.
@@ -184,12 +395,20 @@ class BlackjackGame:
 				in a singleplayer game the owner is also the only player.
 				in multiplayer the owner is the one who can start the round.
 			multiplayer (bool): Whether to make a multiplayer game
+			seed (int | None): The seed of a game to replay; None for a new
+				game (default is None)
 
 		"""
 		self.owner = BlackjackPlayer(owner)
 		self.players: list[BlackjackPlayer] = [self.owner]
-		self.deck: list[int] = []
-		self.deck.extend(BlackjackGame.CardVals * 4 * 4)  # 4 decks
+		self.seed, self.rng = Rng.spawn(seed)
+		logger.info(
+			"Blackjack game for %s/%i seeded with %i.",
+			owner.name,
+			owner.id,
+			self.seed,
+		)
+		self.deck = Shoe(rng=self.rng)
 		# TODO: dealerUp should NEVER be None
 		# and dealerSum should NEVER be 0
 		self.dealerUp: int | None = None
@@ -197,6 +416,7 @@ class BlackjackGame:
 		self.started: bool = False
 		self.turn_idx = 0
 		self.multiplayer = multiplayer  # only multiplayer games can be joined
+		self.last_active = time.monotonic()
 		if not multiplayer:
 			self.message = self.start_game()
 		else:
@@ -239,13 +459,12 @@ class BlackjackGame:
 				else:
 					report = "The dealer will now play\n"
 				dealer_cards: list[int] = self.dealer_draw()
-				report += "The dealer's cards are {} ".format(
-					", ".join(
-						BlackjackGame.card_name(card)
-						for card in dealer_cards),
-				)
-				report += f"for a total of {self.dealerSum}.\n"
-				return report
+				return "".join((
+					report,
+					"The dealer's cards are ",
+					", ".join(map(BlackjackGame.card_name, dealer_cards)),
+					f" for a total of {self.dealerSum}.\n",
+				))
 		return ""
 
 	def _end_round(self) -> str:
@@ -260,55 +479,52 @@ class BlackjackGame:
 		"""
 		assert self.dealerUp is not None
 		assert self.dealerSum != 0
-		report = self._play_dealer_turn()
+		parts = [self._play_dealer_turn()]
+		payouts: list[tuple[nextcord.User | nextcord.Member, int]] = []
 		for p in self.players:
 			if p.perfect() or p.check_bust():
 				# these have already been handled and reported
 				continue
-			report += f"{p.name.mention}, "
-			if sum(p.hand) > self.dealerSum and not p.check_bust():
-				report += f"you're closer to {BlackjackGame.Goal} "
-				report += (
-					f"with a sum of {sum(p.hand)}. {WinMsg}"
+			parts.append(f"{p.name.mention}, ")
+			if p.total > self.dealerSum and not p.check_bust():
+				parts.append(
+					f"you're closer to {BlackjackGame.Goal} "
+					f"with a sum of {p.total}. {WinMsg}",
 				)
-				write_money(
-					p.name, p.bet, writing=True, adding=True,
-				)
-			elif sum(p.hand) == self.dealerSum:
-				report += (
-					f"That ties your sum of {sum(p.hand)}. "
-					f"Your bet has been returned, {p.name.mention}."
+				payouts.append((p.name, p.bet))
+			elif p.total == self.dealerSum:
+				parts.append(
+					f"That ties your sum of {p.total}. "
+					f"Your bet has been returned, {p.name.mention}.",
 				)
 			elif self.dealerSum > BlackjackGame.Goal:
-				report += (
-					f"You have a sum of {sum(p.hand)}. "
-					f"The dealer busts. {WinMsg}"
-				)
-				write_money(
-					p.name, p.bet, writing=True, adding=True,
+				parts.append(
+					f"You have a sum of {p.total}. "
+					f"The dealer busts. {WinMsg}",
 				)
+				payouts.append((p.name, p.bet))
 			else:
-				report += (
+				parts.append(
 					f"That's closer to {BlackjackGame.Goal} "
-					f"than your sum of {sum(p.hand)}. {LoseMsg}."
-				)
-				write_money(
-					p.name, -p.bet, writing=True, adding=True,
+					f"than your sum of {p.total}. {LoseMsg}.",
 				)
+				payouts.append((p.name, -p.bet))
 			if not p.bet:
-				report += (
-					"Unfortunately, you bet nothing, so this was all pointless."
+				parts.append(
+					"Unfortunately, you bet nothing,"
+					" so this was all pointless.",
 				)
-			report += "\n"  # trust me this is needed
+			parts.append("\n")  # trust me this is needed
+		settle_bets(payouts)
 		if not self.multiplayer:
-			return report
+			return "".join(parts)
 		self.started = False
 		self.dealerUp = None
 		self.dealerSum = 0
 		for p in self.players:
 			p.hand = []
-		report += "\nRound ended!"
-		return report
+		parts.append("\nRound ended!")
+		return "".join(parts)
 
 	@staticmethod
 	def card_name(card: int) -> str:
@@ -326,12 +542,10 @@ class BlackjackGame:
 			# TODO: this can cause us to draw more of a single facecard
 			# than would exist in the card pool in a real game.
 			# fixing this is not simple
-			return "a " + random.choice(
-				(str(BlackjackGame.FaceVal), "Jack", "Queen", "King"),
-			)
-		if card == BlackjackGame.AceVal:
-			return "an Ace"
-		return "an 8" if card == 8 else ("a " + str(card))  # noqa: PLR2004
+			return random.choice(BlackjackGame.FaceNames)
+		if card < len(BlackjackGame.CardNames):
+			return BlackjackGame.CardNames[card]
+		return f"a {card}"
 
 	# NOTE: this is currently useless
 	# for more info grep for '805746791'
@@ -356,6 +570,7 @@ class BlackjackGame:
 		"""
 		assert self.multiplayer
 		self.players.append(BlackjackPlayer(player))
+		self.last_active = time.monotonic()
 
 	def is_turn(self, player: BlackjackPlayer) -> bool:
 		"""
@@ -374,22 +589,29 @@ class BlackjackGame:
 
 	def deal_top_card(self) -> int:
 		"""
-		Remove and return the top card from the deck.
+		Deal the next card from the shoe.
 
 		Returns:
-			int: The value of the top card of the deck.
+			int: The value of the card dealt.
 
 		"""
-		return self.deck.pop(random.randint(0, len(self.deck) - 1))
+		return self.deck.deal()
 
 	def _deal_cards(self) -> None:
-		"""Deal the starting cards to the dealer and all players."""
+		"""
+		Deal the starting cards to the dealer and all players.
+
+		If the last round dealt past the shoe's cut card, the shoe is
+		reshuffled first, so that a round is never dealt across a shuffle.
+		"""
+		if self.deck.past_cut():
+			self.deck.shuffle()
 		self.dealerUp = self.deal_top_card()
 		self.dealerSum = self.dealerUp + self.deal_top_card()
 		for p in self.players:
 			p.hand = []
-			p.hand.append(self.deal_top_card())
-			p.hand.append(self.deal_top_card())
+			p.add_card(self.deal_top_card())
+			p.add_card(self.deal_top_card())
 
 	def _dealer_blackjack_end_round(self) -> None:
 		"""End a round where the dealer blackjacked."""
@@ -399,24 +621,24 @@ class BlackjackGame:
 
 	def _start_game_blackjack(self) -> str:
 		"""Play players' turns after the dealer draws blackjacks."""
-		message = "The dealer blackjacked!\n"
+		parts = ["The dealer blackjacked!\n"]
+		payouts: list[tuple[nextcord.User | nextcord.Member, int]] = []
 		for p in self.players:
-			message += (
+			parts.append(
 				f"{p.name.mention} your starting hand consists of "
-				f"{p.hand[0]} and {p.hand[1]}. "
+				f"{p.hand[0]} and {p.hand[1]}. ",
 			)
 			if p.perfect():
-				message += (
-					"You tied with the dealer, your bet is returned.\n"
+				parts.append(
+					"You tied with the dealer, your bet is returned.\n",
 				)
 			else:
-				message += (
-					"You did not blackjack, you lose.\n"
-				)
-				write_money(p.name, -p.bet, writing=True, adding=True)
+				parts.append("You did not blackjack, you lose.\n")
+				payouts.append((p.name, -p.bet))
+		settle_bets(payouts)
 		self._dealer_blackjack_end_round()
-		message += "\nRound ended."
-		return message
+		parts.append("\nRound ended.")
+		return "".join(parts)
 
 	def _start_game_regular(self) -> str:
 		"""
@@ -429,46 +651,50 @@ class BlackjackGame:
 			str: human readable report message.
 
 		"""
-		message = (
+		parts = [
 			f"The dealer is showing {self.dealerUp}, "
-			"with one card face down.\n"
-		)
+			"with one card face down.\n",
+		]
 		append_help: bool = not self.multiplayer
+		payouts: list[tuple[nextcord.User | nextcord.Member, int]] = []
 		for p in self.players:
 			if p.check_bust():
 				if self.multiplayer:
 					append_help = True
-				p.hand[1] = 1
-				message += (
+				p.soften_ace()
+				parts.append(
 					f"{p.name.mention} your starting hand consists of two Aces."
-					" One of them will act as a 1. Your total is 12.\n"
+					" One of them will act as a 1. Your total is 12.\n",
 				)
 			else:
-				message += (
+				parts.append(
 					f"{p.name.mention} your starting hand consists of "
 					f"{BlackjackGame.card_name(p.hand[0])} "
-					f"and {BlackjackGame.card_name(p.hand[1])}. "
+					f"and {BlackjackGame.card_name(p.hand[1])}. ",
 				)
 				if p.perfect():
 					if not self.multiplayer:
 						append_help = False
-					elif p == self.players[self.turn_idx]:
-						self.advance_turn()
-					message += f"You hit {BlackjackGame.Goal}! {WinMsg}.\n"
-					write_money(p.name, p.bet, writing=True, adding=True)
+					parts.append(f"You hit {BlackjackGame.Goal}! {WinMsg}.\n")
+					payouts.append((p.name, p.bet))
 				else:
 					if self.multiplayer:
 						append_help = True
-					message += f"Your total is {sum(p.hand)}.\n"
+					parts.append(f"Your total is {p.total}.\n")
+		settle_bets(payouts)
+		# Only once every pair of Aces is softened can advance_turn() look
+		# ahead for the first player still to play.
+		if self.multiplayer and self.players[self.turn_idx].perfect():
+			self.advance_turn()
 		if append_help:
 			if not self.multiplayer:
-				message += GameHelpMsg
+				parts.append(GameHelpMsg)
 			else:
-				message += (
+				parts.append(
 					f"\n{self.players[self.turn_idx].name.mention} "
-					f"it is your turn! {GameHelpMsg}"
+					f"it is your turn! {GameHelpMsg}",
 				)
-		return message
+		return "".join(parts)
 
 	def start_game(self) -> str:
 		"""
@@ -480,6 +706,7 @@ class BlackjackGame:
 		"""
 		self.turn_idx = 0
 		self.started = True
+		self.last_active = time.monotonic()
 		self._deal_cards()
 		if self.dealerSum == BlackjackGame.Goal:
 			return self._start_game_blackjack()
@@ -522,60 +749,51 @@ class BlackjackGame:
 
 		"""
 		assert self.started
+		self.last_active = time.monotonic()
 		dealt = self.deal_top_card()
-		dealt_card = dealt
 		player = self.players[self.turn_idx]
-		player.hand.append(dealt)
-		new_hand = player.hand
+		player.add_card(dealt)
 		append_help: bool = True
-		report = (
+		parts = [
 			f"{player.name.mention} you were dealt "
-			f"{BlackjackGame.card_name(dealt_card)}, "
-			"bringing your total to "
-		)
-		if BlackjackGame.AceVal in player.hand and player.check_bust():
-			for i, card in enumerate(player.hand):  # pragma: no branch
-				if card == BlackjackGame.AceVal:
-					player.hand[i] = 1
-					break
-			report += (
-				f"{sum(new_hand) + 10}. "
+			f"{BlackjackGame.card_name(dealt)}, bringing your total to ",
+		]
+		if player.soft_aces and player.check_bust():
+			player.soften_ace()
+			parts.append(
+				f"{player.total + 10}. "
 				"To avoid busting, your Ace will be treated as a 1. "
-				f"Your new total is {sum(new_hand)}. "
+				f"Your new total is {player.total}. ",
 			)
 		else:
-			report += (
-				f"{sum(new_hand)}. "
-				"Your card values are {}. The dealer is"
-				" showing {}, with one card face down."
-			).format(", ".join(str(card) for card in new_hand), self.dealerUp)
+			parts.append(
+				f"{player.total}. Your card values are "
+				f"{", ".join(map(str, player.hand))}. The dealer is"
+				f" showing {self.dealerUp}, with one card face down.",
+			)
 		if player.check_bust():
 			append_help = False
-			write_money(
-				player.name, -player.bet, writing=True, adding=True,
-			)
+			adjust_balance(player.name, -player.bet)
 			self.advance_turn()
-			report += f" You busted. Game over. {LoseMsg}."
+			parts.append(f" You busted. Game over. {LoseMsg}.")
 			if not self.round_over():
-				report += (
+				parts.append(
 					f"\n{self.players[self.turn_idx].name.mention}, "
-					"it is your turn.\n"
+					"it is your turn.\n",
 				)
 		elif player.perfect():
 			append_help = False
-			write_money(
-				player.name, player.bet, writing=True, adding=True,
-			)
-			report += (
+			adjust_balance(player.name, player.bet)
+			parts.append(
 				f" You hit {BlackjackGame.Goal}! "
-				f"{WinMsg}, {player.name.mention}.\n"
+				f"{WinMsg}, {player.name.mention}.\n",
 			)
 			self.advance_turn()
 		if append_help:
-			report += f" {GameHelpMsg}"
+			parts.append(f" {GameHelpMsg}")
 		elif self.round_over():
-			report += self._end_round()
-		return report
+			parts.append(self._end_round())
+		return "".join(parts)
 
 	def stay_current_player(self) -> str:
 		"""
@@ -587,6 +805,7 @@ class BlackjackGame:
 			bool: the round has ended.
 
 		"""
+		self.last_active = time.monotonic()
 		report = f"{self.players[self.turn_idx].name.mention} you stayed.\n"
 		self.advance_turn()
 		if self.round_over():
@@ -617,6 +836,189 @@ class BlackjackGame:
 		return None
 
 
+class Shoe:
+	"""
+	A shoe of cards for a game of blackjack, shuffled as it is dealt.
+
+	Each deal is one step of a Fisher-Yates shuffle: the card at the current
+	position is swapped with a random card not yet dealt, then dealt, and
+	the position moves on. That makes dealing constant-time, and since the
+	cards are always a permutation of the shoe, reshuffling is just
+	rewinding the position. The cards are stored one byte each.
+
+	Attributes:
+		Cards (array[int]): A full shoe, NumOfDecksInMatch decks
+		cards (array[int]): Every card in the shoe, those already dealt
+			first
+		position (int): The number of cards dealt since the last shuffle
+		cut (int): The position after which the shoe should be reshuffled
+		rng (random.Random or None): The generator to shuffle with, or None
+			for the random module's own
+
+	Methods:
+		deal():
+			Deal the next card.
+		shuffle():
+			Return every dealt card to the shoe.
+		past_cut():
+			Check whether the shoe has been dealt past its cut card.
+
+	"""
+
+	Cards = array("b", rules.ShoeCards)
+
+	def __init__(
+		self,
+		cards: Iterable[int] | None = None,
+		penetration: float = BlackjackGame.ShoePenetration,
+		rng: random.Random | None = None,
+	) -> None:
+		"""
+		Create a new Shoe instance.
+
+		Args:
+			cards (Iterable[int] or None): The cards in the shoe, in the
+				order the shuffle starts from (default is None, for a full
+				shoe)
+			penetration (float): The fraction of the shoe to deal before
+				reshuffling (default is BlackjackGame.ShoePenetration)
+			rng (random.Random or None): The generator to shuffle with; None
+				for the random module's own (default is None)
+
+		"""
+		self.cards = Shoe.Cards[:] if cards is None else array("b", cards)
+		self.position = 0
+		self.cut = int(len(self.cards) * penetration)
+		self.rng = rng
+
+	def __len__(self) -> int:
+		"""
+		Return the number of cards left to deal before the shoe runs out.
+
+		Returns:
+			int: The number of cards not yet dealt.
+
+		"""
+		return len(self.cards) - self.position
+
+	def deal(self) -> int:
+		"""
+		Deal the next card, reshuffling first if the shoe has run out.
+
+		Returns:
+			int: The value of the card dealt.
+
+		"""
+		if self.position == len(self.cards):
+			self.shuffle()
+		cards = self.cards
+		i = self.position
+		j = (self.rng or random).randint(i, len(cards) - 1)
+		cards[i], cards[j] = cards[j], cards[i]
+		self.position = i + 1
+		return cards[i]
+
+	def shuffle(self) -> None:
+		"""Return every dealt card to the shoe."""
+		self.position = 0
+
+	def past_cut(self) -> bool:
+		"""
+		Check whether the shoe has been dealt past its cut card.
+
+		Returns:
+			bool: Whether the shoe should be reshuffled before the next round.
+
+		"""
+		return self.position >= self.cut
+
+
+class TableScheduler:
+	"""
+	Runs each game's commands one at a time, and tracks where tables live.
+
+	Every game gets its own asyncio.Lock, which wakes the commands queued on
+	it in the order they arrived. A command holds its game's turn from
+	reading the game through committing bets and sending its report, so a
+	table's reports always go out in the order its commands were sent,
+	while games elsewhere carry on concurrently. Multiplayer tables are
+	also filed under the channel they were opened in.
+
+	Games are held weakly: once a game is no longer tracked anywhere else,
+	its turn and its place in its channel go with it.
+
+	Attributes:
+		channels (dict[int, weakref.WeakSet[BlackjackGame]]): The tables
+			opened in each channel, keyed by channel id
+
+	Methods:
+		open(game, channel_id):
+			File a new table under the channel it was opened in.
+		channel_of(game):
+			Get the id of the channel a table was opened in.
+		turn(game):
+			Get the lock a command must hold to act on a game.
+
+	"""
+
+	def __init__(self) -> None:
+		"""Create a new TableScheduler instance."""
+		self.channels: dict[int, weakref.WeakSet[BlackjackGame]] = {}
+		self._homes: weakref.WeakKeyDictionary[BlackjackGame, int] = (
+			weakref.WeakKeyDictionary()
+		)
+		self._turns: weakref.WeakKeyDictionary[BlackjackGame, asyncio.Lock] = (
+			weakref.WeakKeyDictionary()
+		)
+
+	def open(self, game: BlackjackGame, channel_id: int) -> None:
+		"""
+		File a new table under the channel it was opened in.
+
+		Args:
+			game (BlackjackGame): The table
+			channel_id (int): The id of the channel it was opened in
+
+		"""
+		self.channels.setdefault(channel_id, weakref.WeakSet()).add(game)
+		self._homes[game] = channel_id
+
+	def channel_of(self, game: BlackjackGame) -> int | None:
+		"""
+		Get the id of the channel a table was opened in.
+
+		Args:
+			game (BlackjackGame): The table
+
+		Returns:
+			int or None: The channel's id, or None for singleplayer games
+			and tables restored from before the last restart.
+
+		"""
+		return self._homes.get(game)
+
+	def turn(
+		self, game: BlackjackGame | None,
+	) -> AbstractAsyncContextManager[object]:
+		"""
+		Get the lock a command must hold to act on a game.
+
+		Args:
+			game (BlackjackGame or None): The game; None when the command's
+				author is not in one, in which case there is nothing to wait
+				for
+
+		Returns:
+			AbstractAsyncContextManager: The game's lock.
+
+		"""
+		if game is None:
+			return nullcontext()
+		if (lock := self._turns.get(game)) is None:
+			lock = self._turns[game] = asyncio.Lock()
+		return lock
+
+
 class MoneyFlags(Enum):
 	"""Enum for additional readability in the writeMoney method."""
 
@@ -649,36 +1051,93 @@ def write_money(
 
 	"""
 	assert "," not in member.name
-	with Path("resources/money.csv").open("r", encoding="UTF-8") as csv_file:
-		for row in csv.reader(csv_file, delimiter=","):
-			if str(member.id) == row[0]:  # found member
-				if isinstance(amount, str):  # for people betting all
-					amount = -int(row[1]) if amount == "-all" else int(row[1])
-				new_bank: int = int(row[1]) + amount if adding else amount
-				if writing and row[1] != str(new_bank):
-					if int(row[1]) + amount < 0:
-						return MoneyFlags.NotEnoughBucks, int(row[1])
-					new_line = ",".join((row[0], str(new_bank), str(member)))
-					result = MoneyFlags.BalanceChanged
-				else:
-					# No change in balance. Rewrites lines anyway, to
-					# update stringified version of member
-					new_line = ",".join((row[0], row[1], str(member)))
-					new_bank = int(row[1])
-					result = MoneyFlags.BalanceUnchanged
-				with Path("resources/money.csv").open(
-					"r", encoding="UTF-8",
-				) as f:
-					money = "".join(list(f)).replace(",".join(row), new_line)
-				with Path("resources/money.csv").open(
-					"w", encoding="UTF-8",
-				) as f:
-					f.writelines(money)
-				return result, new_bank
-
-	with Path("resources/money.csv").open("a", encoding="UTF-8") as f:
-		f.write(f"\r\n{member.id},300,{member}")
-	return MoneyFlags.Registered, 300
+	if (entry := Bank.get(member.id)) is None:
+		Bank.set(member.id, 300, str(member))
+		return MoneyFlags.Registered, 300
+	if isinstance(amount, str):  # for people betting all
+		amount = -entry.balance if amount == "-all" else entry.balance
+	new_bank: int = entry.balance + amount if adding else amount
+	if writing and entry.balance != new_bank:
+		if adding:
+			return adjust_balance(member, amount)
+		if entry.balance + amount < 0:
+			return MoneyFlags.NotEnoughBucks, entry.balance
+		Bank.set(member.id, new_bank, str(member))
+		return MoneyFlags.BalanceChanged, new_bank
+	if entry.name != str(member):
+		# No change in balance; note the new stringified version of member,
+		# to be written with the next batch instead of right now
+		Bank.rename(member.id, str(member))
+	return MoneyFlags.BalanceUnchanged, entry.balance
+
+
+def adjust_balance(
+	member: nextcord.User | nextcord.Member,
+	delta: int,
+	*,
+	min_balance: int = 0,
+) -> tuple[MoneyFlags, int]:
+	"""
+	Atomically add to or subtract from a user's BeardlessBucks balance.
+
+	The check against min_balance and the change happen under the user's
+	ledger lock, so two commands from the same user cannot both spend the
+	same BeardlessBucks.
+
+	Args:
+		member (nextcord.User or Member): The target user
+		delta (int): The amount to change member's balance by
+		min_balance (int): The lowest balance the change may leave member
+			with (default is 0)
+
+	Returns:
+		tuple[MoneyFlags, int]: A tuple containing:
+			MoneyFlags: Registered if member was not registered, in which
+				case delta is not applied; NotEnoughBucks if the change
+				would leave member below min_balance; else BalanceChanged,
+				or BalanceUnchanged if delta is 0
+			int: the current money in the user's bank after the operation
+
+	"""
+	assert "," not in member.name
+	try:
+		changed, bank = Bank.adjust(
+			member.id, delta, str(member), min_balance=min_balance,
+		)
+	except KeyError:
+		Bank.set(member.id, 300, str(member))
+		return MoneyFlags.Registered, 300
+	if not changed:
+		return MoneyFlags.NotEnoughBucks, bank
+	if not delta:
+		return MoneyFlags.BalanceUnchanged, bank
+	return MoneyFlags.BalanceChanged, bank
+
+
+def settle_bets(
+	payouts: list[tuple[nextcord.User | nextcord.Member, int]],
+) -> None:
+	"""
+	Settle a round's bets in a single ledger transaction.
+
+	Every payout is written as one batch, so settling a table costs one
+	journal write no matter how many players are at it. As in
+	adjust_balance, a member who was not yet registered is registered
+	instead of paid.
+
+	Args:
+		payouts (list[tuple[nextcord.User or Member, int]]): Each member
+			and the amount to change their balance by
+
+	"""
+	GamesChanged.set()
+	with Bank.transaction() as tx:
+		for member, delta in payouts:
+			assert "," not in member.name
+			if Bank.get(member.id) is None:
+				Bank.set(member.id, 300, str(member))
+			else:
+				tx.add(member.id, delta, str(member))
 
 
 def register(target: nextcord.User | nextcord.Member) -> nextcord.Embed:
@@ -766,10 +1225,10 @@ def leaderboard(
 	msg: nextcord.Message | None = None,
 ) -> nextcord.Embed:
 	"""
-	Find the top min(len(money.csv), 10) users by balance in money.csv.
+	Find the top min(len(Bank), 10) users by balance in Bank.
 
-	Runtime = |money.csv| + runtime of sorted(money.csv) + 10
-	= O(n) + O(nlog(n)) + 10 = O(nlog(n)).
+	Bank keeps a RankIndex up to date on every write, so runtime =
+	O(10) to read off the top 10 + O(log(n)) to find target's position.
 
 	Args:
 		target (nextcord.User or Member or str or None): The user invoking
@@ -787,38 +1246,29 @@ def leaderboard(
 	emb = bb_embed("BeardlessBucks Leaderboard")
 	if (msg and isinstance(target, str)):
 		target = member_search(msg, target)
-	if target and isinstance(target, nextcord.User | nextcord.Member):
-		write_money(target, 300, writing=False, adding=False)
-	with Path("resources/money.csv").open("r", encoding="UTF-8") as csv_file:
-		lb_dict = {
-			row[2]: int(row[1]) for row in csv.reader(csv_file, delimiter=",")
-		}
-	# Sort by value for each key in lbDict, which is BeardlessBucks balance
-	sorted_dict = OrderedDict(sorted(lb_dict.items(), key=itemgetter(1)))
-	pos = target_balance = None
-	if target:
-		users = list(sorted_dict.keys())
-		try:
-			pos = len(users) - users.index(str(target))
-		except ValueError:
-			pos = None
-		else:
-			target_balance = sorted_dict[str(target)]
-	for i in range(min(len(sorted_dict), 10)):
-		head, body = sorted_dict.popitem()
-		last_entry: bool = (
-			i != min(len(sorted_dict), 10) - 1
+	rank_target = (
+		target if isinstance(target, nextcord.User | nextcord.Member) else None
+	)
+	if rank_target:
+		target_balance = write_money(
+			rank_target, 300, writing=False, adding=False,
+		)[1]
+	# Names changed since the last leaderboard are only written now.
+	Bank.flush_names()
+	top = Bank.top(10)
+	for i, entry in enumerate(top):
+		emb.add_field(
+			name=f"{i + 1}. {entry.name.split("#")[0]}",
+			value=str(entry.balance),
+			inline=i != len(top) - 1,
 		)
+	if rank_target:
 		emb.add_field(
-			name=f"{i + 1}. {head.split("#")[0]}",
-			value=str(body),
-			inline=last_entry,
+			name=f"{rank_target.name}'s position:",
+			value=str(Bank.rank(rank_target.id)),
 		)
-	if target and pos:
-		assert not isinstance(target, str)
-		emb.add_field(name=f"{target.name}'s position:", value=str(pos))
 		emb.add_field(
-			name=f"{target.name}'s balance:", value=str(target_balance),
+			name=f"{rank_target.name}'s balance:", value=str(target_balance),
 		)
 	return emb
 
@@ -835,39 +1285,107 @@ def flip(author: nextcord.User | nextcord.Member, bet: str | int) -> str:
 		str: A report of the outcome and how author's balance changed.
 
 	"""
-	heads = random.randint(0, 1)
+	heads = Rng.root.randint(0, 1)
 	report = InvalidBetMsg
 	assert "," not in author.name
-	if bet == "all":
-		if not heads:
-			bet = "-all"
-	else:
+	if bet != "all":
 		try:
 			bet = int(bet)
 		except ValueError:
 			bet = -1
-	if (
-		(isinstance(bet, str) and "all" in bet)
-		or (isinstance(bet, int) and bet >= 0)
-	):
+	if bet == "all" or (isinstance(bet, int) and bet >= 0):
 		result, bank = write_money(author, 300, writing=False, adding=False)
 		if result == MoneyFlags.Registered:
 			report = NewUserMsg
-		elif isinstance(bet, int) and isinstance(bank, int) and bet > bank:
-			report = (
-				"You do not have enough BeardlessBucks to bet that much, {}!"
-			)
 		else:
-			if isinstance(bet, int) and not heads:
-				bet *= -1
-			result = write_money(author, bet, writing=True, adding=True)[0]
-			report = f"Heads! {WinMsg}" if heads else f"Tails! {LoseMsg}"
-			report += f", {author.mention}.\n"
-			if result == MoneyFlags.BalanceUnchanged:
-				report += (
-					"Or, they would have been, if"
-					" you had actually bet anything."
+			bet = bank if bet == "all" else int(bet)
+			delta = bet if heads else -bet
+			# However the coin lands, author must hold at least bet, so
+			# require bank + delta >= bet + delta.
+			result, _ = adjust_balance(author, delta, min_balance=bet + delta)
+			if result == MoneyFlags.NotEnoughBucks:
+				report = (
+					"You do not have enough BeardlessBucks"
+					" to bet that much, {}!"
 				)
+			else:
+				report = f"Heads! {WinMsg}" if heads else f"Tails! {LoseMsg}"
+				report += f", {author.mention}.\n"
+				if result == MoneyFlags.BalanceUnchanged:
+					report += (
+						"Or, they would have been, if"
+						" you had actually bet anything."
+					)
+	return report.format(author.mention)
+
+
+def flip_many(
+	author: nextcord.User | nextcord.Member, bet: str | int, flips: str,
+) -> str:
+	"""
+	Gamble a certain number of BeardlessBucks on each of several coin tosses.
+
+	Every toss is drawn at once, as the bits of one random number, and the
+	net result is applied to author's balance in a single ledger write.
+	Betting "all" splits author's balance evenly across the tosses.
+
+	Args:
+		author (nextcord.User or Member): The user who is gambling
+		bet (str): The amount author is wagering on each toss
+		flips (str): The number of coins to toss, written as x<N>
+
+	Returns:
+		str: A report of the outcome and how author's balance changed.
+
+	"""
+	count = int(flips[1:]) if flips[:1] == "x" and flips[1:].isdecimal() else 0
+	if not 1 < count <= MaxFlips:
+		return InvalidFlipsMsg.format(author.mention)
+	report = InvalidBetMsg
+	assert "," not in author.name
+	if bet != "all":
+		try:
+			bet = int(bet)
+		except ValueError:
+			bet = -1
+	if bet == "all" or (isinstance(bet, int) and bet >= 0):
+		result, bank = write_money(author, 300, writing=False, adding=False)
+		if result == MoneyFlags.Registered:
+			report = NewUserMsg
+		else:
+			bet = bank // count if bet == "all" else int(bet)
+			tosses = f"{Rng.root.getrandbits(count):0{count}b}"
+			heads = tosses.count("1")
+			delta = (2 * heads - count) * bet
+			# author must be able to cover every toss coming up tails.
+			result, _ = adjust_balance(
+				author, delta, min_balance=bet * count + delta,
+			)
+			if result == MoneyFlags.NotEnoughBucks:
+				report = (
+					"You do not have enough BeardlessBucks to bet that"
+					f" much on {count} flips, {{}}!"
+				)
+			else:
+				streak, side = max(
+					(max(map(len, tosses.split("0"))), "heads"),
+					(max(map(len, tosses.split("1"))), "tails"),
+				)
+				report = (
+					f"{heads} heads and {count - heads} tails, with a"
+					f" longest streak of {streak} {side}. "
+				)
+				if delta > 0:
+					report += f"You won {delta} BeardlessBucks, {{}}!"
+				elif delta < 0:
+					report += f"You lost {-delta} BeardlessBucks, {{}}."
+				else:
+					report += "You broke even, {}."
+				if not bet:
+					report += (
+						"\nUnfortunately, you bet nothing,"
+						" so this was all pointless."
+					)
 	return report.format(author.mention)
 
 
@@ -917,6 +1435,7 @@ def make_bet(
 		assert bank is not None
 		bet = bank
 		report = game.message
+	game.last_active = time.monotonic()
 	return report, int(bet)  # this cast should work
 
 
@@ -964,15 +1483,18 @@ def blackjack(
 
 
 def player_in_game(
-	games: list[BlackjackGame], author: nextcord.User | nextcord.Member,
+	games: dict[int, BlackjackGame], author: nextcord.User | nextcord.Member,
 ) -> tuple[BlackjackGame, BlackjackPlayer] | None:
 	"""
 	Check if a user has an active game of Blackjack.
 
-	TODO: convert games list to dict[user_id, BlackJackGame], deprecate this.
+	If the user has a game saved from before the last restart, it is
+	restored first; see restore_saved_game to also get the report of any
+	round the restore settled.
 
 	Args:
-		games (list[BlackjackGame]): list of active Blackjack games
+		games (dict[int, BlackjackGame]): Every active Blackjack game, keyed
+			by the id of each of its players
 		author (nextcord.User or Member): The user who is gambling
 
 	Returns:
@@ -981,8 +1503,475 @@ def player_in_game(
 		Else, None.
 
 	"""
-	for game in games:
-		player = game.get_player(author)
-		if player is not None:
-			return game, player
-	return None
+	if author.id not in games:
+		if (record := DormantGames.get(author.id)) is None:
+			return None
+		restore_game(games, record, author)
+	if (game := games.get(author.id)) is None:
+		return None
+	player = game.get_player(author)
+	return None if player is None else (game, player)
+
+
+def add_game(games: dict[int, BlackjackGame], game: BlackjackGame) -> None:
+	"""
+	Start tracking a game under the id of each of its players.
+
+	Args:
+		games (dict[int, BlackjackGame]): Every active Blackjack game, keyed
+			by the id of each of its players
+		game (BlackjackGame): The game to track
+
+	"""
+	for p in game.players:
+		games[p.name.id] = game
+
+
+def remove_game(games: dict[int, BlackjackGame], game: BlackjackGame) -> None:
+	"""
+	Stop tracking a game under the id of any of its players.
+
+	Args:
+		games (dict[int, BlackjackGame]): Every active Blackjack game, keyed
+			by the id of each of its players
+		game (BlackjackGame): The game to stop tracking
+
+	"""
+	GamesChanged.set()
+	for p in game.players:
+		if games.get(p.name.id) is game:
+			del games[p.name.id]
+
+
+def join_game(
+	games: dict[int, BlackjackGame],
+	game: BlackjackGame,
+	author: nextcord.User | nextcord.Member,
+) -> None:
+	"""
+	Add a player to a multiplayer game and track them under it.
+
+	Args:
+		games (dict[int, BlackjackGame]): Every active Blackjack game, keyed
+			by the id of each of its players
+		game (BlackjackGame): The game to join
+		author (nextcord.User or Member): The user joining the game
+
+	"""
+	game.add_player(author)
+	games[author.id] = game
+
+
+def leave_game(
+	games: dict[int, BlackjackGame],
+	game: BlackjackGame,
+	player: BlackjackPlayer,
+) -> None:
+	"""
+	Remove a player from a game and stop tracking them under it.
+
+	Args:
+		games (dict[int, BlackjackGame]): Every active Blackjack game, keyed
+			by the id of each of its players
+		game (BlackjackGame): The game to leave
+		player (BlackjackPlayer): The player leaving the game
+
+	"""
+	GamesChanged.set()
+	game.players.remove(player)
+	if games.get(player.name.id) is game:
+		del games[player.name.id]
+
+
+def is_idle(
+	games: dict[int, BlackjackGame],
+	game: BlackjackGame,
+	ttl: float,
+	now: float | None = None,
+) -> bool:
+	"""
+	Check whether a game is still active and has sat idle past its ttl.
+
+	Args:
+		games (dict[int, BlackjackGame]): Every active Blackjack game, keyed
+			by the id of each of its players
+		game (BlackjackGame): The game to check
+		ttl (float): Seconds of inactivity after which a game is evicted
+		now (float | None): The current time.monotonic(); sometimes
+			provided in testing (default is None)
+
+	Returns:
+		bool: Whether the game is in games and has been idle for longer
+		than ttl seconds.
+
+	"""
+	if now is None:
+		now = time.monotonic()
+	return now - game.last_active > ttl and any(
+		games.get(player.name.id) is game for player in game.players
+	)
+
+
+def evict_game(
+	games: dict[int, BlackjackGame],
+	game: BlackjackGame,
+	now: float | None = None,
+) -> None:
+	"""
+	Close a game, settling any round in progress.
+
+	A round in progress is settled as though each remaining player stayed,
+	so walking away can neither dodge a loss nor forfeit a winning hand.
+	A table between rounds has no bets on it yet, so it is disbanded with
+	nothing to refund.
+
+	Args:
+		games (dict[int, BlackjackGame]): Every active Blackjack game, keyed
+			by the id of each of its players
+		game (BlackjackGame): The game to close
+		now (float | None): The current time.monotonic(); sometimes
+			provided in testing (default is None)
+
+	"""
+	if now is None:
+		now = time.monotonic()
+	idle = now - game.last_active
+	if game.started:
+		while not game.round_over():
+			game.stay_current_player()
+	remove_game(games, game)
+	logger.info(
+		"Evicted %s blackjack game owned by %s/%i after %is idle.",
+		"multiplayer" if game.multiplayer else "singleplayer",
+		game.owner.name.name,
+		game.owner.name.id,
+		idle,
+	)
+
+
+def evict_idle_games(
+	games: dict[int, BlackjackGame], ttl: float, now: float | None = None,
+) -> list[BlackjackGame]:
+	"""
+	Close every game that has sat idle for longer than ttl seconds.
+
+	See evict_game for how each is closed. This does not wait for each
+	game's turn; while the bot is running, take it from its TableScheduler
+	and evict the games one at a time instead.
+
+	Args:
+		games (dict[int, BlackjackGame]): Every active Blackjack game, keyed
+			by the id of each of its players
+		ttl (float): Seconds of inactivity after which a game is evicted
+		now (float | None): The current time.monotonic(); sometimes
+			provided in testing (default is None)
+
+	Returns:
+		list[BlackjackGame]: The games that were evicted.
+
+	"""
+	if now is None:
+		now = time.monotonic()
+	evicted = [
+		game
+		for game in {id(game): game for game in games.values()}.values()
+		if is_idle(games, game, ttl, now)
+	]
+	for game in evicted:
+		evict_game(games, game, now)
+	return evicted
+
+
+def dump_game(game: BlackjackGame) -> bytes:
+	"""
+	Serialize a game of blackjack for the snapshot.
+
+	Args:
+		game (BlackjackGame): The game to serialize
+
+	Returns:
+		bytes: The game's record, as described above GameSnapshot.
+
+	"""
+	record = GameRecord.pack(
+		time.time() - (time.monotonic() - game.last_active),
+		game.seed,
+		game.multiplayer,
+		game.started,
+		game.turn_idx,
+		game.players.index(game.owner),
+		len(game.players),
+		game.dealerUp or 0,
+		game.dealerSum,
+		game.deck.position,
+		game.deck.cut,
+		len(game.deck.cards),
+	) + game.deck.cards.tobytes() + RngState.pack(*game.rng.getstate()[1])
+	for p in game.players:
+		record += PlayerRecord.pack(p.name.id, p.bet, len(p.hand))
+		record += array("b", p.hand).tobytes()
+	return record
+
+
+def save_games(
+	games: dict[int, BlackjackGame], path: Path = GameSnapshot,
+) -> None:
+	"""
+	Write every game in progress to the snapshot.
+
+	Saved games that nobody has picked up again are written back out as
+	they are, unless they are older than GameTtl; no bets are taken until a
+	round is settled, so dropping one refunds it. The snapshot is written
+	and fsynced under a temporary name, then renamed over the old one; if
+	there is nothing to save, it is removed instead.
+
+	Args:
+		games (dict[int, BlackjackGame]): Every active Blackjack game, keyed
+			by the id of each of its players
+		path (Path): Where to write the snapshot (default is GameSnapshot)
+
+	"""
+	GamesChanged.clear()
+	records = [
+		dump_game(game)
+		for game in {id(game): game for game in games.values()}.values()
+	]
+	cutoff = time.time() - GameTtl
+	for record in {id(r): r for r in DormantGames.values()}.values():
+		if GameRecord.unpack_from(record)[0] > cutoff:
+			records.append(record)
+			continue
+		for user_id in [k for k, v in DormantGames.items() if v is record]:
+			del DormantGames[user_id]
+		logger.info("Refunded saved blackjack game left idle past GameTtl.")
+	if not records:
+		path.unlink(missing_ok=True)
+		return
+	tmp_path = path.with_suffix(".tmp")
+	with tmp_path.open("wb") as f:
+		f.write(GameCount.pack(len(records)))
+		for record in records:
+			f.write(GameCount.pack(len(record)) + record)
+		f.flush()
+		os.fsync(f.fileno())
+	tmp_path.replace(path)
+
+
+def saved_players(record: bytes) -> list[int]:
+	"""
+	List the players in a saved game of blackjack.
+
+	Args:
+		record (bytes): The game's record, as described above GameSnapshot
+
+	Returns:
+		list[int]: The id of each of the game's players.
+
+	Raises:
+		struct.error: If the record is cut short or runs on past its last
+			player.
+
+	"""
+	header = GameRecord.unpack_from(record)
+	pos = GameRecord.size + header[-1] + RngState.size
+	user_ids = []
+	for _ in range(header[6]):
+		user_id, _, hand = PlayerRecord.unpack_from(record, pos)
+		user_ids.append(user_id)
+		pos += PlayerRecord.size + hand
+	if pos != len(record):
+		msg = f"game record is {len(record)} bytes, expected {pos}"
+		raise struct.error(msg)
+	return user_ids
+
+
+def load_games(path: Path = GameSnapshot) -> dict[int, bytes]:
+	"""
+	Read the snapshot of games saved before the last shutdown.
+
+	Games are only split out and indexed by player id here; each one is
+	rebuilt by restore_game the next time one of its players sends a
+	command, once their Discord user is at hand. If the snapshot is cut
+	short or damaged, the games before the damage are still loaded; the
+	rest are dropped, which refunds them.
+
+	Args:
+		path (Path): Where to read the snapshot from (default is
+			GameSnapshot)
+
+	Returns:
+		dict[int, bytes]: Each saved game's record, keyed by the id of each
+		of its players.
+
+	"""
+	if not path.exists():
+		return {}
+	data = path.read_bytes()
+	dormant: dict[int, bytes] = {}
+	loaded = 0
+	try:
+		(count,) = GameCount.unpack_from(data)
+		offset = GameCount.size
+		for _ in range(count):
+			(length,) = GameCount.unpack_from(data, offset)
+			offset += GameCount.size
+			record = data[offset:offset + length]
+			offset += length
+			dormant.update(dict.fromkeys(saved_players(record), record))
+			loaded += 1
+	except struct.error as e:
+		logger.warning(
+			"Dropped saved blackjack games after game %i of %s: %s",
+			loaded,
+			path,
+			e,
+		)
+	logger.info("Loaded %i saved blackjack games.", loaded)
+	return dormant
+
+
+def restore_game(
+	games: dict[int, BlackjackGame],
+	record: bytes,
+	author: nextcord.User | nextcord.Member,
+) -> tuple[BlackjackGame, str | None]:
+	"""
+	Rebuild a saved game of blackjack and start tracking it again.
+
+	The other players are looked up in author's guild. Any who cannot be
+	found are dropped from the table; their bets were never taken, so
+	they are refunded. If that leaves nobody still to play, the round is
+	settled; a singleplayer game then ends there and is not tracked.
+
+	Args:
+		games (dict[int, BlackjackGame]): Every active Blackjack game, keyed
+			by the id of each of its players
+		record (bytes): The game's record, from load_games
+		author (nextcord.User or Member): The player whose command brought
+			the game back
+
+	Returns:
+		tuple[BlackjackGame, str | None]: The restored game, and the report
+		of the round its restore settled, if any.
+
+	"""
+	(
+		saved_at,
+		seed,
+		multiplayer,
+		started,
+		turn_idx,
+		owner_idx,
+		players,
+		dealer_up,
+		dealer_sum,
+		position,
+		cut,
+		cards,
+	) = GameRecord.unpack_from(record)
+	game = BlackjackGame(author, multiplayer=True, seed=seed)
+	pos = GameRecord.size + cards
+	# Pick the generator up where it left off, so the game deals on exactly
+	# as it would have without the restart, and can still be replayed.
+	game.rng.setstate((3, RngState.unpack_from(record, pos), None))
+	game.players = []
+	game.multiplayer = multiplayer
+	game.started = started
+	game.dealerUp = dealer_up or None
+	game.dealerSum = dealer_sum
+	game.deck = Shoe(
+		record[GameRecord.size:GameRecord.size + cards], rng=game.rng,
+	)
+	game.deck.position = position
+	game.deck.cut = cut
+	game.last_active = time.monotonic() - (time.time() - saved_at)
+	pos += RngState.size
+	for i in range(players):
+		user_id, bet, hand = PlayerRecord.unpack_from(record, pos)
+		pos += PlayerRecord.size
+		if DormantGames.get(user_id) is record:
+			del DormantGames[user_id]
+		user = author if user_id == author.id else (
+			author.guild.get_member(user_id)
+			if isinstance(author, nextcord.Member) else None
+		)
+		if user is None:
+			logger.info("Dropped %i from saved blackjack game.", user_id)
+			if i < turn_idx:
+				turn_idx -= 1
+		else:
+			player = BlackjackPlayer(user)
+			player.hand = list(array("b", record[pos:pos + hand]))
+			player.bet = bet
+			game.players.append(player)
+			if i == owner_idx:
+				game.owner = player
+		pos += hand
+	if game.owner not in game.players:
+		game.owner = game.players[0]
+	game.turn_idx = turn_idx
+	report = None
+	if started and game.round_over():
+		report = game._end_round()  # noqa: SLF001
+		logger.info(
+			"Settled restored blackjack round for %s/%i: %s",
+			author.name,
+			author.id,
+			report,
+		)
+	if game.multiplayer or report is None:
+		add_game(games, game)
+	logger.info(
+		"Restored blackjack game for %s/%i.", author.name, author.id,
+	)
+	return game, report
+
+
+def restore_saved_game(
+	games: dict[int, BlackjackGame], author: nextcord.User | nextcord.Member,
+) -> str | None:
+	"""
+	Restore a user's game saved from before the last restart, if any.
+
+	Called ahead of each command, so that if the restore settles a round,
+	the user who brought the game back is told how it ended.
+
+	Args:
+		games (dict[int, BlackjackGame]): Every active Blackjack game, keyed
+			by the id of each of its players
+		author (nextcord.User or Member): The user sending a command
+
+	Returns:
+		str or None: The report of the round the restore settled, if it
+		settled one. Else, None.
+
+	"""
+	if author.id in games or (record := DormantGames.get(author.id)) is None:
+		return None
+	return restore_game(games, record, author)[1]
+
+
+def hint(game: BlackjackGame, player: BlackjackPlayer) -> str:
+	"""
+	Suggest whether a player should hit or stay.
+
+	Args:
+		game (BlackjackGame): The game the player is in; must be started
+		player (BlackjackPlayer): The player asking, whose turn it is
+
+	Returns:
+		str: The report to send, with the play basic strategy calls for.
+
+	"""
+	assert game.dealerUp is not None
+	soft = player.soft_aces > 0
+	play = Strategy.get((player.total, soft, game.dealerUp))
+	if play is None:
+		return f"I don't have a hint for that hand, {player.name.mention}."
+	action, stay_ev, hit_ev = play
+	return (
+		f"{player.name.mention}, with a {'soft' if soft else 'hard'}"
+		f" {player.total} against the dealer's {game.dealerUp}, you should"
+		f" {action}. Staying returns {stay_ev:+.2f} per BeardlessBuck bet on"
+		f" average, and hitting returns {hit_ev:+.2f}."
+	)
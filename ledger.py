@@ -0,0 +1,2051 @@
+"""Beardless Bot in-memory BeardlessBucks ledger."""
+
+import argparse
+import asyncio
+import csv
+import heapq
+import logging
+import mmap
+import os
+import random
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Buffer, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from types import TracebackType
+from typing import BinaryIO, Final, Self, override
+
+logger = logging.getLogger(__name__)
+
+CompactThreshold: Final[int] = 1000
+FsyncEvery: Final[int] = 32
+FsyncInterval: Final[float] = 1.0
+CommitWindow: Final[float] = 0.01
+CheckpointInterval: Final[float] = 60.0
+
+# Every journal starts with JournalMagic. Each record after it is a fixed
+# JournalRecord header--user id, delta, new balance, timestamp, name length--
+# followed by the UTF-8 name (empty when it did not change) and a CRC32 of
+# the header and name, so that a torn write at the tail can be detected.
+# A record for user BatchMarker, which is never a Discord id, opens a batch:
+# its delta is the number of records after it that stand or fall together.
+JournalMagic: Final[bytes] = b"BBJ1"
+BatchMarker: Final[int] = 2**64 - 1
+JournalRecord = struct.Struct("<QqqdH")
+JournalCrc = struct.Struct("<I")
+
+# A binary snapshot is a SnapshotHeader--magic and record count--then one
+# fixed-width SnapshotRecord per user, sorted by id, then a string table of
+# the users' UTF-8 names. Each record holds its user's id, balance, and the
+# offset and length of their name in the string table, so a single user can
+# be found by binary search without decoding anything else in the file.
+SnapshotMagic: Final[bytes] = b"BBS1"
+SnapshotHeader = struct.Struct("<4sI")
+SnapshotRecord = struct.Struct("<QqII")
+SnapshotId = struct.Struct("<Q")
+FenceStride: Final[int] = 64
+ShardHashMultiplier: Final[int] = 0x9E3779B97F4A7C15
+
+# SqliteLedger statements. Each is reused verbatim, so sqlite3's statement
+# cache keeps every one of them prepared for the life of the connection.
+SqlCreateTable: Final[str] = (
+	"CREATE TABLE IF NOT EXISTS money"
+	" (id INTEGER PRIMARY KEY, balance INTEGER NOT NULL, name TEXT NOT NULL)"
+)
+SqlCreateIndex: Final[str] = (
+	"CREATE INDEX IF NOT EXISTS money_by_balance ON money (balance, id)"
+)
+SqlGet: Final[str] = "SELECT balance, name FROM money WHERE id = ?"
+SqlSet: Final[str] = (
+	"INSERT INTO money (id, balance, name) VALUES (?, ?, ?) ON CONFLICT (id)"
+	" DO UPDATE SET balance = excluded.balance, name = excluded.name"
+)
+# A single statement, so SQLite applies the check and the change atomically.
+# Only used for nonzero deltas, so that a balance check never writes a row.
+SqlAdjust: Final[str] = (
+	"UPDATE money SET balance = balance + :delta, name = :name"
+	" WHERE id = :id AND balance + :delta >= :min_balance RETURNING balance"
+)
+SqlTop: Final[str] = (
+	"SELECT balance, name FROM money ORDER BY balance DESC, id DESC LIMIT ?"
+)
+SqlRank: Final[str] = (
+	"SELECT COUNT(*) FROM money WHERE (balance, id) >= (?, ?)"
+)
+
+
+class LedgerError(Exception):
+	"""Exception raised when a ledger file cannot be read."""
+
+
+class LedgerEntry:
+	"""
+	A single user's record in the ledger.
+
+	Attributes:
+		balance (int): The user's BeardlessBucks balance
+		name (str): The stringified version of the user
+
+	"""
+
+	def __init__(self, balance: int, name: str) -> None:
+		"""
+		Create a new LedgerEntry instance.
+
+		Args:
+			balance (int): The user's BeardlessBucks balance
+			name (str): The stringified version of the user
+
+		"""
+		self.balance = balance
+		self.name = name
+
+
+class RankIndex:
+	"""
+	Every user's ledger position, ordered by balance.
+
+	Keeps a sorted list of (balance, user id) pairs, so ties are broken in
+	favor of the larger user id. Finding a user's rank or the top k users
+	takes O(log n) and O(k) respectively; moving a user is an O(log n)
+	search plus a single memmove of the list, rather than the O(n log n)
+	sort that rendering the leaderboard used to take.
+
+	Attributes:
+		keys (list[tuple[int, int]]): (balance, user id) pairs, ascending
+
+	Methods:
+		add(user_id, balance):
+			Add a user to the index.
+		move(user_id, old_balance, new_balance):
+			Reposition a user whose balance changed.
+		top(k):
+			Return the ids and balances of the k richest users.
+		rank(user_id, balance):
+			Return a user's 1-indexed position, richest first.
+
+	"""
+
+	def __init__(self) -> None:
+		"""Create a new, empty RankIndex instance."""
+		self.keys: list[tuple[int, int]] = []
+
+	def __len__(self) -> int:
+		"""
+		Return the number of users in the index.
+
+		Returns:
+			int: The number of users in the index.
+
+		"""
+		return len(self.keys)
+
+	def add(self, user_id: int, balance: int) -> None:
+		"""
+		Add a user to the index.
+
+		Args:
+			user_id (int): The id of the user to add
+			balance (int): The user's balance
+
+		"""
+		insort(self.keys, (balance, user_id))
+
+	def move(self, user_id: int, old_balance: int, new_balance: int) -> None:
+		"""
+		Reposition a user whose balance changed.
+
+		Args:
+			user_id (int): The id of the user to move
+			old_balance (int): The balance the user is currently indexed at
+			new_balance (int): The user's new balance
+
+		"""
+		if old_balance != new_balance:
+			del self.keys[bisect_left(self.keys, (old_balance, user_id))]
+			insort(self.keys, (new_balance, user_id))
+
+	def top(self, k: int) -> list[tuple[int, int]]:
+		"""
+		Return the ids and balances of the k richest users.
+
+		Args:
+			k (int): The number of users to return
+
+		Returns:
+			list[tuple[int, int]]: (user id, balance) pairs, richest first.
+
+		"""
+		return [
+			(user_id, balance)
+			for balance, user_id in reversed(self.keys[max(len(self) - k, 0):])
+		]
+
+	def rank(self, user_id: int, balance: int) -> int:
+		"""
+		Return a user's 1-indexed position, richest first.
+
+		Args:
+			user_id (int): The id of the user to rank
+			balance (int): The balance the user is indexed at
+
+		Returns:
+			int: The user's position on the leaderboard.
+
+		"""
+		return len(self) - bisect_left(self.keys, (balance, user_id))
+
+
+def log_failure(job: Future[None]) -> None:
+	"""
+	Log the exception raised by a background I/O job, if any.
+
+	Args:
+		job (Future[None]): The finished job
+
+	"""
+	if not job.cancelled() and (error := job.exception()) is not None:
+		logger.error("Ledger I/O failed: %s", error)
+
+
+def encode_record(
+	user_id: int, delta: int, balance: int, name: str = "",
+) -> bytes:
+	"""
+	Encode a single balance change as a journal record.
+
+	Args:
+		user_id (int): The id of the user whose balance changed
+		delta (int): The change in the user's balance
+		balance (int): The user's balance after the change
+		name (str): The stringified version of the user, if it changed
+			(default is "")
+
+	Returns:
+		bytes: The encoded record, including its checksum.
+
+	"""
+	encoded_name = name.encode("UTF-8")
+	body = JournalRecord.pack(
+		user_id, delta, balance, time.time(), len(encoded_name),
+	) + encoded_name
+	return body + JournalCrc.pack(zlib.crc32(body))
+
+
+def decode_records(
+	data: bytes,
+) -> tuple[list[tuple[int, int, int, float, str]], int]:
+	"""
+	Decode every intact record in a journal.
+
+	Decoding stops at the first record that is cut short or fails its
+	checksum; that can only be the result of a crash mid-write, so nothing
+	after it was ever acknowledged. If that record belongs to a batch, the
+	whole batch is dropped with it.
+
+	Args:
+		data (bytes): The contents of a journal file, including JournalMagic
+
+	Returns:
+		tuple[list[tuple[int, int, int, float, str]], int]: A tuple of:
+			list: (user id, delta, balance, timestamp, name) per record
+			int: the offset just past the last intact record or batch
+
+	Raises:
+		LedgerError: If data does not start with JournalMagic.
+
+	"""
+	if JournalMagic.startswith(data):
+		# Crashed before even the magic was written; nothing to replay.
+		return [], 0
+	if not data.startswith(JournalMagic):
+		msg = "Journal does not start with " + JournalMagic.decode()
+		raise LedgerError(msg)
+	records: list[tuple[int, int, int, float, str]] = []
+	offset = committed = len(JournalMagic)
+	kept = owed = 0
+	while offset + JournalRecord.size <= len(data):
+		user_id, delta, balance, timestamp, name_len = (
+			JournalRecord.unpack_from(data, offset)
+		)
+		end = offset + JournalRecord.size + name_len
+		if end + JournalCrc.size > len(data):
+			break
+		(crc,) = JournalCrc.unpack_from(data, end)
+		if crc != zlib.crc32(data[offset:end]):
+			break
+		if user_id == BatchMarker:
+			owed = delta
+		else:
+			records.append((
+				user_id,
+				delta,
+				balance,
+				timestamp,
+				data[offset + JournalRecord.size:end].decode("UTF-8"),
+			))
+			owed = max(owed - 1, 0)
+		offset = end + JournalCrc.size
+		if not owed:
+			committed, kept = offset, len(records)
+	return records[:kept], committed
+
+
+def read_csv(path: Path) -> dict[int, LedgerEntry]:
+	"""
+	Read every user's record from a CSV snapshot.
+
+	Args:
+		path (Path): The CSV snapshot, one "id,balance,name" row per user
+
+	Returns:
+		dict[int, LedgerEntry]: Every user's record, by user id.
+
+	"""
+	entries: dict[int, LedgerEntry] = {}
+	with path.open("r", encoding="UTF-8") as f:
+		for row in csv.reader(f, delimiter=","):
+			if row:
+				entries[int(row[0])] = LedgerEntry(
+					int(row[1]), ",".join(row[2:]),
+				)
+	return entries
+
+
+def render_csv(entries: dict[int, LedgerEntry]) -> str:
+	"""
+	Render every user's record as a CSV snapshot.
+
+	Args:
+		entries (dict[int, LedgerEntry]): Every user's record, by user id
+
+	Returns:
+		str: One "id,balance,name" row per user.
+
+	"""
+	return "\n".join(
+		f"{user_id},{entry.balance},{entry.name}"
+		for user_id, entry in entries.items()
+	)
+
+
+def encode_snapshot(entries: dict[int, LedgerEntry]) -> bytes:
+	"""
+	Encode every user's record as a binary snapshot.
+
+	Args:
+		entries (dict[int, LedgerEntry]): Every user's record, by user id
+
+	Returns:
+		bytes: The snapshot, records sorted by user id.
+
+	"""
+	records: list[bytes] = []
+	names: list[bytes] = []
+	offset = 0
+	for user_id in sorted(entries):
+		entry = entries[user_id]
+		name = entry.name.encode("UTF-8")
+		records.append(
+			SnapshotRecord.pack(user_id, entry.balance, offset, len(name)),
+		)
+		names.append(name)
+		offset += len(name)
+	return b"".join((
+		SnapshotHeader.pack(SnapshotMagic, len(records)), *records, *names,
+	))
+
+
+def snapshot_len(data: Buffer) -> int:
+	"""
+	Check a binary snapshot's header and return its record count.
+
+	Args:
+		data (Buffer): The contents of a binary snapshot
+
+	Returns:
+		int: The number of records in the snapshot.
+
+	Raises:
+		LedgerError: If data is not a binary snapshot.
+
+	"""
+	if len(memoryview(data)) < SnapshotHeader.size:
+		msg = "Snapshot is too short to hold a header"
+		raise LedgerError(msg)
+	magic, count = SnapshotHeader.unpack_from(data)
+	if magic != SnapshotMagic:
+		msg = "Snapshot does not start with " + SnapshotMagic.decode()
+		raise LedgerError(msg)
+	assert isinstance(count, int)
+	return count
+
+
+def decode_snapshot(data: Buffer) -> dict[int, LedgerEntry]:
+	"""
+	Decode every user's record in a binary snapshot.
+
+	Args:
+		data (Buffer): The contents of a binary snapshot
+
+	Returns:
+		dict[int, LedgerEntry]: Every user's record, by user id.
+
+	Raises:
+		LedgerError: If data is not a binary snapshot.
+
+	"""
+	count = snapshot_len(data)
+	view = memoryview(data)
+	names = SnapshotHeader.size + count * SnapshotRecord.size
+	return {
+		user_id: LedgerEntry(
+			balance, str(view[names + offset:names + offset + length], "UTF-8"),
+		)
+		for user_id, balance, offset, length in SnapshotRecord.iter_unpack(
+			view[SnapshotHeader.size:names],
+		)
+	}
+
+
+def find_record(
+	data: Buffer, user_id: int, low: int = 0, high: int | None = None,
+) -> LedgerEntry | None:
+	"""
+	Binary search a binary snapshot for a single user's record.
+
+	Only the records compared against and the user's own name are read, so
+	data can be an mmap of a snapshot file of any size.
+
+	Args:
+		data (Buffer): The contents of a binary snapshot
+		user_id (int): The id of the user to look up
+		low (int): The index of the first record to search (default is 0)
+		high (int | None): The index just past the last record to search;
+			every record after low if None (default is None)
+
+	Returns:
+		LedgerEntry | None: The user's record if one exists; else, None.
+
+	Raises:
+		LedgerError: If data is not a binary snapshot.
+
+	"""
+	count = snapshot_len(data)
+	end = high = count if high is None else high
+	while low < high:
+		mid = (low + high) // 2
+		(mid_id,) = SnapshotId.unpack_from(
+			data, SnapshotHeader.size + mid * SnapshotRecord.size,
+		)
+		if mid_id < user_id:
+			low = mid + 1
+		else:
+			high = mid
+	if low == end:
+		return None
+	found_id, balance, offset, length = SnapshotRecord.unpack_from(
+		data, SnapshotHeader.size + low * SnapshotRecord.size,
+	)
+	if found_id != user_id:
+		return None
+	names = SnapshotHeader.size + count * SnapshotRecord.size + offset
+	return LedgerEntry(
+		balance, str(memoryview(data)[names:names + length], "UTF-8"),
+	)
+
+
+class SnapshotReader:
+	"""
+	Read-only, memory-mapped view of a binary snapshot file.
+
+	Only a sparse index of every FenceStride-th user id is read up front.
+	Each lookup bisects that index, binary searches the one block of mapped
+	records it points to, and decodes only the record it finds.
+
+	Attributes:
+		path (Path): The binary snapshot file
+
+	Methods:
+		find(user_id):
+			Return a user's record, if it is in the snapshot.
+		balances():
+			Yield every user's id and balance, in order of id.
+		records():
+			Yield every user's id and record, in order of id.
+		close():
+			Unmap the snapshot.
+
+	"""
+
+	def __init__(self, path: Path) -> None:
+		"""
+		Create a new SnapshotReader instance and map the snapshot.
+
+		Args:
+			path (Path): The binary snapshot file
+
+		Raises:
+			LedgerError: If path is not a binary snapshot.
+
+		"""
+		self.path = path
+		with path.open("rb") as f:
+			self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		self._len = snapshot_len(self._map)
+		self._names = SnapshotHeader.size + self._len * SnapshotRecord.size
+		self._fences = [
+			SnapshotId.unpack_from(
+				self._map, SnapshotHeader.size + i * SnapshotRecord.size,
+			)[0]
+			for i in range(0, self._len, FenceStride)
+		]
+
+	def __len__(self) -> int:
+		"""
+		Return the number of records in the snapshot.
+
+		Returns:
+			int: The number of records in the snapshot.
+
+		"""
+		return self._len
+
+	def find(self, user_id: int) -> LedgerEntry | None:
+		"""
+		Return a user's record, if it is in the snapshot.
+
+		Args:
+			user_id (int): The id of the user to look up
+
+		Returns:
+			LedgerEntry | None: The user's record if one exists; else, None.
+
+		"""
+		if (block := bisect_right(self._fences, user_id) - 1) < 0:
+			return None
+		return find_record(
+			self._map,
+			user_id,
+			block * FenceStride,
+			min((block + 1) * FenceStride, self._len),
+		)
+
+	def balances(self) -> Iterator[tuple[int, int]]:
+		"""
+		Yield every user's id and balance, in order of id.
+
+		Names are not decoded.
+
+		Yields:
+			tuple[int, int]: A user's id and balance.
+
+		"""
+		with memoryview(self._map) as view:
+			for user_id, balance, _, _ in SnapshotRecord.iter_unpack(
+				view[SnapshotHeader.size:self._names],
+			):
+				yield user_id, balance
+
+	def records(self) -> Iterator[tuple[int, LedgerEntry]]:
+		"""
+		Yield every user's id and record, in order of id.
+
+		Yields:
+			tuple[int, LedgerEntry]: A user's id and record.
+
+		"""
+		with memoryview(self._map) as view:
+			names = self._names
+			for user_id, balance, offset, length in SnapshotRecord.iter_unpack(
+				view[SnapshotHeader.size:names],
+			):
+				yield user_id, LedgerEntry(
+					balance,
+					str(view[names + offset:names + offset + length], "UTF-8"),
+				)
+
+	def close(self) -> None:
+		"""Unmap the snapshot."""
+		self._map.close()
+
+
+class LedgerBackend(ABC):
+	"""
+	Storage interface for the BeardlessBucks ledger.
+
+	bucks only ever talks to the ledger through these methods, so the storage
+	behind it can be swapped out; see open_ledger. FileLedger and
+	ShardedLedger serve reads and writes from memory without waiting on the
+	disk; anything that does wait on it runs on the backend's single I/O
+	thread, so the event loop never blocks on a file. SqliteLedger is the
+	exception: its queries and their commits run on the calling thread, so
+	it blocks the event loop for each read and write. Only its checkpoints
+	run on the I/O thread.
+
+	Methods:
+		get(user_id):
+			Return a user's record, if they are registered.
+		set(user_id, balance, name):
+			Create or update a user's record.
+		set_many(records):
+			Create or update many records at once.
+		adjust(user_id, delta, name, min_balance=0):
+			Atomically add delta to a registered user's balance.
+		apply(changes):
+			Atomically make a batch of adjustments.
+		transaction():
+			Return a Transaction that applies its changes on exit.
+		rename(user_id, name):
+			Note a user's new name without writing it.
+		flush_names():
+			Write every name noted by rename() in one batch.
+		top(k):
+			Return the records of the k richest users.
+		rank(user_id):
+			Return a user's 1-indexed position, richest first.
+		sync():
+			Make every change so far durable.
+		commit():
+			Wait until every change so far is durable.
+		close():
+			Make every change durable and release the backend's files.
+
+	"""
+
+	def __init__(self) -> None:
+		"""Start the backend's I/O thread."""
+		self._io = ThreadPoolExecutor(1, thread_name_prefix="ledger-io")
+		self._user_locks: dict[int, threading.Lock] = {}
+		self._renames: dict[int, str] = {}
+
+	@abstractmethod
+	def get(self, user_id: int) -> LedgerEntry | None:
+		"""
+		Return a user's record, if they are registered.
+
+		Args:
+			user_id (int): The id of the user to look up
+
+		Returns:
+			LedgerEntry | None: The user's record if one exists; else, None.
+
+		"""
+
+	@abstractmethod
+	def set(self, user_id: int, balance: int, name: str) -> None:
+		"""
+		Create or update a user's record.
+
+		Args:
+			user_id (int): The id of the user to update
+			balance (int): The user's new balance
+			name (str): The stringified version of the user
+
+		"""
+
+	def set_many(self, records: Iterable[tuple[int, int, str]]) -> None:
+		"""
+		Create or update many records at once.
+
+		Backends that can write the records as a single unit override this;
+		by default, each record is written on its own.
+
+		Args:
+			records (Iterable[tuple[int, int, str]]): (user id, balance, name)
+				for each record to write
+
+		"""
+		for user_id, balance, name in records:
+			self.set(user_id, balance, name)
+
+	def _user_lock(self, user_id: int) -> threading.Lock:
+		return self._user_locks.setdefault(user_id, threading.Lock())
+
+	def adjust(
+		self, user_id: int, delta: int, name: str, *, min_balance: int = 0,
+	) -> tuple[bool, int]:
+		"""
+		Atomically add delta to a registered user's balance.
+
+		The user's lock is held from the read to the write, so concurrent
+		adjustments to one user can neither interleave nor lose an update.
+
+		Args:
+			user_id (int): The id of the user to update
+			delta (int): The amount to change the user's balance by
+			name (str): The stringified version of the user
+			min_balance (int): The lowest balance the change may leave the
+				user with; if it would go lower, nothing changes
+				(default is 0)
+
+		Returns:
+			tuple[bool, int]: Whether the change was made, and the user's
+				balance afterwards.
+
+		Raises:
+			KeyError: If the user is not registered.
+
+		"""
+		with self._user_lock(user_id):
+			if (entry := self.get(user_id)) is None:
+				raise KeyError(user_id)
+			balance = entry.balance
+			if balance + delta < min_balance:
+				return False, balance
+			if delta:
+				self.set(user_id, balance + delta, name)
+			elif name != entry.name:
+				self.rename(user_id, name)
+			return True, balance + delta
+
+	def apply(
+		self, changes: list[tuple[int, int, str, int]],
+	) -> list[tuple[bool, int]]:
+		"""
+		Atomically make a batch of adjustments.
+
+		Every user in the batch is locked, in order of id so that two
+		batches can never deadlock, and the new balances are written with a
+		single set_many(). Each change is judged as adjust() would judge it,
+		against the balance left by the changes before it; a refused change
+		does not stop the rest of the batch.
+
+		Args:
+			changes (list[tuple[int, int, str, int]]): (user id, delta, name,
+				min balance) for each change, in the order to make them
+
+		Returns:
+			list[tuple[bool, int]]: Whether each change was made, and its
+				user's balance afterwards.
+
+		Raises:
+			KeyError: If any user is not registered, in which case nothing
+				changes.
+
+		"""
+		user_ids = sorted({change[0] for change in changes})
+		with ExitStack() as stack:
+			entries: dict[int, LedgerEntry] = {}
+			for user_id in user_ids:
+				stack.enter_context(self._user_lock(user_id))
+				if (entry := self.get(user_id)) is None:
+					raise KeyError(user_id)
+				entries[user_id] = entry
+			balances = {
+				user_id: entry.balance for user_id, entry in entries.items()
+			}
+			writes: dict[int, tuple[int, int, str]] = {}
+			results: list[tuple[bool, int]] = []
+			for user_id, delta, name, min_balance in changes:
+				balance = balances[user_id]
+				if balance + delta < min_balance:
+					results.append((False, balance))
+					continue
+				balances[user_id] = balance + delta
+				if delta or user_id in writes:
+					writes[user_id] = (user_id, balance + delta, name)
+				elif name != entries[user_id].name:
+					self.rename(user_id, name)
+				results.append((True, balance + delta))
+			if writes:
+				self.set_many(writes.values())
+			return results
+
+	def transaction(self) -> "Transaction":
+		"""
+		Return a Transaction that applies its changes on exit.
+
+		Returns:
+			Transaction: An empty transaction against this ledger.
+
+		"""
+		return Transaction(self)
+
+	def rename(self, user_id: int, name: str) -> None:
+		"""
+		Note a user's new name without writing it.
+
+		The name is kept in memory until flush_names(), or until the next
+		change to the user's balance, which writes it anyway.
+
+		Args:
+			user_id (int): The id of the user who was renamed
+			name (str): The new stringified version of the user
+
+		"""
+		self._renames[user_id] = name
+
+	def flush_names(self) -> int:
+		"""
+		Write every name noted by rename() in one batch.
+
+		Returns:
+			int: The number of names written.
+
+		"""
+		renames, self._renames = self._renames, {}
+		written = 0
+		for user_id, name in renames.items():
+			if (entry := self.get(user_id)) is not None and entry.name != name:
+				self.set(user_id, entry.balance, name)
+				written += 1
+		return written
+
+	@abstractmethod
+	def top(self, k: int) -> list[LedgerEntry]:
+		"""
+		Return the records of the k richest users.
+
+		Args:
+			k (int): The number of users to return
+
+		Returns:
+			list[LedgerEntry]: Up to k records, richest first.
+
+		"""
+
+	@abstractmethod
+	def rank(self, user_id: int) -> int | None:
+		"""
+		Return a user's 1-indexed position, richest first.
+
+		Args:
+			user_id (int): The id of the user to rank
+
+		Returns:
+			int | None: The user's position if they are registered;
+				else, None.
+
+		"""
+
+	@abstractmethod
+	def sync(self) -> None:
+		"""Make every change so far durable."""
+
+	async def commit(self) -> None:
+		"""Wait, on the I/O thread, until every change so far is durable."""
+		await asyncio.wrap_future(self._io.submit(self.sync))
+
+	@abstractmethod
+	def close(self) -> None:
+		"""Make every change durable and release the backend's files."""
+
+
+class Transaction:
+	"""
+	A batch of balance changes, applied together when its block exits.
+
+	Changes are only collected by add(); nothing is read or written until
+	the with block exits without an exception, at which point the whole
+	batch goes to LedgerBackend.apply(). If the block raises, the batch is
+	discarded.
+
+	Attributes:
+		ledger (LedgerBackend): The ledger to apply the changes to
+		changes (list[tuple[int, int, str, int]]): (user id, delta, name,
+			min balance) for each change added so far
+		results (list[tuple[bool, int]]): Whether each change was made, and
+			its user's balance afterwards; empty until the block exits
+
+	Methods:
+		add(user_id, delta, name, min_balance=0):
+			Add a change to the batch.
+
+	"""
+
+	def __init__(self, ledger: LedgerBackend) -> None:
+		"""
+		Create a new, empty Transaction.
+
+		Args:
+			ledger (LedgerBackend): The ledger to apply the changes to
+
+		"""
+		self.ledger = ledger
+		self.changes: list[tuple[int, int, str, int]] = []
+		self.results: list[tuple[bool, int]] = []
+
+	def __enter__(self) -> Self:
+		"""
+		Start collecting changes.
+
+		Returns:
+			Self: This transaction.
+
+		"""
+		return self
+
+	def __exit__(
+		self,
+		exc_type: type[BaseException] | None,
+		exc: BaseException | None,
+		tb: TracebackType | None,
+	) -> None:
+		"""Apply every change added, unless the block raised."""
+		if exc_type is None and self.changes:
+			self.results = self.ledger.apply(self.changes)
+
+	def add(
+		self, user_id: int, delta: int, name: str, *, min_balance: int = 0,
+	) -> None:
+		"""
+		Add a change to the batch.
+
+		Args:
+			user_id (int): The id of the user to update
+			delta (int): The amount to change the user's balance by
+			name (str): The stringified version of the user
+			min_balance (int): The lowest balance the change may leave the
+				user with; if it would go lower, that change is skipped
+				(default is 0)
+
+		"""
+		self.changes.append((user_id, delta, name, min_balance))
+
+
+class FileLedger(LedgerBackend):
+	"""
+	In-memory BeardlessBucks ledger backed by a snapshot and a journal.
+
+	A CSV snapshot is read once, on creation, into a dict keyed by user id;
+	every read after that is served from memory. A binary snapshot is
+	instead memory-mapped: reads are binary searches of the mapped records,
+	and only records changed since the snapshot was written are kept as
+	Python objects, in the same dict. The rank index is built on the first
+	leaderboard request rather than on load. Each change is appended to
+	a write-ahead journal as a fixed-format record instead of rewriting the
+	whole snapshot. Records are fsynced in batches: after fsync_every
+	unsynced records, or fsync_interval seconds after the last fsync,
+	whichever comes first. While an event loop is running, records are
+	instead group-committed: every change made within commit_window seconds
+	of the first unsynced one is written and fsynced together on the I/O
+	thread, and commands await commit() to learn when their changes are
+	durable; the event loop itself never touches the journal or snapshot.
+	On load, the journal is replayed on top of the snapshot, dropping a torn
+	final record if the bot crashed mid-write. Once the journal grows past
+	compact_threshold records, the current state is written to a temporary
+	file that atomically replaces the snapshot, and the journal is emptied.
+
+	Attributes:
+		path (Path): The snapshot; a .bin file holds a binary snapshot,
+			anything else a CSV snapshot, one "id,balance,name" row per user
+		binary (bool): Whether the snapshot is a binary snapshot
+		journal_path (Path): The append-only journal of changes
+		compact_threshold (int): Journal records allowed before compacting
+		fsync_every (int): Unsynced records allowed before an fsync
+		fsync_interval (float): Seconds allowed between fsyncs
+		commit_window (float): Seconds to collect changes for a group commit
+		entries (dict[int, LedgerEntry]): Every record changed since the
+			binary snapshot was mapped, by user id; for a CSV snapshot,
+			every user's record
+		snapshot (SnapshotReader | None): The mapped binary snapshot, if
+			there is one
+		ranks (RankIndex): Every user's position, ordered by balance
+
+	Methods:
+		load():
+			Read the snapshot, then replay the journal on top of it.
+		get(user_id):
+			Return a user's record, if they are registered.
+		records():
+			Yield every user's id and record.
+		set(user_id, balance, name):
+			Update a user's record and journal the change.
+		set_many(records):
+			Create or update many records as one journal batch.
+		adjust(user_id, delta, name, min_balance=0):
+			Atomically add delta to a registered user's balance.
+		sync():
+			Flush and fsync every journaled record.
+		commit():
+			Wait for the next group commit to make every change durable.
+		top(k):
+			Return the records of the k richest users.
+		rank(user_id):
+			Return a user's 1-indexed position, richest first.
+		compact():
+			Fold the journal back into the snapshot.
+		export_csv(path):
+			Write every user's record to a CSV snapshot.
+		close():
+			Write pending names, then compact the journal.
+
+	"""
+
+	def __init__(
+		self,
+		path: Path,
+		*,
+		compact_threshold: int = CompactThreshold,
+		fsync_every: int = FsyncEvery,
+		fsync_interval: float = FsyncInterval,
+		commit_window: float = CommitWindow,
+	) -> None:
+		"""
+		Create a new FileLedger instance and load it from disk.
+
+		Args:
+			path (Path): The snapshot to load
+			compact_threshold (int): Journal records allowed before
+				compacting (default is CompactThreshold)
+			fsync_every (int): Unsynced records allowed before an fsync
+				(default is FsyncEvery)
+			fsync_interval (float): Seconds allowed between fsyncs
+				(default is FsyncInterval)
+			commit_window (float): Seconds to collect changes for a group
+				commit (default is CommitWindow)
+
+		"""
+		self.path = path
+		self.binary = path.suffix == ".bin"
+		self.journal_path = path.with_suffix(".journal")
+		self.compact_threshold = compact_threshold
+		self.fsync_every = fsync_every
+		self.fsync_interval = fsync_interval
+		self.commit_window = commit_window
+		self.entries: dict[int, LedgerEntry] = {}
+		self.snapshot: SnapshotReader | None = None
+		self._ranks: RankIndex | None = None
+		self._journal: BinaryIO | None = None
+		self._journal_len = 0
+		self._unsynced = 0
+		self._last_sync = time.monotonic()
+		self._pending: list[bytes] = []
+		self._in_flight: asyncio.Future[None] | None = None
+		self._commit_loop: asyncio.AbstractEventLoop | None = None
+		self._commit_handle: asyncio.TimerHandle | None = None
+		self._waiters: list[asyncio.Future[None]] = []
+		# Guards entries, ranks, and the order of journal records.
+		self._lock = threading.Lock()
+		super().__init__()
+		self.load()
+
+	def load(self) -> None:
+		"""
+		Read the snapshot, then replay the journal on top of it.
+
+		If a binary snapshot does not exist yet, but a CSV snapshot of the
+		same name does, the CSV is imported and compacted into it; the CSV
+		itself is left as it was.
+		"""
+		self.entries = {}
+		self._ranks = None
+		if self.snapshot is not None:
+			self.snapshot.close()
+			self.snapshot = None
+		imported = False
+		if not self.binary:
+			if self.path.exists():
+				self.entries = read_csv(self.path)
+		elif self.path.exists():
+			self.snapshot = SnapshotReader(self.path)
+		elif (csv_path := self.path.with_suffix(".csv")).exists():
+			logger.info("Importing %s into %s.", csv_path, self.path)
+			self.entries = read_csv(csv_path)
+			imported = True
+		self._journal_len = self._replay()
+		logger.info(
+			"Loaded %i ledger entries, replayed %i journal records.",
+			len(self),
+			self._journal_len,
+		)
+		if imported:
+			self.compact()
+
+	def _replay(self) -> int:
+		if not self.journal_path.exists():
+			return 0
+		data = self.journal_path.read_bytes()
+		records, end = decode_records(data)
+		if end != len(data):
+			logger.warning(
+				"Dropped %i bytes of torn journal records.", len(data) - end,
+			)
+			with self.journal_path.open("r+b") as f:
+				f.truncate(end)
+		for user_id, _, balance, _, name in records:
+			entry = self.get(user_id)
+			self.entries[user_id] = LedgerEntry(
+				balance, name or (entry.name if entry is not None else ""),
+			)
+		return len(records)
+
+	def __len__(self) -> int:
+		"""
+		Return the number of registered users.
+
+		Returns:
+			int: The number of registered users.
+
+		"""
+		if self._ranks is not None:
+			return len(self._ranks)
+		if self.snapshot is None:
+			return len(self.entries)
+		snapshot = self.snapshot
+		return len(snapshot) + sum(
+			snapshot.find(user_id) is None for user_id in self.entries
+		)
+
+	@property
+	def ranks(self) -> RankIndex:
+		"""
+		Every user's position, ordered by balance.
+
+		Built from every record the first time it is needed, then kept up to
+		date by set().
+		"""
+		if self._ranks is None:
+			keys = [
+				(entry.balance, user_id)
+				for user_id, entry in self.entries.items()
+			]
+			if self.snapshot is not None:
+				keys.extend(
+					(balance, user_id)
+					for user_id, balance in self.snapshot.balances()
+					if user_id not in self.entries
+				)
+			self._ranks = RankIndex()
+			self._ranks.keys = sorted(keys)
+		return self._ranks
+
+	@override
+	def get(self, user_id: int) -> LedgerEntry | None:
+		if (entry := self.entries.get(user_id)) is not None:
+			return entry
+		return None if self.snapshot is None else self.snapshot.find(user_id)
+
+	def records(self) -> Iterator[tuple[int, LedgerEntry]]:
+		"""
+		Yield every user's id and record.
+
+		Yields:
+			tuple[int, LedgerEntry]: A user's id and record.
+
+		"""
+		yield from self.entries.items()
+		if self.snapshot is not None:
+			for user_id, entry in self.snapshot.records():
+				if user_id not in self.entries:
+					yield user_id, entry
+
+	@override
+	def set(self, user_id: int, balance: int, name: str) -> None:
+		with self._lock:
+			self._append(self._change(user_id, balance, name))
+			if self._journal_len >= self.compact_threshold:
+				self.compact()
+
+	@override
+	def set_many(self, records: Iterable[tuple[int, int, str]]) -> None:
+		"""
+		Create or update many records as one journal batch.
+
+		The records are preceded in the journal by a batch header and
+		written in a single append, so they reach the disk in one fsync,
+		and a crash part-way through the write loses all of them rather
+		than some.
+
+		Args:
+			records (Iterable[tuple[int, int, str]]): (user id, balance, name)
+				for each record to write
+
+		"""
+		with self._lock:
+			batch = [self._change(*record) for record in records]
+			if len(batch) > 1:
+				batch.insert(0, encode_record(BatchMarker, len(batch), 0))
+			self._append(b"".join(batch), len(batch))
+			if self._journal_len >= self.compact_threshold:
+				self.compact()
+
+	def _change(self, user_id: int, balance: int, name: str) -> bytes:
+		# Called with self._lock held; returns the journal record to append.
+		assert "," not in name
+		self._renames.pop(user_id, None)
+		if (entry := self.get(user_id)) is None:
+			if self._ranks is not None:
+				self._ranks.add(user_id, balance)
+			record = encode_record(user_id, balance, balance, name)
+		else:
+			if self._ranks is not None:
+				self._ranks.move(user_id, entry.balance, balance)
+			record = encode_record(
+				user_id,
+				balance - entry.balance,
+				balance,
+				name if name != entry.name else "",
+			)
+		self.entries[user_id] = LedgerEntry(balance, name)
+		return record
+
+	@override
+	def top(self, k: int) -> list[LedgerEntry]:
+		top: list[LedgerEntry] = []
+		for user_id, _ in self.ranks.top(k):
+			entry = self.get(user_id)
+			assert entry is not None
+			top.append(entry)
+		return top
+
+	@override
+	def rank(self, user_id: int) -> int | None:
+		if (entry := self.get(user_id)) is None:
+			return None
+		return self.ranks.rank(user_id, entry.balance)
+
+	def _append(self, record: bytes, count: int = 1) -> None:
+		self._journal_len += count
+		try:
+			loop = asyncio.get_running_loop()
+		except RuntimeError:
+			self._unsynced += 1
+			fsync = (
+				self._unsynced >= self.fsync_every
+				or time.monotonic() - self._last_sync >= self.fsync_interval
+			)
+			self._io.submit(self._write, [record], fsync=fsync).result()
+			if fsync:
+				self._unsynced = 0
+				self._last_sync = time.monotonic()
+		else:
+			self._pending.append(record)
+			self._schedule_commit(loop)
+
+	def _schedule_commit(self, loop: asyncio.AbstractEventLoop) -> None:
+		if self._commit_handle is None or self._commit_loop is not loop:
+			self._commit_loop = loop
+			self._commit_handle = loop.call_later(
+				self.commit_window, self._group_commit,
+			)
+
+	def _group_commit(self) -> None:
+		if self._commit_handle is not None:
+			self._commit_handle.cancel()
+			self._commit_handle = None
+		records, self._pending = self._pending, []
+		waiters, self._waiters = self._waiters, []
+		job = self._io.submit(self._write, records, fsync=True)
+		self._track(job).add_done_callback(partial(self._settle, waiters))
+
+	def _track(self, job: Future[None]) -> asyncio.Future[None]:
+		job.add_done_callback(log_failure)
+		self._in_flight = asyncio.wrap_future(job)
+		self._in_flight.add_done_callback(self._untrack)
+		return self._in_flight
+
+	def _untrack(self, done: asyncio.Future[None]) -> None:
+		if self._in_flight is done:
+			self._in_flight = None
+
+	@staticmethod
+	def _settle(
+		waiters: list[asyncio.Future[None]], done: asyncio.Future[None],
+	) -> None:
+		error = done.exception()
+		for waiter in waiters:
+			if waiter.done():
+				continue
+			if error is None:
+				waiter.set_result(None)
+			else:
+				waiter.set_exception(error)
+
+	def _write(self, records: list[bytes], *, fsync: bool) -> None:
+		# Only ever called on the I/O thread, which owns the journal file.
+		if records:
+			if self._journal is None:
+				self._journal = self.journal_path.open("ab")
+				if self._journal.tell() == 0:
+					self._journal.write(JournalMagic)
+			self._journal.write(b"".join(records))
+		if fsync and self._journal is not None:
+			self._journal.flush()
+			os.fsync(self._journal.fileno())
+
+	def _write_snapshot(self, snapshot: bytes) -> None:
+		# Only ever called on the I/O thread, after every journal write
+		# queued before it, as the thread runs its jobs in order.
+		tmp_path = self.path.with_suffix(".tmp")
+		with tmp_path.open("wb") as f:
+			f.write(snapshot)
+			f.flush()
+			os.fsync(f.fileno())
+		tmp_path.replace(self.path)
+		if self._journal is not None:
+			self._journal.close()
+			self._journal = None
+		self.journal_path.unlink(missing_ok=True)
+
+	@override
+	def sync(self) -> None:
+		"""
+		Flush and fsync every journaled record.
+
+		Blocks until the I/O thread has finished; commands running on the
+		event loop should await commit() instead.
+		"""
+		records, self._pending = self._pending, []
+		self._io.submit(self._write, records, fsync=True).result()
+		self._unsynced = 0
+		self._last_sync = time.monotonic()
+
+	@override
+	async def commit(self) -> None:
+		"""
+		Wait for the next group commit to make every change durable.
+
+		Returns immediately if there is nothing left to fsync.
+		"""
+		if self._pending:
+			loop = asyncio.get_running_loop()
+			waiter = loop.create_future()
+			self._waiters.append(waiter)
+			self._schedule_commit(loop)
+			await waiter
+		elif self._in_flight is not None:
+			await asyncio.shield(self._in_flight)
+
+	def compact(self) -> None:
+		"""
+		Fold the journal back into the snapshot.
+
+		The new snapshot is fsynced under a temporary name, then renamed over
+		the old one, so a crash at any point leaves either the old snapshot
+		and its journal or the new snapshot intact. Replaying a journal onto
+		a snapshot that already includes it is harmless, as each record holds
+		the resulting balance rather than just the delta.
+
+		The snapshot is rendered from memory right away, but written by the
+		I/O thread; while an event loop is running, compact() returns
+		without waiting for it, and the next commit() waits instead. Once
+		a binary snapshot is written, it is mapped in place of the old one,
+		and every record folded into it is dropped from entries, unless it
+		has changed again since.
+		"""
+		entries = dict(self.records())
+		snapshot = (
+			encode_snapshot(entries) if self.binary
+			else render_csv(entries).encode("UTF-8")
+		)
+		self._journal_len = 0
+		try:
+			asyncio.get_running_loop()
+		except RuntimeError:
+			self.sync()
+			self._io.submit(self._write_snapshot, snapshot).result()
+			if self.binary:
+				self._remap(self.entries)
+		else:
+			self._group_commit()
+			job = self._track(self._io.submit(self._write_snapshot, snapshot))
+			if self.binary:
+				job.add_done_callback(
+					partial(self._remap_when_written, dict(self.entries)),
+				)
+
+	def _remap(self, folded: dict[int, LedgerEntry]) -> None:
+		# Called with self._lock held, or with nothing else changing
+		# records: map the snapshot just written, then drop each record
+		# folded into it that is still the current one.
+		if self.snapshot is not None:
+			self.snapshot.close()
+		self.snapshot = SnapshotReader(self.path)
+		self.entries = {
+			user_id: entry for user_id, entry in self.entries.items()
+			if folded.get(user_id) is not entry
+		}
+
+	def _remap_when_written(
+		self, folded: dict[int, LedgerEntry], done: asyncio.Future[None],
+	) -> None:
+		# Runs on the event loop once a background compaction is written;
+		# a failed write is logged by _track and leaves the old snapshot.
+		if not done.cancelled() and done.exception() is None:
+			with self._lock:
+				self._remap(folded)
+
+	def export_csv(self, path: Path) -> None:
+		"""
+		Write every user's record to a CSV snapshot.
+
+		Args:
+			path (Path): The file to write, one "id,balance,name" row per
+				user
+
+		"""
+		tmp_path = path.with_suffix(".tmp")
+		tmp_path.write_text(
+			render_csv(dict(self.records())), encoding="UTF-8",
+		)
+		tmp_path.replace(path)
+
+	@override
+	def close(self) -> None:
+		"""Write pending names, then compact the journal."""
+		self.flush_names()
+		self.compact()
+
+
+class SqliteLedger(LedgerBackend):
+	"""
+	BeardlessBucks ledger stored in an SQLite database.
+
+	The database runs in WAL mode, so reads never wait on writes, and keeps
+	an index on (balance, id), so the leaderboard is read off the index
+	instead of the whole table. Every statement is a module-level constant,
+	which lets sqlite3 reuse its prepared form from the connection's
+	statement cache. Nothing is held in memory; records are read on demand.
+
+	Unlike the other backends, every query, and the commit of every write,
+	runs on the calling thread, so each one blocks the event loop until
+	SQLite returns. With WAL and synchronous=NORMAL, a commit waits on the
+	WAL write but not on an fsync. Checkpoints, which do fsync, run on the
+	I/O thread, at most once every checkpoint_interval seconds and on
+	close().
+
+	Attributes:
+		path (Path): The database file
+		checkpoint_interval (float): Seconds allowed between checkpoints
+
+	Methods:
+		get(user_id):
+			Return a user's record, if they are registered.
+		set(user_id, balance, name):
+			Create or update a user's record.
+		set_many(records):
+			Create or update many records in a single transaction.
+		adjust(user_id, delta, name, min_balance=0):
+			Atomically add delta to a registered user's balance.
+		top(k):
+			Return the records of the k richest users.
+		rank(user_id):
+			Return a user's 1-indexed position, richest first.
+		sync():
+			Checkpoint the WAL into the database file.
+		commit():
+			Start a checkpoint if checkpoint_interval has passed.
+		close():
+			Write pending names, then checkpoint and close the database.
+
+	"""
+
+	def __init__(
+		self, path: Path, *, checkpoint_interval: float = CheckpointInterval,
+	) -> None:
+		"""
+		Create a new SqliteLedger instance, creating the database if needed.
+
+		Args:
+			path (Path): The database file
+			checkpoint_interval (float): Seconds allowed between checkpoints
+				(default is CheckpointInterval)
+
+		"""
+		super().__init__()
+		self.path = path
+		self.checkpoint_interval = checkpoint_interval
+		self._last_checkpoint = time.monotonic()
+		self._conn = sqlite3.connect(path, isolation_level=None)
+		self._conn.execute("PRAGMA journal_mode=WAL")
+		self._conn.execute("PRAGMA synchronous=NORMAL")
+		self._conn.execute(SqlCreateTable)
+		self._conn.execute(SqlCreateIndex)
+		# Checkpoints run on the I/O thread through their own connection, so
+		# they never hold the lock on the one commands read and write with.
+		self._checkpoints = sqlite3.connect(
+			path, isolation_level=None, check_same_thread=False,
+		)
+
+	@override
+	def get(self, user_id: int) -> LedgerEntry | None:
+		row = self._conn.execute(SqlGet, (user_id,)).fetchone()
+		return None if row is None else LedgerEntry(row[0], row[1])
+
+	@override
+	def set(self, user_id: int, balance: int, name: str) -> None:
+		self._renames.pop(user_id, None)
+		self._conn.execute(SqlSet, (user_id, balance, name))
+
+	@override
+	def set_many(self, records: Iterable[tuple[int, int, str]]) -> None:
+		"""
+		Create or update many records in a single transaction.
+
+		Args:
+			records (Iterable[tuple[int, int, str]]): (user id, balance, name)
+				for each record to write
+
+		"""
+		records = list(records)
+		for user_id, _, _ in records:
+			self._renames.pop(user_id, None)
+		with self._conn:
+			self._conn.execute("BEGIN")
+			self._conn.executemany(SqlSet, records)
+
+	@override
+	def adjust(
+		self, user_id: int, delta: int, name: str, *, min_balance: int = 0,
+	) -> tuple[bool, int]:
+		if not delta:
+			# Nothing to write; any new name waits for flush_names().
+			return super().adjust(user_id, delta, name, min_balance=min_balance)
+		row = self._conn.execute(SqlAdjust, {
+			"delta": delta,
+			"name": name,
+			"id": user_id,
+			"min_balance": min_balance,
+		}).fetchone()
+		if row is not None:
+			assert isinstance(row[0], int)
+			self._renames.pop(user_id, None)
+			return True, row[0]
+		if (entry := self.get(user_id)) is None:
+			raise KeyError(user_id)
+		return False, entry.balance
+
+	@override
+	def top(self, k: int) -> list[LedgerEntry]:
+		return [
+			LedgerEntry(balance, name)
+			for balance, name in self._conn.execute(SqlTop, (k,))
+		]
+
+	@override
+	def rank(self, user_id: int) -> int | None:
+		if (entry := self.get(user_id)) is None:
+			return None
+		row = self._conn.execute(SqlRank, (entry.balance, user_id)).fetchone()
+		assert isinstance(row[0], int)
+		return row[0]
+
+	@override
+	def sync(self) -> None:
+		"""Checkpoint the WAL into the database file."""
+		self._checkpoints.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+	@override
+	async def commit(self) -> None:
+		"""
+		Start a checkpoint if checkpoint_interval has passed.
+
+		Every write is already in the WAL by the time it returns, so there
+		is nothing to wait for; the checkpoint runs on the I/O thread while
+		the command carries on.
+		"""
+		if time.monotonic() - self._last_checkpoint >= self.checkpoint_interval:
+			self._last_checkpoint = time.monotonic()
+			self._io.submit(self.sync).add_done_callback(log_failure)
+
+	@override
+	def close(self) -> None:
+		"""Write pending names, then checkpoint and close the database."""
+		self.flush_names()
+		self._io.shutdown()
+		self._checkpoints.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+		self._checkpoints.close()
+		self._conn.close()
+
+
+def shard_index(user_id: int, shards: int) -> int:
+	"""
+	Pick the shard a user's record belongs in.
+
+	Discord ids are snowflakes, whose low bits count up within a
+	millisecond, so the id is scrambled with a multiplicative (Fibonacci)
+	hash before being mapped onto range(shards).
+
+	Args:
+		user_id (int): The id of the user
+		shards (int): The number of shards
+
+	Returns:
+		int: The index of the user's shard.
+
+	"""
+	hashed = (user_id * ShardHashMultiplier) & 0xFFFFFFFFFFFFFFFF
+	return (hashed * shards) >> 64
+
+
+def shard_path(path: Path, index: int) -> Path:
+	"""
+	Name the snapshot of one shard after the unsharded snapshot.
+
+	Args:
+		path (Path): The unsharded snapshot, such as resources/money.bin
+		index (int): The index of the shard
+
+	Returns:
+		Path: The shard's snapshot, such as resources/money.0.bin.
+
+	"""
+	return path.with_name(f"{path.stem}.{index}{path.suffix}")
+
+
+def shard_count(path: Path) -> int:
+	"""
+	Read how many shards an unsharded snapshot has been split into.
+
+	Args:
+		path (Path): The unsharded snapshot, such as resources/money.bin
+
+	Returns:
+		int: The count held by the snapshot's manifest, such as
+			resources/money.shards, or 1 if it has not been split.
+
+	Raises:
+		LedgerError: If the manifest does not hold a shard count.
+
+	"""
+	manifest = path.with_suffix(".shards")
+	if not manifest.exists():
+		return 1
+	count = manifest.read_text(encoding="UTF-8").strip()
+	if not count.isdecimal() or int(count) <= 1:
+		msg = f"{manifest} does not hold a shard count."
+		raise LedgerError(msg)
+	return int(count)
+
+
+def merge_shards(path: Path) -> int:
+	"""
+	Merge a sharded FileLedger back into its unsharded snapshot.
+
+	The snapshot is rewritten before the manifest is removed, so a crash
+	partway through leaves the shards in charge, and the next call merges
+	them again.
+
+	Args:
+		path (Path): The unsharded snapshot, such as resources/money.bin
+
+	Returns:
+		int: The number of shards merged; 1 if path was not split.
+
+	"""
+	if (count := shard_count(path)) == 1:
+		return 1
+	merged: dict[int, LedgerEntry] = {}
+	for index in range(count):
+		shard = FileLedger(shard_path(path, index))
+		shard.close()
+		merged.update(shard.records())
+	# Anything still journaled against the snapshot predates the split.
+	path.with_suffix(".journal").unlink(missing_ok=True)
+	_write_snapshot(path, merged)
+	path.with_suffix(".shards").unlink()
+	_remove_shards(path)
+	logger.info("Merged %i shards into %s.", count, path)
+	return count
+
+
+def _write_snapshot(path: Path, entries: dict[int, LedgerEntry]) -> None:
+	tmp_path = path.with_suffix(".tmp")
+	with tmp_path.open("wb") as f:
+		f.write(
+			encode_snapshot(entries) if path.suffix == ".bin"
+			else render_csv(entries).encode("UTF-8"),
+		)
+		f.flush()
+		os.fsync(f.fileno())
+	tmp_path.replace(path)
+
+
+def _write_manifest(path: Path, count: int) -> None:
+	manifest = path.with_suffix(".shards")
+	tmp_path = manifest.with_suffix(".shards.tmp")
+	with tmp_path.open("w", encoding="UTF-8") as f:
+		f.write(f"{count}\n")
+		f.flush()
+		os.fsync(f.fileno())
+	tmp_path.replace(manifest)
+
+
+def _remove_shards(path: Path) -> None:
+	# Shards are named stem.index.suffix, as are their journals.
+	prefix = f"{path.stem}."
+	for stale in path.parent.iterdir():
+		if (
+			stale.name.startswith(prefix)
+			and stale.name.removeprefix(prefix).split(".")[0].isdecimal()
+		):
+			stale.unlink()
+
+
+class ShardedLedger(LedgerBackend):
+	"""
+	BeardlessBucks ledger split across FileLedger shards by user id.
+
+	Each shard has its own snapshot, journal, lock, and I/O thread, so
+	changes to users in different shards never wait on one another, and
+	each compaction only rewrites one shard's share of the ledger. The
+	leaderboard merges each shard's top k, and a user's position is the
+	sum of their position in every shard.
+
+	The first time the shards are opened, any existing unsharded snapshot
+	of the same name is split between them and then left as it was. The
+	shard count is then written to a manifest, such as money.shards, which
+	is what marks the split as finished. If the ledger is later opened with
+	a different count, the old shards are merged back into the unsharded
+	snapshot and split again.
+
+	Attributes:
+		path (Path): The unsharded snapshot the shards are named after
+		shards (list[FileLedger]): Every shard, by index
+
+	Methods:
+		shard(user_id):
+			Return the shard a user's record belongs in.
+		get(user_id):
+			Return a user's record, if they are registered.
+		set(user_id, balance, name):
+			Create or update a user's record.
+		set_many(records):
+			Create or update many records, as one batch per shard.
+		adjust(user_id, delta, name, min_balance=0):
+			Atomically add delta to a registered user's balance.
+		rename(user_id, name):
+			Note a user's new name without writing it.
+		flush_names():
+			Write every name noted by rename() in one batch.
+		top(k):
+			Return the records of the k richest users.
+		rank(user_id):
+			Return a user's 1-indexed position, richest first.
+		sync():
+			Flush and fsync every shard's journal.
+		commit():
+			Wait for every shard's group commit.
+		close():
+			Write pending names and compact every shard.
+
+	"""
+
+	def __init__(self, path: Path, shards: int) -> None:
+		"""
+		Create a new ShardedLedger instance and load every shard.
+
+		Args:
+			path (Path): The unsharded snapshot to name the shards after
+			shards (int): The number of shards
+
+		"""
+		super().__init__()
+		self.path = path
+		paths = [shard_path(path, i) for i in range(shards)]
+		if shard_count(path) not in {1, shards}:
+			merge_shards(path)
+		if shard_count(path) == 1:
+			self._split(paths)
+		self.shards = [FileLedger(shard) for shard in paths]
+
+	def _split(self, paths: list[Path]) -> None:
+		# Without a manifest, any shard files are left from a split or a
+		# merge that never finished, and the unsharded snapshot is current.
+		_remove_shards(self.path)
+		if self.path.exists() or self.path.with_suffix(".csv").exists():
+			source = FileLedger(self.path)
+			source.close()
+			groups: list[dict[int, LedgerEntry]] = [{} for _ in paths]
+			for user_id, entry in source.records():
+				groups[shard_index(user_id, len(paths))][user_id] = entry
+			for path, group in zip(paths, groups, strict=True):
+				_write_snapshot(path, group)
+			logger.info("Split %s into %i shards.", self.path, len(paths))
+		_write_manifest(self.path, len(paths))
+
+	def __len__(self) -> int:
+		"""
+		Return the number of registered users.
+
+		Returns:
+			int: The number of registered users.
+
+		"""
+		return sum(len(shard) for shard in self.shards)
+
+	def shard(self, user_id: int) -> FileLedger:
+		"""
+		Return the shard a user's record belongs in.
+
+		Args:
+			user_id (int): The id of the user
+
+		Returns:
+			FileLedger: The user's shard.
+
+		"""
+		return self.shards[shard_index(user_id, len(self.shards))]
+
+	@override
+	def get(self, user_id: int) -> LedgerEntry | None:
+		return self.shard(user_id).get(user_id)
+
+	@override
+	def set(self, user_id: int, balance: int, name: str) -> None:
+		self.shard(user_id).set(user_id, balance, name)
+
+	@override
+	def set_many(self, records: Iterable[tuple[int, int, str]]) -> None:
+		"""
+		Create or update many records, as one batch per shard.
+
+		Each shard writes its share of the records as a single journal
+		batch, but a crash can still land between two shards' batches.
+
+		Args:
+			records (Iterable[tuple[int, int, str]]): (user id, balance, name)
+				for each record to write
+
+		"""
+		groups: dict[int, list[tuple[int, int, str]]] = {}
+		for record in records:
+			groups.setdefault(
+				shard_index(record[0], len(self.shards)), [],
+			).append(record)
+		for index, group in groups.items():
+			self.shards[index].set_many(group)
+
+	@override
+	def _user_lock(self, user_id: int) -> threading.Lock:
+		# Share the shard's lock, so that a batch excludes shard.adjust().
+		return self.shard(user_id)._user_lock(user_id)  # noqa: SLF001
+
+	@override
+	def adjust(
+		self, user_id: int, delta: int, name: str, *, min_balance: int = 0,
+	) -> tuple[bool, int]:
+		return self.shard(user_id).adjust(
+			user_id, delta, name, min_balance=min_balance,
+		)
+
+	@override
+	def rename(self, user_id: int, name: str) -> None:
+		self.shard(user_id).rename(user_id, name)
+
+	@override
+	def flush_names(self) -> int:
+		return sum(shard.flush_names() for shard in self.shards)
+
+	@override
+	def top(self, k: int) -> list[LedgerEntry]:
+		merged = heapq.merge(
+			*(shard.ranks.top(k) for shard in self.shards),
+			key=lambda pair: (pair[1], pair[0]),
+			reverse=True,
+		)
+		top: list[LedgerEntry] = []
+		for user_id, _ in islice(merged, k):
+			entry = self.get(user_id)
+			assert entry is not None
+			top.append(entry)
+		return top
+
+	@override
+	def rank(self, user_id: int) -> int | None:
+		if (entry := self.get(user_id)) is None:
+			return None
+		# Every other shard counts only the users ahead of this one.
+		return sum(
+			shard.ranks.rank(user_id, entry.balance) for shard in self.shards
+		)
+
+	@override
+	def sync(self) -> None:
+		"""Flush and fsync every shard's journal."""
+		for shard in self.shards:
+			shard.sync()
+
+	@override
+	async def commit(self) -> None:
+		"""Wait for every shard's group commit."""
+		await asyncio.gather(*(shard.commit() for shard in self.shards))
+
+	@override
+	def close(self) -> None:
+		"""Write pending names and compact every shard."""
+		for shard in self.shards:
+			shard.close()
+
+
+def open_ledger(path: Path, shards: int = 1) -> LedgerBackend:
+	"""
+	Open the ledger backend that suits a given file.
+
+	Args:
+		path (Path): The ledger file; .db and .sqlite files are opened with
+			SqliteLedger, anything else, such as a .bin or .csv snapshot,
+			with FileLedger
+		shards (int): The number of shards to split a FileLedger into; if
+			more than 1, a ShardedLedger is opened instead, and if 1, any
+			shards path was split into are merged back (default is 1)
+
+	Returns:
+		LedgerBackend: The opened ledger.
+
+	"""
+	if path.suffix in {".db", ".sqlite"}:
+		return SqliteLedger(path)
+	if shards > 1:
+		return ShardedLedger(path, shards)
+	merge_shards(path)
+	return FileLedger(path)
+
+
+def migrate_to_sqlite(snapshot_path: Path, db_path: Path) -> int:
+	"""
+	Copy every record from a FileLedger into a new SqliteLedger.
+
+	The snapshot's journal is replayed first, so nothing acknowledged since
+	the last compaction is lost.
+
+	Args:
+		snapshot_path (Path): The FileLedger snapshot to migrate from
+		db_path (Path): The SQLite database to create
+
+	Returns:
+		int: The number of records migrated.
+
+	Raises:
+		FileExistsError: If db_path already exists.
+
+	"""
+	if db_path.exists():
+		raise FileExistsError(db_path)
+	source = FileLedger(snapshot_path)
+	target = SqliteLedger(db_path)
+	target.set_many(
+		(user_id, entry.balance, entry.name)
+		for user_id, entry in source.records()
+	)
+	target.close()
+	return len(source)
+
+
+def benchmark(
+	backend: LedgerBackend, user_ids: list[int], ops: int = 10000,
+) -> dict[str, float]:
+	"""
+	Time each LedgerBackend operation against a populated backend.
+
+	Args:
+		backend (LedgerBackend): The backend to time
+		user_ids (list[int]): Ids of users already registered in backend
+		ops (int): Calls to make per operation (default is 10000)
+
+	Returns:
+		dict[str, float]: Mean microseconds per call, by operation.
+
+	"""
+	rng = random.Random(0)
+	sample = [rng.choice(user_ids) for _ in range(ops)]
+	results: dict[str, float] = {}
+	start = time.perf_counter()
+	for user_id in sample:
+		backend.get(user_id)
+	results["get"] = time.perf_counter() - start
+	start = time.perf_counter()
+	for user_id in sample:
+		backend.set(user_id, rng.randint(0, 100000), f"user{user_id}#0")
+	backend.sync()
+	results["set"] = time.perf_counter() - start
+	start = time.perf_counter()
+	for _ in range(ops):
+		backend.top(10)
+	results["top"] = time.perf_counter() - start
+	start = time.perf_counter()
+	for user_id in sample:
+		backend.rank(user_id)
+	results["rank"] = time.perf_counter() - start
+	return {op: elapsed / ops * 1e6 for op, elapsed in results.items()}
+
+
+def main(argv: list[str] | None = None) -> None:
+	"""
+	Ledger maintenance command line.
+
+	python ledger.py migrate [snapshot] [db]
+		Copy resources/money.bin into a new resources/money.db.
+	python ledger.py export [snapshot] [csv]
+		Export resources/money.bin to resources/money.csv.
+	python ledger.py bench [users] [ops]
+		Compare the CSV and binary FileLedger snapshots and SqliteLedger on
+		a synthetic ledger.
+
+	Args:
+		argv (list[str] | None): Arguments to parse; sys.argv if None
+			(default is None)
+
+	"""
+	parser = argparse.ArgumentParser(description="BeardlessBucks ledger tools")
+	sub = parser.add_subparsers(dest="command", required=True)
+	migrate = sub.add_parser("migrate", help="copy a FileLedger into SQLite")
+	migrate.add_argument(
+		"snapshot", nargs="?", type=Path, default=Path("resources/money.bin"),
+	)
+	migrate.add_argument(
+		"db", nargs="?", type=Path, default=Path("resources/money.db"),
+	)
+	export = sub.add_parser("export", help="export a FileLedger to CSV")
+	export.add_argument(
+		"snapshot", nargs="?", type=Path, default=Path("resources/money.bin"),
+	)
+	export.add_argument(
+		"csv", nargs="?", type=Path, default=Path("resources/money.csv"),
+	)
+	bench = sub.add_parser("bench", help="compare ledger backends")
+	bench.add_argument("users", nargs="?", type=int, default=50000)
+	bench.add_argument("ops", nargs="?", type=int, default=10000)
+	args = parser.parse_args(argv)
+
+	if args.command == "migrate":
+		count = migrate_to_sqlite(args.snapshot, args.db)
+		logger.info("Migrated %i records to %s.", count, args.db)
+		return
+	if args.command == "export":
+		FileLedger(args.snapshot).export_csv(args.csv)
+		logger.info("Exported %s to %s.", args.snapshot, args.csv)
+		return
+
+	user_ids = [10 ** 17 + i * 7919 for i in range(args.users)]
+	with tempfile.TemporaryDirectory() as tmp:
+		csv_path = Path(tmp) / "money.csv"
+		bin_path = Path(tmp) / "money.bin"
+		db_path = Path(tmp) / "money.db"
+		csv_path.write_text(
+			"\n".join(f"{i},300,user{i}#0" for i in user_ids), encoding="UTF-8",
+		)
+		FileLedger(bin_path).close()
+		migrate_to_sqlite(csv_path, db_path)
+		for path in (csv_path, bin_path, db_path):
+			start = time.perf_counter()
+			backend = open_ledger(path)
+			load = (time.perf_counter() - start) * 1e3
+			results = benchmark(backend, user_ids, args.ops)
+			backend.close()
+			logger.info(
+				"%s, %i users: load %.1f ms, %s",
+				path.name,
+				args.users,
+				load,
+				", ".join(
+					f"{op} {micros:.2f} us/op" for op, micros in results.items()
+				),
+			)
+
+
+if __name__ == "__main__":  # pragma: no cover
+	logging.basicConfig(format="%(message)s", level=logging.INFO)
+	main()
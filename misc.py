@@ -5,6 +5,7 @@ import random
 import re
 from collections.abc import Mapping
 from datetime import datetime
+from importlib.util import find_spec
 from json import loads
 from pathlib import Path
 from typing import Any, Final, override
@@ -73,6 +74,29 @@ BearRootUrl = "https://placebear.com/{}/{}"
 FrogRootUrl = "https://raw.githubusercontent.com/a9-i/frog/main/ImgSetOpt/"
 SealRootUrl = "https://focabot.github.io/random-seal/seals/{}.jpg"
 
+# Every outbound API call goes through one pooled client, so repeat calls
+# reuse open connections instead of paying for DNS, TCP, and TLS each time.
+# Each host in ApiHosts gets its own pool, limited by HostLimits, so a burst
+# of one command can't starve the others; any other host shares a pool
+# limited by HttpLimits. Connections use HTTP/2 if h2 is installed.
+ApiHosts = (
+	"api.brawlhalla.com",
+	"api.dictionaryapi.dev",
+	"api.thecatapi.com",
+	"api.bunnies.io",
+	"dog.ceo",
+	"github.com",
+	"nekos.life",
+	"randomfox.ca",
+)
+HostLimits = httpx.Limits(
+	max_connections=10, max_keepalive_connections=5, keepalive_expiry=60,
+)
+HttpLimits = httpx.Limits(
+	max_connections=50, max_keepalive_connections=10, keepalive_expiry=60,
+)
+Http2: Final[bool] = find_spec("h2") is not None
+
 BotContext = commands.Context[commands.Bot]
 
 TargetTypes = str | nextcord.User | nextcord.Member
@@ -295,6 +319,73 @@ class AnimalException(httpx.RequestError):
 		super().__init__(f"Failed to call {animal.title()} Animal API")
 
 
+class HttpPool:
+	"""
+	The connection-pooled client shared by every outbound API call.
+
+	The client is opened at launch and closed on shutdown; get() also opens
+	it on first use, so the API helpers work outside the bot, too.
+
+	Attributes:
+		client (httpx.AsyncClient | None): The client, if one has been opened
+
+	Methods:
+		open():
+			Open a new client, with a pool for each of ApiHosts.
+		get():
+			Get the client, opening one first if need be.
+		close():
+			Close the client and every connection it holds.
+
+	"""
+
+	def __init__(self) -> None:
+		"""Create a new HttpPool instance, with no client open yet."""
+		self.client: httpx.AsyncClient | None = None
+
+	def open(self) -> httpx.AsyncClient:
+		"""
+		Open a new client, with a pool for each of ApiHosts.
+
+		Returns:
+			httpx.AsyncClient: The new client.
+
+		"""
+		self.client = httpx.AsyncClient(
+			http2=Http2,
+			limits=HttpLimits,
+			timeout=10,
+			mounts={
+				f"https://{host}": httpx.AsyncHTTPTransport(
+					http2=Http2, limits=HostLimits,
+				)
+				for host in ApiHosts
+			},
+		)
+		return self.client
+
+	def get(self) -> httpx.AsyncClient:
+		"""
+		Get the client, opening one first if need be.
+
+		Returns:
+			httpx.AsyncClient: The open client.
+
+		"""
+		if self.client is None or self.client.is_closed:
+			return self.open()
+		return self.client
+
+	async def close(self) -> None:
+		"""Close the client and every connection it holds."""
+		if self.client is not None:
+			await self.client.aclose()
+			self.client = None
+
+
+Http = HttpPool()
+
+
 async def fetch_animal(url: str, *args: str | int) -> str | None:
 	"""
 	Pull an animal image URL from a JSON response.
@@ -319,8 +410,7 @@ async def fetch_animal(url: str, *args: str | int) -> str | None:
 			else, None.
 
 	"""
-	async with httpx.AsyncClient(timeout=10) as client:
-		r = await client.get(url)
+	r = await Http.get().get(url)
 	if r.status_code == Ok:
 		j = r.json()
 		for arg in args:
@@ -332,8 +422,7 @@ async def fetch_animal(url: str, *args: str | int) -> str | None:
 
 
 async def get_moose() -> str:
-	async with httpx.AsyncClient(timeout=10) as client:
-		r = await client.get("https://github.com/LevBernstein/moosePictures/")
+	r = await Http.get().get("https://github.com/LevBernstein/moosePictures/")
 	if r.status_code == Ok:
 		soup = BeautifulSoup(r.content.decode("utf-8"), "html.parser")
 		moose = random.choice(
@@ -361,8 +450,7 @@ async def get_dog(breed: str | None = None) -> str:
 	elif breed == "moose":
 		return await get_moose()
 	elif breed.startswith("breed"):
-		async with httpx.AsyncClient(timeout=10) as client:
-			r = await client.get("https://dog.ceo/api/breeds/list/all")
+		r = await Http.get().get("https://dog.ceo/api/breeds/list/all")
 		if r.status_code == Ok:
 			return "Dog breeds: {}.".format(
 				", ".join(dog for dog in r.json()["message"]),
@@ -454,10 +542,9 @@ async def get_animal(animal_type: str) -> str:
 
 
 async def define(word: str) -> nextcord.Embed:
-	async with httpx.AsyncClient(timeout=10) as client:
-		r = await client.get(
-			"https://api.dictionaryapi.dev/api/v2/entries/en_US/" + word,
-		)
+	r = await Http.get().get(
+		"https://api.dictionaryapi.dev/api/v2/entries/en_US/" + word,
+	)
 	if r.status_code == Ok:
 		j = r.json()
 		p = j[0]["phonetics"]
@@ -704,14 +791,15 @@ class BbHelpCommand(commands.HelpCommand):
 			("!fact", "Gives you a random fun fact."),
 			("!source", "Shows you the source of most facts used in !fact."),
 			(
-				"!flip [bet]",
+				"!flip [bet] [xN]",
 				"Bets a certain amount on flipping a coin. Heads"
-				" you win, tails you lose. Defaults to 10.",
+				" you win, tails you lose. Defaults to 10. Add x5"
+				" to bet that much on each of 5 flips at once.",
 			),
 			(
 				"!blackjack [bet]",
-				"Starts up a game of blackjack. Once you're in a"
-				" game, you can use !hit and !stay to play.",
+				"Starts up a game of blackjack. Once you're in a game,"
+				" you can use !hit and !stay to play, or !hint for advice.",
 			),
 			(
 				"!roll [count]d[num][+/-][mod]",
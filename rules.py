@@ -0,0 +1,27 @@
+"""Beardless Bot blackjack rules."""
+
+# These are kept apart from bucks, which opens the BeardlessBucks ledger on
+# import, so that simulate.py can play by the same rules without it. They
+# are also exposed as attributes of bucks.BlackjackGame.
+
+from pathlib import Path
+from typing import Final
+
+AceVal: Final[int] = 11
+DealerSoftGoal: Final[int] = 17
+FaceVal: Final[int] = 10
+Goal: Final[int] = 21
+CardVals: Final[tuple[int, ...]] = (
+	2, 3, 4, 5, 6, 7, 8, 9, 10, FaceVal, FaceVal, FaceVal, AceVal,
+)
+NumOfDecksInMatch: Final[int] = 4
+ShoePenetration: Final[float] = 0.75
+
+# Every card in a fresh shoe, in the order its shuffle starts from.
+ShoeCards: Final[tuple[int, ...]] = CardVals * 4 * NumOfDecksInMatch
+
+# The basic-strategy table behind !hint, one row per player total, softness,
+# and dealer up card. It is written by python simulate.py strategy, which
+# solves it from these rules; rerun that whenever DealerSoftGoal,
+# NumOfDecksInMatch, or BlackjackGame.dealer_draw change.
+StrategyPath: Final[Path] = Path("resources/strategy.csv")
@@ -0,0 +1,978 @@
+"""Beardless Bot blackjack and BeardlessBucks economy simulators."""
+
+import argparse
+import csv
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache, partial
+from pathlib import Path
+from typing import Final, Self
+
+import nextcord
+
+import rules
+from ledger import (
+	decode_records,
+	decode_snapshot,
+	open_ledger,
+	read_csv,
+	shard_count,
+	shard_index,
+	shard_path,
+)
+
+logger = logging.getLogger(__name__)
+
+AceVal: Final[int] = rules.AceVal
+DealerSoftGoal: Final[int] = rules.DealerSoftGoal
+Goal: Final[int] = rules.Goal
+
+# The cost of !buy, and the balance bucks.reset() sets.
+BuyPrice: Final[int] = 50000
+ResetBalance: Final[int] = 200
+
+# Every way play_hand() can end a hand, and what each pays per bet.
+DealerBlackjack: Final[int] = 0
+BlackjackPush: Final[int] = 1
+PlayerBust: Final[int] = 2
+PlayerGoal: Final[int] = 3
+DealerBust: Final[int] = 4
+PlayerWin: Final[int] = 5
+Push: Final[int] = 6
+DealerWin: Final[int] = 7
+Payouts: Final[tuple[int, ...]] = (-1, 0, -1, 1, 1, 1, 0, -1)
+
+# The table sizes timed by benchmark_reports().
+BenchTables: Final[tuple[int, ...]] = (1, 4, 8)
+
+# Runs of dealer draws less likely than this are left out of dealer_totals.
+MinChance: Final[float] = 1e-9
+
+# A user's recorded (command, bet) pairs; and one worker's share of an
+# economy projection: its index, its users' balances, and their streams.
+Stream = list[tuple[str, str]]
+Shard = tuple[int, dict[int, int], dict[int, Stream] | None]
+
+
+class SimulationResult:
+	"""
+	The outcome of simulating many hands of single-player blackjack.
+
+	Every hand is bet at 1, so a hand pays out 1, 0, or -1.
+
+	Attributes:
+		stand_on (int): The total the simulated player stopped hitting at
+		hands (int): The number of hands played
+		wins (int): Hands the player won
+		pushes (int): Hands that tied, returning the player's bet
+		losses (int): Hands the player lost
+		player_busts (int): Hands the player lost by going over Goal
+		dealer_plays (int): Hands in which the dealer drew to a total
+		dealer_busts (int): Hands in which the dealer went over Goal
+
+	"""
+
+	def __init__(self, stand_on: int) -> None:
+		"""
+		Create a new, empty SimulationResult instance.
+
+		Args:
+			stand_on (int): The total the simulated player stops hitting at
+
+		"""
+		self.stand_on = stand_on
+		self.hands = 0
+		self.wins = 0
+		self.pushes = 0
+		self.losses = 0
+		self.player_busts = 0
+		self.dealer_plays = 0
+		self.dealer_busts = 0
+
+	@property
+	def ev(self) -> float:
+		"""
+		The player's mean payout per hand, in bets.
+
+		Returns:
+			float: The expected value of a hand; negative favors the house.
+
+		"""
+		return (self.wins - self.losses) / self.hands
+
+	@property
+	def variance(self) -> float:
+		"""
+		The variance of the player's payout per hand, in bets squared.
+
+		Returns:
+			float: The variance of a hand's payout.
+
+		"""
+		return (self.wins + self.losses) / self.hands - self.ev ** 2
+
+	def report(self) -> str:
+		"""
+		Summarize the result in one line.
+
+		Returns:
+			str: The strategy, EV, variance, and bust rates.
+
+		"""
+		return (
+			f"stand on {self.stand_on}: {self.hands} hands, "
+			f"EV {self.ev:+.4f}, variance {self.variance:.4f}, "
+			f"player busts {self.player_busts / self.hands:.2%}, "
+			"dealer busts "
+			f"{self.dealer_busts / max(self.dealer_plays, 1):.2%}"
+		)
+
+
+def play_player(
+	first: int, second: int, stand_on: int, deal: Callable[[], int],
+) -> int:
+	"""
+	Play out the player's hand as BlackjackGame would.
+
+	A pair of Aces starts at 12. The player hits until reaching stand_on,
+	and an Ace that would bust the player counts as 1; reaching Goal ends
+	the hand at once.
+
+	Args:
+		first (int): The player's first card
+		second (int): The player's second card
+		stand_on (int): The lowest total the player stays on
+		deal (Callable[[], int]): Deals the next card from the shoe
+
+	Returns:
+		int: The player's final total, over Goal if they busted.
+
+	"""
+	total = first + second
+	soft = (first == AceVal) + (second == AceVal)
+	if total > Goal:
+		total -= 10
+		soft -= 1
+	while total < stand_on:
+		card = deal()
+		total += card
+		if card == AceVal:
+			soft += 1
+		if soft and total > Goal:
+			total -= 10
+			soft -= 1
+	return total
+
+
+def play_dealer(up: int, hole: int, deal: Callable[[], int]) -> int:
+	"""
+	Draw the dealer's cards as BlackjackGame.dealer_draw does.
+
+	The dealer stands on any DealerSoftGoal and, while over it, counts
+	any Ace still worth 11 as 1 and carries on drawing.
+
+	Args:
+		up (int): The dealer's face-up card
+		hole (int): The dealer's face-down card
+		deal (Callable[[], int]): Deals the next card from the shoe
+
+	Returns:
+		int: The dealer's final total.
+
+	"""
+	total = up + hole
+	soft = (up == AceVal) + (hole == AceVal)
+	while True:
+		if total > DealerSoftGoal:
+			if not soft:
+				return total
+			total -= 10
+			soft -= 1
+		elif total == DealerSoftGoal:
+			return total
+		card = deal()
+		total += card
+		if card == AceVal:
+			soft += 1
+
+
+class FastShoe:
+	"""
+	A Shoe that deals exactly what bucks.Shoe would, from a fresh shoe.
+
+	Each deal is one step of Shoe.deal()'s Fisher-Yates shuffle, with
+	random.randint(i, n - 1) reproduced from getrandbits(), so the same seed
+	deals the same cards as the bot. reset() undoes every swap since the
+	last reset instead of copying rules.ShoeCards again.
+
+	Attributes:
+		cards (list[int]): Every card in the shoe, those already dealt first
+		swaps (list[int]): The position each dealt card was swapped from
+
+	Methods:
+		deal():
+			Deal the next card.
+		reset():
+			Return the shoe to its fresh, undealt order.
+
+	"""
+
+	__slots__ = ("_bits", "_getrandbits", "cards", "swaps")
+
+	def __init__(self, rng: random.Random) -> None:
+		"""
+		Create a new FastShoe instance.
+
+		Args:
+			rng (random.Random): The generator to shuffle with
+
+		"""
+		self.cards = list(rules.ShoeCards)
+		self.swaps: list[int] = []
+		self._bits = [m.bit_length() for m in range(len(self.cards) + 1)]
+		self._getrandbits = rng.getrandbits
+
+	def deal(self) -> int:
+		"""
+		Deal the next card.
+
+		Returns:
+			int: The value of the card dealt.
+
+		"""
+		cards = self.cards
+		swaps = self.swaps
+		getrandbits = self._getrandbits
+		i = len(swaps)
+		m = len(cards) - i
+		k = self._bits[m]
+		r = getrandbits(k)
+		while r >= m:
+			r = getrandbits(k)
+		j = i + r
+		swaps.append(j)
+		card = cards[j]
+		cards[j] = cards[i]
+		cards[i] = card
+		return card
+
+	def reset(self) -> None:
+		"""Return the shoe to its fresh, undealt order."""
+		cards = self.cards
+		swaps = self.swaps
+		while swaps:
+			i = len(swaps) - 1
+			j = swaps.pop()
+			cards[i], cards[j] = cards[j], cards[i]
+
+
+def play_hand(shoe: FastShoe, stand_on: int) -> int:
+	"""
+	Play one hand of single-player blackjack from a fresh shoe.
+
+	Cards are dealt as BlackjackGame deals them: dealer up card, dealer
+	hole card, then the player's two cards. A dealer blackjack ends the
+	hand before the player plays; else, see play_player and play_dealer.
+
+	Args:
+		shoe (FastShoe): The shoe to deal from; reset before dealing
+		stand_on (int): The lowest total the player stays on, at most Goal
+
+	Returns:
+		int: How the hand ended; index Payouts with it for the payout.
+
+	"""
+	shoe.reset()
+	deal = shoe.deal
+	up = deal()
+	hole = deal()
+	first = deal()
+	second = deal()
+	if up + hole == Goal:
+		return BlackjackPush if first + second == Goal else DealerBlackjack
+	total = play_player(first, second, stand_on, deal)
+	if total > Goal:
+		return PlayerBust
+	if total == Goal:
+		return PlayerGoal
+	dealer = play_dealer(up, hole, deal)
+	if dealer > Goal:
+		return DealerBust
+	if total > dealer:
+		return PlayerWin
+	return Push if total == dealer else DealerWin
+
+
+def simulate(
+	hands: int, stand_on: int, seed: int | None = None,
+) -> SimulationResult:
+	"""
+	Play many hands of single-player blackjack under the bot's rules.
+
+	Each hand is dealt from a fresh shoe, exactly as a !blackjack game is;
+	see play_hand. The first hand dealt with a given seed is the one a
+	!blackjack game with that seed deals; see bucks.RngService.
+
+	Args:
+		hands (int): The number of hands to play
+		stand_on (int): The lowest total the player stays on, at most Goal
+		seed (int | None): Seed for the random number generator; if None,
+			it is seeded from the system (default is None)
+
+	Returns:
+		SimulationResult: The tally of every hand played.
+
+	"""
+	assert stand_on <= Goal
+	shoe = FastShoe(random.Random(seed))
+	outcomes = [0] * len(Payouts)
+	for _ in range(hands):
+		outcomes[play_hand(shoe, stand_on)] += 1
+	result = SimulationResult(stand_on)
+	result.hands = hands
+	for outcome, count in enumerate(outcomes):
+		if Payouts[outcome] > 0:
+			result.wins += count
+		elif Payouts[outcome] < 0:
+			result.losses += count
+		else:
+			result.pushes += count
+	result.player_busts = outcomes[PlayerBust]
+	result.dealer_busts = outcomes[DealerBust]
+	result.dealer_plays = (
+		result.dealer_busts
+		+ outcomes[PlayerWin]
+		+ outcomes[Push]
+		+ outcomes[DealerWin]
+	)
+	return result
+
+
+class EconomyConfig:
+	"""
+	How the simulated users of an economy projection gamble.
+
+	Attributes:
+		commands (int): Synthetic commands each user sends, if no
+			recorded stream is given
+		flip_share (float): The fraction of synthetic commands that are
+			!flip; the rest are !blackjack
+		bet (str): What each synthetic command bets, as typed after the
+			command: a number of BeardlessBucks or "all"
+		stand_on (int): The lowest total users stay on in blackjack
+		resets (bool): Whether users who go broke use !reset
+
+	"""
+
+	def __init__(
+		self,
+		commands: int = 1000,
+		flip_share: float = 0.5,
+		bet: str = "10",
+		stand_on: int = 17,
+		*,
+		resets: bool = True,
+	) -> None:
+		"""
+		Create a new EconomyConfig instance.
+
+		Args:
+			commands (int): Synthetic commands each user sends
+				(default is 1000)
+			flip_share (float): The fraction of synthetic commands that are
+				!flip (default is 0.5)
+			bet (str): What each synthetic command bets (default is "10")
+			stand_on (int): The lowest total users stay on in blackjack
+				(default is 17)
+			resets (bool): Whether users who go broke use !reset
+				(default is True)
+
+		"""
+		self.commands = commands
+		self.flip_share = flip_share
+		self.bet = bet
+		self.stand_on = stand_on
+		self.resets = resets
+
+
+class EconomyResult:
+	"""
+	Every user's balance at the end of an economy projection.
+
+	Attributes:
+		balances (dict[int, int]): Every user's final balance, by user id
+		reached (dict[int, int]): For each user whose balance reached
+			BuyPrice, the number of commands it took; 0 if it started there
+
+	Methods:
+		of(balances):
+			Wrap balances that have not been simulated, to report on them.
+		report():
+			Summarize the balance distribution in one line.
+
+	"""
+
+	def __init__(self) -> None:
+		"""Create a new, empty EconomyResult instance."""
+		self.balances: dict[int, int] = {}
+		self.reached: dict[int, int] = {}
+
+	@classmethod
+	def of(cls, balances: dict[int, int]) -> Self:
+		"""
+		Wrap balances that have not been simulated, to report on them.
+
+		Args:
+			balances (dict[int, int]): Every user's balance, by user id
+
+		Returns:
+			Self: A result holding a copy of balances.
+
+		"""
+		result = cls()
+		result.balances = dict(balances)
+		result.reached = {
+			user_id: 0
+			for user_id, balance in balances.items() if balance >= BuyPrice
+		}
+		return result
+
+	def report(self) -> str:
+		"""
+		Summarize the balance distribution in one line.
+
+		Returns:
+			str: The balance percentiles and how many users could !buy.
+
+		"""
+		balances = sorted(self.balances.values())
+		percentiles = ", ".join(
+			f"p{q} {balances[min(len(balances) - 1, len(balances) * q // 100)]}"
+			for q in (10, 25, 50, 75, 90)
+		)
+		report = (
+			f"{len(balances)} users: min {balances[0]}, {percentiles}, "
+			f"max {balances[-1]}, mean {statistics.fmean(balances):.0f}; "
+			f"{len(self.reached)} reached {BuyPrice}"
+		)
+		if self.reached:
+			report += (
+				f", in a median {statistics.median(self.reached.values()):.0f}"
+				" commands"
+			)
+		return report
+
+
+def load_balances(path: Path) -> dict[int, int]:
+	"""
+	Read every user's balance from a FileLedger snapshot and journal.
+
+	If the snapshot has been split by a ShardedLedger, every shard is read
+	instead. No file is written to, so this is safe to run against the live
+	ledger.
+
+	Args:
+		path (Path): The CSV or binary snapshot
+
+	Returns:
+		dict[int, int]: Every user's balance, by user id.
+
+	"""
+	if (count := shard_count(path)) > 1:
+		balances: dict[int, int] = {}
+		for index in range(count):
+			balances.update(load_balances(shard_path(path, index)))
+		return balances
+	entries = (
+		{} if not path.exists()
+		else decode_snapshot(path.read_bytes()) if path.suffix == ".bin"
+		else read_csv(path)
+	)
+	balances = {user_id: entry.balance for user_id, entry in entries.items()}
+	if (journal := path.with_suffix(".journal")).exists():
+		records, _ = decode_records(journal.read_bytes())
+		balances.update({record[0]: record[2] for record in records})
+	return balances
+
+
+def read_stream(path: Path) -> dict[int, Stream]:
+	"""
+	Read a recorded command stream.
+
+	Args:
+		path (Path): A CSV file with one "user id,command,bet" row per
+			command, in the order they were sent; command is flip or
+			blackjack
+
+	Returns:
+		dict[int, Stream]: Each user's commands and bets, in order.
+
+	"""
+	streams: dict[int, Stream] = {}
+	with path.open("r", encoding="UTF-8") as f:
+		for user_id, command, bet in csv.reader(f):
+			streams.setdefault(int(user_id), []).append((command, bet))
+	return streams
+
+
+def play_economy_shard(
+	config: EconomyConfig, seed: int | None, shard: Shard,
+) -> EconomyResult:
+	"""
+	Replay every command sent by one shard's users against their balances.
+
+	Runs in a worker process. A user's commands only ever touch their own
+	balance, so each shard is independent of the others.
+
+	Args:
+		config (EconomyConfig): How users gamble
+		seed (int | None): Seed for every shard's random number generator,
+			combined with the shard's index; if None, seeded from the system
+		shard (Shard): The shard's index, its users' starting balances,
+			and the commands they sent, if recorded
+
+	Returns:
+		EconomyResult: The shard's users' final balances.
+
+	"""
+	index, balances, streams = shard
+	rng = random.Random(None if seed is None else f"{seed}:{index}")
+	shoe = FastShoe(rng)
+	result = EconomyResult()
+	for user_id, start in balances.items():
+		balance = start
+		if balance >= BuyPrice:
+			result.reached[user_id] = 0
+		stream = [
+			(
+				"flip" if rng.random() < config.flip_share else "blackjack",
+				config.bet,
+			)
+			for _ in range(config.commands)
+		] if streams is None else streams.get(user_id, [])
+		for sent, (command, bet_text) in enumerate(stream, 1):
+			if balance <= 0 and config.resets:
+				balance = ResetBalance
+			bet = balance if bet_text == "all" else int(bet_text)
+			if bet > balance:
+				continue
+			if command == "flip":
+				balance += bet if rng.getrandbits(1) else -bet
+			else:
+				balance += bet * Payouts[play_hand(shoe, config.stand_on)]
+			if balance >= BuyPrice and user_id not in result.reached:
+				result.reached[user_id] = sent
+		result.balances[user_id] = balance
+	return result
+
+
+def project_economy(
+	balances: dict[int, int],
+	config: EconomyConfig,
+	streams: dict[int, Stream] | None = None,
+	*,
+	workers: int | None = None,
+	seed: int | None = None,
+) -> EconomyResult:
+	"""
+	Project how users' balances evolve as they gamble.
+
+	Users are split across worker processes by ledger.shard_index, the
+	same way ShardedLedger splits them, and each process replays its
+	users' commands against its own copy of their balances.
+
+	Args:
+		balances (dict[int, int]): Every user's starting balance, by id
+		config (EconomyConfig): How users gamble
+		streams (dict[int, Stream] | None): Each user's recorded commands;
+			if None, commands are generated from config (default is None)
+		workers (int | None): The number of worker processes; if None,
+			one per core (default is None)
+		seed (int | None): Seed for the workers' random number generators;
+			if None, they are seeded from the system (default is None)
+
+	Returns:
+		EconomyResult: Every user's final balance.
+
+	"""
+	workers = workers or os.cpu_count() or 1
+	shards: list[Shard] = [
+		(i, {}, None if streams is None else {}) for i in range(workers)
+	]
+	for user_id, balance in balances.items():
+		_, shard_balances, shard_streams = shards[shard_index(user_id, workers)]
+		shard_balances[user_id] = balance
+		if streams is not None and shard_streams is not None:
+			shard_streams[user_id] = streams.get(user_id, [])
+	result = EconomyResult()
+	# Workers fork from the bot's modules as already imported, rather than
+	# importing them again; they only compute, never touching the ledger.
+	with ProcessPoolExecutor(workers) as pool:
+		for part in pool.map(partial(play_economy_shard, config, seed), shards):
+			result.balances.update(part.balances)
+			result.reached.update(part.reached)
+	return result
+
+
+class OutOfCardsError(Exception):
+	"""Raised by dealer_totals when a draw has not been branched on yet."""
+
+
+def dealer_totals(up: int, counts: dict[int, int]) -> dict[int, float]:
+	"""
+	Find the chance of each final dealer total, given their up card.
+
+	Every hole card and run of draws is replayed through play_dealer, so
+	the distribution follows the dealer's rules exactly; each card is drawn
+	without replacement from counts. A hole card that makes Goal ends the
+	round before the player moves, so those hands are left out, as is any
+	run of draws less likely than MinChance, and the rest renormalized.
+
+	Args:
+		up (int): The dealer's face-up card
+		counts (dict[int, int]): How many of each card value are left in
+			the shoe; restored before returning
+
+	Returns:
+		dict[int, float]: The chance of each total the dealer stands on.
+
+	"""
+	totals: dict[int, float] = {}
+
+	def branch(drawn: list[int], chance: float) -> None:
+		cards = iter(drawn[1:])
+
+		def deal() -> int:
+			if (card := next(cards, None)) is None:
+				raise OutOfCardsError
+			return card
+
+		if drawn:
+			try:
+				total = play_dealer(up, drawn[0], deal)
+			except OutOfCardsError:
+				pass
+			else:
+				totals[total] = totals.get(total, 0.0) + chance
+				return
+		remaining = sum(counts.values())
+		for card, count in list(counts.items()):
+			odds = chance * count / remaining
+			if odds > MinChance and (drawn or up + card != Goal):
+				counts[card] -= 1
+				branch([*drawn, card], odds)
+				counts[card] += 1
+
+	branch([], 1.0)
+	scale = sum(totals.values())
+	return {total: chance / scale for total, chance in totals.items()}
+
+
+def solve_up_card(
+	up: int, shoe: dict[int, int],
+) -> list[tuple[int, bool, int, str, float, float]]:
+	"""
+	Work out whether to hit or stay on every hand against one up card.
+
+	Args:
+		up (int): The dealer's face-up card
+		shoe (dict[int, int]): How many of each card value are in a fresh
+			shoe; restored before returning
+
+	Returns:
+		list[tuple[int, bool, int, str, float, float]]: The rows of
+		solve_strategy's table for this up card.
+
+	"""
+	shoe[up] -= 1
+	dealer = dealer_totals(up, shoe)
+	size = sum(shoe.values())
+	draws = [(card, count / size) for card, count in shoe.items()]
+	shoe[up] += 1
+
+	@cache
+	def stay(total: int) -> float:
+		return sum(
+			chance if total > final or final > Goal else -chance
+			for final, chance in dealer.items()
+			if final != total
+		)
+
+	@cache
+	def hit(total: int, soft: int) -> float:
+		ev = 0.0
+		for card, chance in draws:
+			new_total = total + card
+			new_soft = soft + (card == AceVal)
+			if new_soft and new_total > Goal:
+				new_total -= 10
+				new_soft -= 1
+			if new_total > Goal:
+				ev -= chance
+			elif new_total == Goal:
+				ev += chance
+			else:
+				ev += chance * max(stay(new_total), hit(new_total, new_soft))
+		return ev
+
+	rows: list[tuple[int, bool, int, str, float, float]] = []
+	for soft, lowest in ((False, 4), (True, 12)):
+		for total in range(lowest, Goal):
+			stay_ev = stay(total)
+			hit_ev = hit(total, int(soft))
+			action = "hit" if hit_ev > stay_ev else "stay"
+			rows.append((total, soft, up, action, stay_ev, hit_ev))
+	return rows
+
+
+def solve_strategy(
+	cards: Iterable[int] = rules.ShoeCards,
+) -> list[tuple[int, bool, int, str, float, float]]:
+	"""
+	Work out whether to hit or stay on every hand the player can ask about.
+
+	For each dealer up card, the chance of each dealer total comes from
+	dealer_totals; the player's own draws are taken at the shoe's
+	frequencies. Staying wins on a higher total or a dealer bust and
+	pushes on a tie; hitting busts past Goal and wins at once on reaching
+	it, as in BlackjackGame. Rerun this whenever DealerSoftGoal,
+	NumOfDecksInMatch, or the dealer's drawing rules change.
+
+	Args:
+		cards (Iterable[int]): Every card in a fresh shoe (default is
+			rules.ShoeCards)
+
+	Returns:
+		list[tuple[int, bool, int, str, float, float]]: For each hard total
+		from 4 and soft total from 12 up to Goal - 1, and each up card:
+		the total, whether it is soft, the up card, "hit" or "stay", and
+		the expected return per buck bet of staying and of hitting.
+
+	"""
+	shoe: dict[int, int] = {}
+	for card in cards:
+		shoe[card] = shoe.get(card, 0) + 1
+	rows: list[tuple[int, bool, int, str, float, float]] = []
+	for up in sorted(shoe):
+		rows += solve_up_card(up, shoe)
+	return rows
+
+
+def write_strategy(
+	rows: Iterable[tuple[int, bool, int, str, float, float]], path: Path,
+) -> None:
+	"""
+	Write a basic-strategy table for bucks.load_strategy to read.
+
+	Args:
+		rows (Iterable[tuple[int, bool, int, str, float, float]]): The
+			table, as solve_strategy returns it
+		path (Path): Where to write the table
+
+	"""
+	with path.open("w", encoding="UTF-8", newline="") as f:
+		writer = csv.writer(f)
+		writer.writerow(("total", "soft", "up", "action", "stay", "hit"))
+		for total, soft, up, action, stay_ev, hit_ev in rows:
+			writer.writerow((
+				total, int(soft), up, action, f"{stay_ev:.6f}", f"{hit_ev:.6f}",
+			))
+
+
+def benchmark_reports(
+	tables: Iterable[int] = BenchTables,
+	rounds: int = 2000,
+	seed: int | None = None,
+) -> dict[int, tuple[float, float]]:
+	"""
+	Time the real blackjack engine rendering each report, by table size.
+
+	Each round is a multiplayer table in which every player hits below
+	DealerSoftGoal, then stays. Bets are settled in a throwaway ledger, so
+	bucks.Bank is swapped out for the duration. This is the only simulator
+	that imports bucks, which opens the live ledger on import; the others
+	play by rules alone.
+
+	Args:
+		tables (Iterable[int]): The numbers of players to seat (default is
+			BenchTables)
+		rounds (int): Rounds to play at each table (default is 2000)
+		seed (int | None): Seed for the games' generators and the random
+			module; None to seed from the system (default is None)
+
+	Returns:
+		dict[int, tuple[float, float]]: Mean microseconds to start a round,
+		and to take a single hit or stay, by number of players.
+
+	"""
+	import bucks  # noqa: PLC0415
+
+	random.seed(seed)
+	bucks.Rng.root.seed(seed)
+	tables = list(tables)
+	users = [
+		nextcord.User(
+			state=None,  # type: ignore[arg-type]
+			data={
+				"id": user_id,
+				"username": f"player{user_id}",
+				"discriminator": "0",
+				"avatar": None,
+			},
+		)
+		for user_id in range(1, max(tables) + 1)
+	]
+	results: dict[int, tuple[float, float]] = {}
+	bank = bucks.Bank
+	with tempfile.TemporaryDirectory() as tmp:
+		bucks.Bank = open_ledger(Path(tmp) / "money.bin")
+		try:
+			bucks.Bank.set_many((user.id, 10 ** 9, str(user)) for user in users)
+			for players in tables:
+				starting = acting = 0.0
+				actions = 0
+				for _ in range(rounds):
+					game = bucks.BlackjackGame(users[0], multiplayer=True)
+					for user in users[1:players]:
+						game.add_player(user)
+					start = time.perf_counter()
+					game.start_game()
+					starting += time.perf_counter() - start
+					while not game.round_over():
+						start = time.perf_counter()
+						if game.players[game.turn_idx].total < DealerSoftGoal:
+							game.deal_current_player()
+						else:
+							game.stay_current_player()
+						acting += time.perf_counter() - start
+						actions += 1
+				results[players] = (
+					starting / rounds * 1e6, acting / max(actions, 1) * 1e6,
+				)
+		finally:
+			bucks.Bank.close()
+			bucks.Bank = bank
+	return results
+
+
+def main(argv: list[str] | None = None) -> None:
+	"""
+	Run a simulator from the command line.
+
+	python simulate.py blackjack [hands] [--stand-on N ...] [--seed S]
+		Simulate hands of !blackjack for each strategy and log the results.
+	python simulate.py economy [snapshot] [--stream CSV] [--commands N]
+			[--flip-share F] [--bet B] [--stand-on N] [--no-resets]
+			[--workers W] [--seed S]
+		Project every user's balance from a copy of the ledger, replaying
+		a recorded command stream or a synthetic one, and log the balance
+		distribution.
+	python simulate.py bench [rounds] [--seed S]
+		Time rendering blackjack reports on 1, 4, and 8-player tables.
+	python simulate.py strategy [path]
+		Solve the basic-strategy table behind !hint and write it to path
+		(default is rules.StrategyPath).
+
+	Args:
+		argv (list[str] | None): Arguments to parse; sys.argv if None
+			(default is None)
+
+	"""
+	parser = argparse.ArgumentParser(description="BeardlessBucks simulators")
+	sub = parser.add_subparsers(dest="command", required=True)
+	blackjack = sub.add_parser("blackjack", help="simulate !blackjack hands")
+	blackjack.add_argument("hands", nargs="?", type=int, default=1000000)
+	blackjack.add_argument(
+		"--stand-on",
+		nargs="+",
+		type=int,
+		default=list(range(12, Goal)),
+		help="totals to stay on, one strategy each",
+	)
+	blackjack.add_argument("--seed", type=int, default=None)
+	economy = sub.add_parser("economy", help="project the economy")
+	economy.add_argument(
+		"snapshot", nargs="?", type=Path, default=Path("resources/money.bin"),
+	)
+	economy.add_argument("--stream", type=Path, default=None)
+	economy.add_argument("--commands", type=int, default=1000)
+	economy.add_argument("--flip-share", type=float, default=0.5)
+	economy.add_argument("--bet", default="10")
+	economy.add_argument("--stand-on", type=int, default=17)
+	economy.add_argument("--no-resets", action="store_true")
+	economy.add_argument("--workers", type=int, default=None)
+	economy.add_argument("--seed", type=int, default=None)
+	bench = sub.add_parser("bench", help="time rendering blackjack reports")
+	bench.add_argument("rounds", nargs="?", type=int, default=2000)
+	bench.add_argument("--seed", type=int, default=None)
+	strategy = sub.add_parser("strategy", help="solve the !hint table")
+	strategy.add_argument(
+		"path", nargs="?", type=Path, default=rules.StrategyPath,
+	)
+	args = parser.parse_args(argv)
+
+	if args.command == "blackjack":
+		for stand_on in args.stand_on:
+			start = time.perf_counter()
+			result = simulate(args.hands, stand_on, args.seed)
+			logger.info(
+				"%s (%.1f s)", result.report(), time.perf_counter() - start,
+			)
+		return
+	if args.command == "bench":
+		# Every game logs its seed; thousands of them would bury the timings.
+		logging.getLogger("bucks").setLevel(logging.WARNING)
+		for players, (starting, acting) in benchmark_reports(
+			rounds=args.rounds, seed=args.seed,
+		).items():
+			logger.info(
+				"%i-player table: start %.1f us, hit or stay %.1f us",
+				players,
+				starting,
+				acting,
+			)
+		return
+	if args.command == "strategy":
+		start = time.perf_counter()
+		rows = solve_strategy()
+		write_strategy(rows, args.path)
+		logger.info(
+			"Wrote %i plays to %s (%.1f s)",
+			len(rows),
+			args.path,
+			time.perf_counter() - start,
+		)
+		return
+
+	balances = load_balances(args.snapshot)
+	logger.info("Before: %s", EconomyResult.of(balances).report())
+	start = time.perf_counter()
+	projection = project_economy(
+		balances,
+		EconomyConfig(
+			args.commands,
+			args.flip_share,
+			args.bet,
+			args.stand_on,
+			resets=not args.no_resets,
+		),
+		None if args.stream is None else read_stream(args.stream),
+		workers=args.workers,
+		seed=args.seed,
+	)
+	logger.info(
+		"After: %s (%.1f s)",
+		projection.report(),
+		time.perf_counter() - start,
+	)
+
+
+if __name__ == "__main__":  # pragma: no cover
+	logging.basicConfig(format="%(message)s", level=logging.INFO)
+	main()